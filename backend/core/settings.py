@@ -158,3 +158,18 @@ CHANNEL_LAYERS = {
 RESEND_API_KEY = os.getenv("RESEND_API_KEY")
 EMAIL_FROM = os.getenv("EMAIL_FROM", "onboarding@resend.dev")
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
+
+# CPU-bound engine work (bot search) runs in this many worker processes,
+# keeping it off the ASGI worker's GIL. 0 runs it in a thread instead.
+ENGINE_WORKER_PROCESSES = int(os.getenv("ENGINE_WORKER_PROCESSES", "2"))
+
+# Background game analysis jobs run on this many threads per process; the
+# positions of a game are analysed in parallel in a separate process pool
+# (0 analyses them in the calling thread)
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "2"))
+ANALYSIS_WORKER_PROCESSES = int(os.getenv("ANALYSIS_WORKER_PROCESSES", str(os.cpu_count() or 1)))
+# Per-position search budget of the deep analysis mode
+ANALYSIS_DEEP_BUDGET_MS = int(os.getenv("ANALYSIS_DEEP_BUDGET_MS", "250"))
+
+# Search budget of the live evaluation sent with each move (0 turns it off)
+LIVE_EVAL_BUDGET_MS = int(os.getenv("LIVE_EVAL_BUDGET_MS", "100"))
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from ..models import Game, GameMove, GameMode, GameStatus, GameInvitation, ChatMessage
 from ..bot_config import BOT_CONFIGS
+from ..move_encoding import pack_moves, wants_packed
 
 class ChatMessageSerializer(serializers.ModelSerializer):
     class Meta:
@@ -42,6 +43,14 @@ class GameMoveSerializer(serializers.ModelSerializer):
         model = GameMove
         fields = ['move_no', 'player', 'cell', 'subcell', 'created_at']
 
+class PackedMovesField(serializers.Field):
+    """A game's moves in the compact encoding of games.move_encoding."""
+    def __init__(self, **kwargs):
+        super().__init__(source='*', read_only=True, **kwargs)
+
+    def to_representation(self, game):
+        return pack_moves(game.moves.all(), game.created_at)
+
 class GameSerializer(serializers.ModelSerializer):
     moves = GameMoveSerializer(many=True, read_only=True)
     chat_messages = ChatMessageSerializer(many=True, read_only=True)
@@ -50,12 +59,6 @@ class GameSerializer(serializers.ModelSerializer):
     player_x_avatar = serializers.SerializerMethodField()
     player_o_avatar = serializers.SerializerMethodField()
     
-    current_turn = serializers.SerializerMethodField()
-    next_board_constraint = serializers.SerializerMethodField()
-    winner = serializers.SerializerMethodField()
-    move_count = serializers.SerializerMethodField()
-    last_move_at = serializers.SerializerMethodField()
-    
     class Meta:
         model = Game
         fields = [
@@ -70,30 +73,15 @@ class GameSerializer(serializers.ModelSerializer):
             'player_x_mmr_change', 'player_o_mmr_change',
             'player_x_lp_change', 'player_o_lp_change'
         ]
+        # Board state is kept on the row by GameLogic.save_move
+        read_only_fields = ['current_turn', 'next_board_constraint', 'winner', 'move_count', 'last_move_at']
 
-    def get_current_turn(self, obj):
-        from ..logic import GameLogic
-        return GameLogic.get_current_turn(obj.id)
-
-    def get_next_board_constraint(self, obj):
-        from ..logic import GameLogic
-        return GameLogic.get_next_board_constraint(obj.id)
-
-    def get_winner(self, obj):
-        if obj.winner:
-            return obj.winner
-        from ..logic import GameLogic
-        return GameLogic.get_winner(obj.id)
-
-
-    def get_move_count(self, obj):
-        from ..logic import GameLogic
-        return GameLogic.get_move_count(obj.id)
-
-    def get_last_move_at(self, obj):
-        from ..logic import GameLogic
-        last_move = GameLogic.get_last_move(obj.id)
-        return last_move.created_at if last_move else None
+    def get_fields(self):
+        fields = super().get_fields()
+        # ?moves=packed swaps the move dicts for the compact encoding
+        if 'moves' in fields and wants_packed(self.context.get('request')):
+            fields['moves'] = PackedMovesField()
+        return fields
 
     def get_player_x_name(self, obj):
         if obj.mode == 'local' and obj.player_x:
@@ -127,3 +115,39 @@ class GameSerializer(serializers.ModelSerializer):
         from users.models import PlayerProfile
         profile, _ = PlayerProfile.objects.get_or_create(user=obj.player_o)
         return profile.get_avatar_config()
+
+class GameSummarySerializer(GameSerializer):
+    """
+    GameSerializer without the move and chat arrays, for lists. Avatars are
+    read through the players' profiles without creating them, so a queryset
+    with `GAME_SUMMARY_RELATED` serializes any number of games with no extra
+    queries.
+    """
+    class Meta(GameSerializer.Meta):
+        fields = [f for f in GameSerializer.Meta.fields if f not in ('moves', 'chat_messages')]
+
+    def get_player_x_avatar(self, obj):
+        if not obj.player_x:
+            return super().get_player_x_avatar(obj)
+        return self.profile_avatar(obj.player_x)
+
+    def get_player_o_avatar(self, obj):
+        if not obj.player_o:
+            return super().get_player_o_avatar(obj)
+        return self.profile_avatar(obj.player_o)
+
+    @staticmethod
+    def profile_avatar(user):
+        from users.models import PlayerProfile
+        try:
+            profile = user.player_profile
+        except PlayerProfile.DoesNotExist:
+            return {}
+        return profile.get_avatar_config()
+
+# select_related() for GameSummarySerializer: players, profiles and avatar configs
+GAME_SUMMARY_RELATED = (
+    'player_x__player_profile__avatar_config',
+    'player_o__player_profile__avatar_config',
+)
+
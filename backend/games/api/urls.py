@@ -3,7 +3,7 @@ from .views import (
     CreateGameView, JoinGameView, GameDetailView,
     ForfeitGameView, UserGameListView, BotStatsView,
     GameInvitationView, PendingGameInvitationsView, GameInvitationActionView,
-    GameEvaluationView
+    GameEvaluationView, GameEvaluationJobView, GameEvaluationJobDetailView
 )
 
 urlpatterns = [
@@ -17,4 +17,6 @@ urlpatterns = [
     path('<uuid:pk>/forfeit/', ForfeitGameView.as_view(), name='forfeit_game'),
     path('bot-stats/', BotStatsView.as_view(), name='bot_stats'),
     path('<uuid:pk>/evaluation/', GameEvaluationView.as_view(), name='game_evaluation'),
+    path('<uuid:pk>/evaluation/jobs/', GameEvaluationJobView.as_view(), name='game_evaluation_jobs'),
+    path('<uuid:pk>/evaluation/jobs/<uuid:job_id>/', GameEvaluationJobDetailView.as_view(), name='game_evaluation_job'),
 ]
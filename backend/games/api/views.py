@@ -1,14 +1,26 @@
+import base64
+import binascii
+import hashlib
+import uuid
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.pagination import BasePagination
+from rest_framework.utils.urls import replace_query_param
 from django.shortcuts import get_object_or_404
 from django.db.models import Count, Q
 from ..models import Game, GameStatus, GameMode, GameInvitation, GameInvitationStatus, GameMove
-from .serializers import CreateGameSerializer, JoinGameSerializer, GameSerializer, GameInvitationSerializer
+from .serializers import CreateGameSerializer, JoinGameSerializer, GameSerializer, GameSummarySerializer, GameInvitationSerializer, GAME_SUMMARY_RELATED
 from ..auth_utils import get_user_from_request
+from ..state_cache import GameStateCache
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
+from datetime import datetime, timedelta
+from rest_framework.exceptions import NotFound
+from ..move_encoding import wants_packed
+from users.models import AvatarConfig
 
 class GameInvitationView(APIView):
     def post(self, request):
@@ -70,7 +82,7 @@ class GameInvitationActionView(APIView):
             if game.status == GameStatus.WAITING:
                 game.player_o = user
                 game.status = GameStatus.ACTIVE
-                game.save()
+                game.save(update_fields=['player_o', 'status'])
                 
                 # Notify via WebSocket
                 channel_layer = get_channel_layer()
@@ -129,7 +141,7 @@ class CreateGameView(APIView):
         player_x = user
         player_o = None
         
-        if mode in [GameMode.BOT_EASY, GameMode.BOT_MEDIUM, GameMode.BOT_HARD, GameMode.BOT_CUSTOM]:
+        if mode in [GameMode.BOT_EASY, GameMode.BOT_MEDIUM, GameMode.BOT_HARD, GameMode.BOT_EXPERT, GameMode.BOT_CUSTOM]:
             import random
             status_val = GameStatus.ACTIVE
             if random.choice([True, False]):
@@ -173,7 +185,7 @@ class JoinGameView(APIView):
 
         game.player_o = user
         game.status = GameStatus.ACTIVE
-        game.save()
+        game.save(update_fields=['player_o', 'status'])
         
         # Notify players via WebSocket
         channel_layer = get_channel_layer()
@@ -192,15 +204,58 @@ class JoinGameView(APIView):
         return Response(GameSerializer(game).data)
 
 class GameDetailView(generics.RetrieveAPIView):
+    """
+    Clients poll this to resync, so it answers conditional GETs: the ETag
+    comes from Game.version and the players' names and avatars (which live
+    on other rows), and a matching If-None-Match gets a 304 after one query
+    for those columns. Finished games that have settled (results written,
+    post-game chat over) may be reused by the client for a few minutes
+    without asking; everything else must be revalidated.
+    """
     queryset = Game.objects.all()
     serializer_class = GameSerializer
     permission_classes = [] # Manual handling
 
+    SETTLED_AFTER = timedelta(minutes=10)
+    FINISHED_MAX_AGE = 10 * 60
+    PLAYER_FIELDS = tuple(
+        f'{side}__{field}'
+        for side in ('player_x', 'player_o')
+        for field in ('username', *(
+            f'player_profile__avatar_config__{f.name}'
+            for f in AvatarConfig._meta.concrete_fields if not f.primary_key and not f.is_relation
+        ))
+    )
+
     def get(self, request, *args, **kwargs):
         user, error_response = get_user_from_request(request)
         if error_response:
             return error_response
-        return super().get(request, *args, **kwargs)
+
+        row = Game.objects.filter(pk=kwargs['pk']).values('version', 'status', 'finished_at', *self.PLAYER_FIELDS).first()
+        if row is None:
+            raise NotFound()
+        players = hashlib.md5(repr([row[f] for f in self.PLAYER_FIELDS]).encode()).hexdigest()[:12]
+        # The packed and plain representations of a version differ
+        representation = 'packed' if wants_packed(request) else 'plain'
+        etag = quote_etag(f"{kwargs['pk'].hex}-{row['version']}-{players}-{representation}")
+        cache_control = self.cache_control(row)
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match and {etag, '*'} & set(parse_etags(if_none_match.replace('W/', ''))):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            # A write between the two reads only makes the next poll a 200
+            response = super().get(request, *args, **kwargs)
+        response['ETag'] = etag
+        response['Cache-Control'] = cache_control
+        return response
+
+    def cache_control(self, row):
+        finished_at = row['finished_at']
+        if row['status'] == GameStatus.FINISHED and finished_at and timezone.now() - finished_at > self.SETTLED_AFTER:
+            return f'private, max-age={self.FINISHED_MAX_AGE}'
+        return 'private, no-cache'
 
 class ForfeitGameView(APIView):
     permission_classes = [] 
@@ -243,7 +298,8 @@ class ForfeitGameView(APIView):
         # If it's a local game, we abort it instead of finishing with a winner
         if game.mode == GameMode.LOCAL:
             game.status = GameStatus.ABORTED
-            game.save()
+            game.save(update_fields=['status'])
+            GameStateCache.invalidate(game.id)
             
             channel_layer = get_channel_layer()
             async_to_sync(channel_layer.group_send)(
@@ -269,7 +325,8 @@ class ForfeitGameView(APIView):
         game.status = GameStatus.FINISHED
         game.winner = winner_symbol
         game.finished_at = timezone.now()
-        game.save()
+        game.save(update_fields=['status', 'winner', 'finished_at'])
+        GameStateCache.invalidate(game.id)
         
         # Calculate XP
         from users.services import LevelingService
@@ -302,16 +359,67 @@ class ForfeitGameView(APIView):
         
         return Response(GameSerializer(game).data)
 
-from rest_framework.pagination import PageNumberPagination
-
-class StandardResultsSetPagination(PageNumberPagination):
+class GameHistoryPagination(BasePagination):
+    """
+    Keyset pagination on (created_at, id), newest first. The opaque `cursor`
+    names the last game of the previous page, so a page never counts or
+    skips rows. The queryset may be a list of "legs" (querysets that each
+    scan one index in order); every leg reads at most one page and the legs
+    are merged here.
+    """
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        legs = queryset if isinstance(queryset, (list, tuple)) else [queryset]
+        size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        games = {}
+        for leg in legs:
+            if position is not None:
+                created_at, pk = position
+                leg = leg.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+            for game in leg.order_by('-created_at', '-pk')[:size + 1]:
+                games[game.pk] = game
+
+        page = sorted(games.values(), key=lambda g: (g.created_at, g.pk), reverse=True)
+        self.next_position = (page[size - 1].created_at, page[size - 1].pk) if len(page) > size else None
+        return page[:size]
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        created_at, pk = self.next_position
+        cursor = base64.urlsafe_b64encode(f"{created_at.isoformat()} {pk.hex}".encode()).decode('ascii')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            created_at, pk = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii').split(' ')
+            return datetime.fromisoformat(created_at), uuid.UUID(pk)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise NotFound("Invalid cursor")
 
 class UserGameListView(generics.ListAPIView):
-    serializer_class = GameSerializer
-    pagination_class = StandardResultsSetPagination
+    serializer_class = GameSummarySerializer
+    pagination_class = GameHistoryPagination
     permission_classes = [] # Manual handling
 
     def get_queryset(self):
@@ -319,10 +427,7 @@ class UserGameListView(generics.ListAPIView):
         if error_response:
             return Game.objects.none()
         
-        from django.db.models import Q
-        qs = Game.objects.filter(
-            Q(player_x=user) | Q(player_o=user)
-        ).order_by('-created_at')
+        qs = Game.objects.select_related(*GAME_SUMMARY_RELATED)
 
         # Mode Filter
         mode_param = self.request.query_params.get('mode', 'all').lower()
@@ -331,14 +436,16 @@ class UserGameListView(generics.ListAPIView):
         elif mode_param == 'bot':
              qs = qs.filter(mode__in=[
                  GameMode.BOT_EASY, GameMode.BOT_MEDIUM, 
-                 GameMode.BOT_HARD, GameMode.BOT_CUSTOM, GameMode.AI
+                 GameMode.BOT_HARD, GameMode.BOT_EXPERT, GameMode.BOT_CUSTOM, GameMode.AI
              ])
         elif mode_param == 'casual':
              qs = qs.filter(mode__in=[
                  GameMode.UNRANKED, GameMode.CUSTOM, GameMode.LOCAL
              ])
         
-        return qs
+        # One leg per player column instead of an OR, so each walks its own
+        # (player, created_at, id) index; GameHistoryPagination merges them
+        return [qs.filter(player_x=user), qs.filter(player_o=user)]
 
 class BotStatsView(APIView):
     permission_classes = [] # Manual handling for auth
@@ -349,7 +456,7 @@ class BotStatsView(APIView):
         if error_response:
             return error_response
 
-        bot_modes = [GameMode.BOT_EASY, GameMode.BOT_MEDIUM, GameMode.BOT_HARD, GameMode.BOT_CUSTOM]
+        bot_modes = [GameMode.BOT_EASY, GameMode.BOT_MEDIUM, GameMode.BOT_HARD, GameMode.BOT_EXPERT, GameMode.BOT_CUSTOM]
         stats = {}
 
         for mode in bot_modes:
@@ -379,6 +486,7 @@ class BotStatsView(APIView):
             frontend_key = 'easy'
             if mode == GameMode.BOT_MEDIUM: frontend_key = 'normal'
             elif mode == GameMode.BOT_HARD: frontend_key = 'hard'
+            elif mode == GameMode.BOT_EXPERT: frontend_key = 'expert'
             elif mode == GameMode.BOT_CUSTOM: frontend_key = 'custom'
 
             stats[frontend_key] = {
@@ -400,10 +508,50 @@ class GameEvaluationView(APIView):
                  return Response({"error": "Game not found"}, status=404)
             
             from ..services.evaluation import EvaluationService
-            results = EvaluationService.calculate_game_analysis(pk)
+            mode = request.query_params.get('mode', 'quick')
+            if mode not in EvaluationService.MODES:
+                return Response({"error": f"Unknown analysis mode '{mode}'."}, status=400)
+            results = EvaluationService.get_game_analysis(pk, mode)
             return Response(results)
         except Exception as e:
             print(f"Error in GameEvaluationView: {e}")
             import traceback
             traceback.print_exc()
             return Response({"error": "Internal Error"}, status=500)
+
+class GameEvaluationJobView(APIView):
+    permission_classes = []
+
+    def post(self, request, pk):
+        """
+        Starts a background analysis and returns its job id right away; per-move
+        results are pushed to the game's websocket group as they complete.
+        Stored analyses of finished games are returned directly. `mode` is
+        'quick' (default) or 'deep'.
+        """
+        game = Game.objects.filter(pk=pk).first()
+        if game is None:
+            return Response({"error": "Game not found"}, status=404)
+
+        from ..services.evaluation import EvaluationService
+        from ..services.analysis_jobs import AnalysisJobService
+        mode = request.data.get('mode') or request.query_params.get('mode', 'quick')
+        if mode not in EvaluationService.MODES:
+            return Response({"error": f"Unknown analysis mode '{mode}'."}, status=400)
+
+        stored = EvaluationService.get_stored_analysis(game, mode)
+        if stored is not None:
+            return Response({"status": "done", "mode": mode, "results": stored})
+
+        job = AnalysisJobService.submit(game.id, mode)
+        return Response(job.to_dict(), status=status.HTTP_202_ACCEPTED)
+
+class GameEvaluationJobDetailView(APIView):
+    permission_classes = []
+
+    def get(self, request, pk, job_id):
+        from ..services.analysis_jobs import AnalysisJobService
+        job = AnalysisJobService.get(job_id)
+        if job is None or job.game_id != str(pk):
+            return Response({"error": "Job not found"}, status=404)
+        return Response(job.to_dict(include_results=True))
@@ -1,5 +1,11 @@
 # Bot Configurations with Rich Personalities
 # 'chat_phrases' keys: 'greeting', 'good_move', 'bad_move', 'subgrid_win', 'subgrid_loss', 'gg_win', 'gg_loss'
+# 'search' (searching bots only): 'max_depth' caps iterative deepening, 'time_budget_ms'
+# stops it and plays the best move of the deepest completed iteration (None = no limit);
+# 'batch' scores the last ply with the NumPy batch evaluator (more nodes/sec, but no
+# pruning among the leaves); for MCTS bots 'playouts' and 'time_budget_ms' cap the
+# search, whichever comes first; 'book' plays opening book moves without searching
+# (minimax bots only); 'endgame' solves late positions exactly instead of searching
 
 BOT_CONFIGS = {
     'bot_easy': {
@@ -68,6 +74,11 @@ BOT_CONFIGS = {
         'tagline': 'I take this game quite seriously.',
         'header_color': 'bg-blue-600',
         'difficulty_level': 2,
+        'search': {
+            'max_depth': 4,
+            'time_budget_ms': 400,
+            'endgame': False,
+        },
         'avatar': {
             'topType': 'LongHairStraight',
             'accessoriesType': 'Prescription02',
@@ -131,6 +142,10 @@ BOT_CONFIGS = {
         'tagline': 'Calculated moves only.',
         'header_color': 'bg-indigo-900',
         'difficulty_level': 3,
+        'search': {
+            'max_depth': 8,
+            'time_budget_ms': 1200,
+        },
         'avatar': {
             'topType': 'ShortHairTheCaesar',
             'accessoriesType': 'Sunglasses',
@@ -190,11 +205,81 @@ BOT_CONFIGS = {
             ]
         }
     },
+    'bot_expert': {
+        'name': 'Ada',
+        'tagline': 'I have already played this game a thousand times.',
+        'header_color': 'bg-purple-900',
+        'difficulty_level': 4,
+        'search': {
+            'playouts': None,
+            'time_budget_ms': 1500,
+        },
+        'avatar': {
+            'topType': 'LongHairBun',
+            'accessoriesType': 'Round',
+            'hairColor': 'Auburn',
+            'facialHairType': 'Blank',
+            'clotheType': 'CollarSweater',
+            'clotheColor': 'PastelBlue',
+            'eyeType': 'Squint',
+            'eyebrowType': 'FlatNatural',
+            'mouthType': 'Twinkle',
+            'skinColor': 'Light',
+        },
+        'chat_phrases': {
+            'greeting': [
+                "Hello. I simulate before I speak.",
+                "Let's play. I've already seen how most of these games end.",
+                "Welcome. Every move you make, I have played out many times.",
+                "Good luck. Statistics are on my side."
+            ],
+            'good_move': [
+                "That one survived my simulations.",
+                "A strong move. Your odds just went up.",
+                "Hm. That branch looked better for me a second ago.",
+                "Well found. I need more playouts."
+            ],
+            'subgrid_win': [
+                "The numbers said this board was mine.",
+                "Sector secured, as the simulations predicted.",
+                "Another square converges in my favour.",
+                "Expected value: realised."
+            ],
+            'subgrid_loss': [
+                "An outlier. It won't repeat.",
+                "You took that one. My tree is already adapting.",
+                "Noted. Updating visit counts...",
+                "Unlikely, but not impossible."
+            ],
+            'gg_win': [
+                "Good game. It went as most of my playouts did.",
+                "Victory. The tree was deep enough this time.",
+                "GG. You made it interesting for a while.",
+                "Converged. Thanks for the game."
+            ],
+            'gg_loss': [
+                "You beat the odds. Well played.",
+                "I did not simulate that. Impressive.",
+                "A genuine upset. Rematch?",
+                "GG. I'll need a bigger budget against you."
+            ],
+            'draw': [
+                "A draw. The statistics are balanced.",
+                "Neither of us could tip the odds.",
+                "Even after all those playouts: a tie.",
+                "Equilibrium reached. Good game."
+            ]
+        }
+    },
     'bot_custom': {
         'name': 'Neuro',
         'tagline': 'I am what you make of me.',
         'header_color': 'bg-pink-600',
         'difficulty_level': 1,
+        'search': {
+            'max_depth': 5,
+            'time_budget_ms': 800,
+        },
         'avatar': {
             'topType': 'NoHair',
             'accessoriesType': 'Blank',
@@ -218,3 +303,15 @@ BOT_CONFIGS = {
         }
     }
 }
+
+DEFAULT_SEARCH_CONFIG = {
+    'max_depth': 5,
+    'playouts': None,
+    'time_budget_ms': None,
+    'batch': False,
+    'book': True,
+    'endgame': True,
+}
+
+def get_search_config(mode):
+    return {**DEFAULT_SEARCH_CONFIG, **BOT_CONFIGS.get(mode, {}).get('search', {})}
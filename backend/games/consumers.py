@@ -1,13 +1,19 @@
+import asyncio
 import json
 from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from .models import Game, GameMove, ChatMessage
+from django.db import IntegrityError
+from .models import Game, ChatMessage
 from .logic import GameLogic
+from .state_cache import GameStateCache
 from .api.serializers import GameMoveSerializer
+from .move_encoding import PACKED, SUBPROTOCOL, pack_new_move
 from users.tokens import get_user_from_access_token
 
 class GameConsumer(AsyncWebsocketConsumer):
+    packed_moves = False
+
     async def connect(self):
         try:
             self.game_id = self.scope['url_route']['kwargs']['game_id']
@@ -41,10 +47,13 @@ class GameConsumer(AsyncWebsocketConsumer):
                 self.channel_name
             )
 
-            await self.accept()
+            # Clients that opt in get new_move broadcasts in the compact encoding
+            subprotocol = SUBPROTOCOL if SUBPROTOCOL in self.scope.get('subprotocols', []) else None
+            self.packed_moves = subprotocol is not None or query_params.get('moves', [None])[0] == PACKED
+            await self.accept(subprotocol)
 
             # If it's a bot game and it's bot's turn, trigger it
-            if self.game.mode in ['bot_easy', 'bot_medium', 'bot_hard', 'bot_custom']:
+            if self.game.mode in ['bot_easy', 'bot_medium', 'bot_hard', 'bot_expert', 'bot_custom']:
                  user_id = self.user.id
                  is_player = (user_id == self.game.player_x_id or user_id == self.game.player_o_id)
                  if is_player:
@@ -96,6 +105,10 @@ class GameConsumer(AsyncWebsocketConsumer):
                     }
                 )
 
+                # The evaluation bar catches up in a follow-up message
+                from .services.live_evaluation import LiveEvaluationService
+                asyncio.create_task(LiveEvaluationService.broadcast_after(self.game_id, move, self.channel_layer, self.room_group_name))
+
                 # If game finished, broadcast game_over
                 if game.status == 'finished':
                     from .broadcast_service import BroadcastService
@@ -103,7 +116,7 @@ class GameConsumer(AsyncWebsocketConsumer):
                 
 
                 # --- BOT INTEGRATION ---
-                if game.mode in ['bot_easy', 'bot_medium', 'bot_hard', 'bot_custom'] and game.status != 'finished':
+                if game.mode in ['bot_easy', 'bot_medium', 'bot_hard', 'bot_expert', 'bot_custom'] and game.status != 'finished':
                     # Trigger Bot Turn if game is active
                     from .services.bot.manager import BotService
                     # Run in background (don't await strictly? or await is fine)
@@ -197,50 +210,69 @@ class GameConsumer(AsyncWebsocketConsumer):
 
     @database_sync_to_async
     def process_move(self, cell, subcell):
+        state = GameStateCache.load(self.game_id)
+        try:
+            return self.commit_move(state, cell, subcell)
+        except IntegrityError:
+            pass # Another process committed this move number first
+        except ValueError:
+            # An ordinary rejection unless the cache missed a move ("Not your
+            # turn" on a stale board); the row's move_count tells which
+            if Game.objects.filter(id=self.game_id, move_count=state.board.move_count).exists():
+                raise
+        # Rebuild the stale state from the database and try once more
+        return self.commit_move(GameStateCache.rebuild(self.game_id), cell, subcell)
+
+    def commit_move(self, state, cell, subcell):
         user = self.user # Use the user authenticated at connect
-        game = Game.objects.get(id=self.game_id)
+        game, board = state.game, state.board
 
         # Determine player char
-        if game.mode == 'local' and user == game.player_x:
+        if game.mode == 'local' and user.id == game.player_x_id:
              # In local mode, the creator plays both sides (or hotseat)
              # We assume the move is for the current turn if validated
-             player_char = GameLogic.get_current_turn(game.id)
-        elif game.mode in ['bot_easy', 'bot_medium', 'bot_hard', 'bot_custom']:
+             player_char = board.current_turn()
+        elif game.mode in ['bot_easy', 'bot_medium', 'bot_hard', 'bot_expert', 'bot_custom']:
              # Allow move if user is the assigned player
-             if user == game.player_x:
+             if user.id == game.player_x_id:
                  player_char = 'X'
-             elif user == game.player_o:
+             elif user.id == game.player_o_id:
                  player_char = 'O'
              else:
                  # Spectator or invalid
                  raise ValueError("You are not playing in this game.")
-        elif user == game.player_x:
+        elif user.id == game.player_x_id:
             player_char = 'X'
-        elif user == game.player_o:
+        elif user.id == game.player_o_id:
             player_char = 'O'
         else:
             raise ValueError("You are not a player in this game.")
 
-        # Logic validation
-        GameLogic.validate_move(game, player_char, cell, subcell)
+        # Logic validation (in memory, no reads for a cached game)
+        GameLogic.validate_move(game, player_char, cell, subcell, board=board)
 
-        # Create move
-        move = GameMove.objects.create(
-            game=game,
-            move_no=GameLogic.get_move_count(game.id) + 1,
-            player=player_char,
-            cell=cell,
-            subcell=subcell
-        )
+        # Create move and the game row's board state; a stale board collides on (game, move_no)
+        move = GameLogic.save_move(game, board, player_char, cell, subcell)
         
-        # Update game state (turn, constraints, winner)
-        GameLogic.update_game_state(game, move)
+        # Update game state (winner); only touches the game row when the game ends
+        GameLogic.update_game_state(game, move, board=board)
         
         return move, game
 
     async def game_update(self, event):
+        # Keep this process' cached state in step with moves made elsewhere
+        data = event['data']
+        if data.get('type') == 'new_move':
+            m = data['move']
+            GameStateCache.observe_move(self.game_id, m['move_no'], m['player'], m['cell'], m['subcell'])
+        elif data.get('type') in ('game_over', 'game_aborted'):
+            GameStateCache.invalidate(self.game_id)
+
+        if data.get('type') == 'new_move' and self.packed_moves:
+            data = pack_new_move(data, self.game.created_at)
+
         # Send message to WebSocket
-        await self.send(text_data=json.dumps(event['data']))
+        await self.send(text_data=json.dumps(data))
 
 
 class NotificationConsumer(AsyncWebsocketConsumer):
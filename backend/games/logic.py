@@ -1,6 +1,15 @@
+from django.db import transaction
+from django.db.models import F
 from .models import Game, GameMove
+from .services.engine import UltimateBoard, subboard_outcome, tables
 
 class GameLogic:
+    @staticmethod
+    def load_board(game_id):
+        # Single query: the whole game state is rebuilt in memory from the move list.
+        moves = GameMove.objects.filter(game_id=game_id).order_by('move_no').values_list('player', 'cell', 'subcell')
+        return UltimateBoard.from_moves(moves)
+
     @staticmethod
     def get_move_count(game_id):
         return GameMove.objects.filter(game_id=game_id).count()
@@ -15,26 +24,11 @@ class GameLogic:
 
     @staticmethod
     def get_next_board_constraint(game_id):
-        last_move = GameLogic.get_last_move(game_id)
-        if not last_move:
-            return None
-        
-        target_subboard = last_move.subcell
-        winner = GameLogic.check_subboard_winner(game_id, target_subboard)
-        if winner is not None: # Won or Draw
-            return None
-        return target_subboard
+        return GameLogic.load_board(game_id).next_board_constraint()
 
     @staticmethod
     def get_winner(game_id):
-        small_winners = [GameLogic.check_subboard_winner(game_id, i) for i in range(9)]
-        global_winner = GameLogic.check_global_winner(small_winners)
-        if global_winner:
-            return global_winner
-        
-        if GameLogic.check_global_draw(small_winners) or GameLogic.get_move_count(game_id) >= 81:
-            return 'D'
-        return None
+        return GameLogic.load_board(game_id).winner()
 
     @staticmethod
     def get_cell_owner(game_id, cell, subcell):
@@ -52,43 +46,13 @@ class GameLogic:
         return count >= 9
 
     @staticmethod
-    def validate_move(game, player_char, cell, subcell):
-        # 1. Turn check
-        if GameLogic.get_current_turn(game.id) != player_char:
-            raise ValueError("Not your turn.")
-
-        # 2. Game status check
-        if game.status != 'active':
-            # Allow moves if game is 'waiting' but 2 players are there? 
-            # Or strict 'active' only. Let's assume 'active'.
-            # If creating game makes it active immediately? No, wait for P2.
-            pass
-            # For now, let's just check if it's finished
-        if GameLogic.get_winner(game.id):
-             raise ValueError("Game already finished.")
-
-        # 3. Constraint check (next_board_constraint)
-        constraint = GameLogic.get_next_board_constraint(game.id)
-        if constraint is not None:
-            # Must play in this subboard
-            # UNLESS that subboard is full? 
-            # The constraint should theoretically be cleared if full.
-            # But frontend logic says: 
-            # if isFull(previousMove.cell) return true (anywhere)
-            # if previousMove.cell == move.block return true
-            
-            # Since we store constraint, we expect it to be correct.
-            # If constraint is set, we MUST play there.
-            if cell != constraint:
-                raise ValueError(f"Must play in subboard {constraint}")
-        
-        # 4. Occupancy check
-        if GameLogic.is_occupied(game.id, cell, subcell):
-             raise ValueError("Cell already occupied.")
-             
-        # 5. Global cell validity (0-8)
-        if not (0 <= cell <= 8 and 0 <= subcell <= 8):
-            raise ValueError("Invalid cell coordinates.")
+    def validate_move(game, player_char, cell, subcell, board=None):
+        # Turn, finished game, constraint, coordinates and occupancy are all
+        # checked against the in-memory board, so callers that already hold
+        # one pay no extra queries.
+        if board is None:
+            board = GameLogic.load_board(game.id)
+        board.validate_move(player_char, cell, subcell)
 
     @staticmethod
     def check_line(values):
@@ -100,59 +64,22 @@ class GameLogic:
     @staticmethod
     def check_subboard_winner(game_id, cell):
         # Fetch moves for this cell
-        moves = GameMove.objects.filter(game_id=game_id, cell=cell)
-        grid = [None] * 9
-        for m in moves:
-            grid[m.subcell] = m.player
-        
-        # 1. Check for actual winner
-        # Rows
-        for i in range(0, 9, 3):
-            w = GameLogic.check_line(grid[i:i+3])
-            if w: return w
-        # Cols
-        for i in range(3):
-            w = GameLogic.check_line([grid[i], grid[i+3], grid[i+6]])
-            if w: return w
-        # Diagonals
-        w = GameLogic.check_line([grid[0], grid[4], grid[8]])
-        if w: return w
-        w = GameLogic.check_line([grid[2], grid[4], grid[6]])
-        if w: return w
-        
-        # 2. Check for Draw / Dead Board
-        # A board is dead if it's full (implied by above) OR if no one CAN win.
-        if None not in grid:
-            return 'D'
-            
-        # Check if X likely to win? Check if O likely to win?
-        # If neither can complete a line, it is a draw.
-        x_can_win = GameLogic.can_player_win(grid, 'X')
-        o_can_win = GameLogic.can_player_win(grid, 'O')
-        
-        if not x_can_win and not o_can_win:
-             return 'D'
-
-        return None
+        moves = GameMove.objects.filter(game_id=game_id, cell=cell).values_list('player', 'subcell')
+        x_bits = o_bits = 0
+        for player, subcell in moves:
+            if player == 'X':
+                x_bits |= 1 << subcell
+            else:
+                o_bits |= 1 << subcell
+        return subboard_outcome(x_bits, o_bits)
 
     @staticmethod
     def can_player_win(grid, player):
         # Returns True if 'player' can potentially win this 3x3 grid
         # considering the current state.
         # A line is winnable if it doesn't contain the opponent's mark.
-        opponent = 'O' if player == 'X' else 'X'
-        
-        lines = [
-            [0,1,2],[3,4,5],[6,7,8],
-            [0,3,6],[1,4,7],[2,5,8],
-            [0,4,8],[2,4,6]
-        ]
-        
-        for line in lines:
-            # If any line has NO opponent marks, it's potentially winnable
-            if not any(grid[i] == opponent for i in line):
-                return True
-        return False
+        open_lines = tables.OPEN_X if player == 'X' else tables.OPEN_O
+        return open_lines[tables.encode(grid)] > 0
 
     @staticmethod
     def check_global_winner(small_winners):
@@ -208,12 +135,45 @@ class GameLogic:
         return not x_can_win and not o_can_win
 
     @staticmethod
-    def update_game_state(game, move):
-        winner = GameLogic.get_winner(game.id)
+    def state_fields(board, last_move_at=None):
+        """The denormalized Game columns for a board position."""
+        return {
+            'move_count': board.move_count,
+            'current_turn': board.current_turn(),
+            'next_board_constraint': board.next_board_constraint(),
+            'last_move_at': last_move_at,
+            'subboard_winners': ''.join(w or '.' for w in board.winners),
+        }
+
+    @staticmethod
+    def save_move(game, board, player, cell, subcell):
+        """
+        Writes the next move of `game` and the game row's board state in one
+        transaction, and plays it on `board` (the position before the move).
+        A stale board collides on (game, move_no): the IntegrityError is
+        raised and `board` is left as it was.
+        """
+        board.play(cell, subcell, player)
+        try:
+            with transaction.atomic():
+                move = GameMove.objects.create(game=game, move_no=board.move_count, player=player, cell=cell, subcell=subcell)
+                fields = GameLogic.state_fields(board, move.created_at)
+                Game.objects.filter(id=game.id).update(**fields, version=F('version') + 1)
+        except Exception:
+            board.undo()
+            raise
+        for name, value in fields.items():
+            setattr(game, name, value)
+        return move
+
+    @staticmethod
+    def update_game_state(game, move, board=None):
+        # `board` must already contain `move`; the game row is only written when the game ends.
+        if board is None:
+            board = GameLogic.load_board(game.id)
+        winner = board.winner()
         if winner:
             game.winner = winner
             game.status = 'finished'
             game.finished_at = move.created_at
-
-        
-        game.save()
+            game.save(update_fields=['winner', 'status', 'finished_at'])
@@ -0,0 +1,140 @@
+import json
+import os
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from games.models import Game, GameMode, GameMove, GameStatus
+from games.services.evaluation import EvaluationService, analyze_game
+from games.services.workers import init_worker
+
+
+class Command(BaseCommand):
+    help = (
+        'Analyses finished games in bulk and stores the results, resuming from a checkpoint file. '
+        'Every finished game is selected unless filtered: --rated for rated games, --game-mode for game modes. '
+        '--mode picks the analysis mode (quick/deep), not a game mode.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', default=None, help='Only games finished at or after this date or datetime (ISO 8601)')
+        parser.add_argument('--mode', choices=EvaluationService.MODES, default='quick', help='Analysis mode (not a game mode; see --game-mode)')
+        parser.add_argument('--rated', action='store_true', help='Only rated games')
+        parser.add_argument('--game-mode', action='append', choices=GameMode.values, default=None, help='Only games of this game mode, e.g. ranked (repeatable)')
+        parser.add_argument('--chunk-size', type=int, default=200, help='Games fetched, analysed and written per chunk')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes (1 analyses in this process)')
+        parser.add_argument('--checkpoint', default=None, help='JSON file recording progress; an existing one is resumed from')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many games')
+
+    def handle(self, *args, **options):
+        mode = options['mode']
+        version = EvaluationService.engine_version(mode)
+        # Games that already have this analysis are skipped, so reruns are cheap
+        games = (
+            Game.objects.filter(status=GameStatus.FINISHED)
+            .exclude(analyses__engine_version=version)
+            .order_by('created_at', 'id')
+        )
+        if options['since']:
+            games = games.filter(finished_at__gte=self.parse_since(options['since']))
+        if options['rated']:
+            games = games.filter(rated=True)
+        if options['game_mode']:
+            games = games.filter(mode__in=options['game_mode'])
+
+        checkpoint = self.load_checkpoint(options['checkpoint'], mode)
+        totals = Counter(checkpoint['totals'])
+        if checkpoint['created_at']:
+            self.stdout.write(f"Resuming after game {checkpoint['id']} ({totals['games']} games done)")
+
+        limit = options['limit']
+        workers = max(1, options['workers'])
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker) if workers > 1 else None
+        try:
+            analysed = 0
+            while limit is None or analysed < limit:
+                chunk = games
+                if checkpoint['created_at']:
+                    after = parse_datetime(checkpoint['created_at'])
+                    chunk = chunk.filter(Q(created_at__gt=after) | Q(created_at=after, id__gt=checkpoint['id']))
+                size = options['chunk_size'] if limit is None else min(options['chunk_size'], limit - analysed)
+                rows = list(chunk.values_list('id', 'created_at')[:size])
+                if not rows:
+                    break
+
+                tasks = self.load_tasks([game_id for game_id, _ in rows], mode)
+                results = dict(pool.map(analyze_game, tasks) if pool else map(analyze_game, tasks))
+                EvaluationService.store_analyses(results, mode)
+
+                for moves in results.values():
+                    totals['games'] += 1
+                    totals.update(self.count(moves))
+                analysed += len(rows)
+                last_id, last_created = rows[-1]
+                checkpoint.update(created_at=last_created.isoformat(), id=str(last_id), totals=dict(totals))
+                self.save_checkpoint(options['checkpoint'], checkpoint)
+                self.stdout.write(f"  {totals['games']} games analysed")
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        moves = totals['moves'] or 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Analysed {totals['games']} games ({totals['moves']} moves, mode {mode}): "
+            f"accuracy {100 * totals['accurate'] / moves:.1f}%, "
+            f"{totals['blunder']} blunders, {totals['mistake']} mistakes, {totals['inaccuracy']} inaccuracies"
+        ))
+
+    @staticmethod
+    def load_tasks(game_ids, mode):
+        """One query for the moves of every game in the chunk; returns analyze_game tasks."""
+        moves = defaultdict(list)
+        rows = (
+            GameMove.objects.filter(game_id__in=game_ids).order_by('game_id', 'move_no')
+            .values_list('game_id', 'move_no', 'player', 'cell', 'subcell')
+        )
+        for game_id, *move in rows:
+            moves[game_id].append(tuple(move))
+        return [(game_id, moves[game_id], mode) for game_id in game_ids]
+
+    @staticmethod
+    def count(results):
+        counts = Counter(r['classification'] for r in results)
+        counts['moves'] = len(results)
+        counts['accurate'] = sum(counts[c] for c in ('brilliant', 'best', 'good', 'forced'))
+        return counts
+
+    @staticmethod
+    def parse_since(value):
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                raise CommandError(f"Invalid --since '{value}', expected YYYY-MM-DD or an ISO datetime.")
+            moment = datetime.combine(day, time.min)
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
+
+    @staticmethod
+    def load_checkpoint(path, mode):
+        empty = {'mode': mode, 'created_at': None, 'id': None, 'totals': {}}
+        if not path or not os.path.exists(path):
+            return empty
+        with open(path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('mode') != mode:
+            raise CommandError(f"Checkpoint {path} is for mode '{checkpoint.get('mode')}', not '{mode}'.")
+        return {**empty, **checkpoint}
+
+    @staticmethod
+    def save_checkpoint(path, checkpoint):
+        if not path:
+            return
+        # Write-then-rename, so an interrupted run never leaves a torn file
+        with open(path + '.tmp', 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(path + '.tmp', path)
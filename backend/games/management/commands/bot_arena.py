@@ -0,0 +1,54 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.core.management.base import BaseCommand, CommandError
+from games.services.bot.arena import ENGINES, parse_engine, play_game, summarize
+from games.services.workers import init_worker
+
+
+class Command(BaseCommand):
+    help = 'Plays bot engines against each other on the in-memory board and reports strength and speed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('engine_a', help=f"Engine spec, e.g. 'hard' or 'custom:30' ({', '.join(ENGINES)})")
+        parser.add_argument('engine_b', help='Engine spec for the opponent')
+        parser.add_argument('--games', type=int, default=20, help='Number of games (colours alternate)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+        parser.add_argument('--budget-ms', type=int, default=None, help="Per-move time budget for both engines (default: each bot's config)")
+        parser.add_argument('--seed', type=int, default=None, help='Seed for reproducible runs')
+
+    def handle(self, *args, **options):
+        engine_a, engine_b = options['engine_a'], options['engine_b']
+        try:
+            parse_engine(engine_a)
+            parse_engine(engine_b)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        n = options['games']
+        if n < 1:
+            raise CommandError('--games must be at least 1.')
+        self.stdout.write(f'Playing {n} games: {engine_a} vs {engine_b}...')
+        tasks = [(i, engine_a, engine_b, options['budget_ms'], options['seed']) for i in range(n)]
+
+        games = []
+        with ProcessPoolExecutor(max_workers=max(1, options['workers']), initializer=init_worker) as pool:
+            futures = [pool.submit(play_game, *task) for task in tasks]
+            for future in as_completed(futures):
+                games.append(future.result())
+                if len(games) % 10 == 0:
+                    self.stdout.write(f'  {len(games)}/{n} games played')
+
+        report = summarize(games)
+        self.stdout.write(self.style.SUCCESS(
+            f"{engine_a} vs {engine_b}: +{report['wins']} ={report['draws']} -{report['losses']}"
+            f" ({report['illegal']} lost on illegal moves)"
+        ))
+        self.stdout.write(
+            f"Elo difference: {report['elo']:+.0f} (95% CI {report['elo_low']:+.0f} .. {report['elo_high']:+.0f})"
+        )
+        for who, engine in (('a', engine_a), ('b', engine_b)):
+            stats = report['engines'][who]
+            self.stdout.write(
+                f"  {engine:<12} moves {stats['moves']:>5}  mean {stats['mean_ms']:7.1f} ms"
+                f"  p95 {stats['p95_ms']:7.1f} ms  {stats['nodes_per_sec']:>10,.0f} nodes/s"
+            )
@@ -0,0 +1,67 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from django.core.management.base import BaseCommand
+from games.services.engine import UltimateBoard
+from games.services.engine import search as core
+from games.services.engine.book import DEFAULT_PATH, OpeningBook, canonical
+from games.services.engine.transposition import TranspositionTable
+from games.services.evaluation import EvaluationService
+from games.services.workers import init_worker
+
+
+def score_position(task):
+    cells, constraint, budget_ms = task
+    winners = core.winners_of(cells)
+    player = 'X' if sum(c is not None for c in cells) % 2 == 0 else 'O'
+    valid = core.valid_moves(cells, winners, constraint)
+    scores, depth = EvaluationService.score_moves(cells, winners, valid, player, TranspositionTable(), budget_ms)
+    return scores, depth
+
+
+class Command(BaseCommand):
+    help = 'Builds the opening book: deep-searched scores of every move in the early positions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-ply', type=int, default=6, help='Deepest ply (moves played) of a book position')
+        parser.add_argument('--full-width', type=int, default=2, help='Up to this ply, every legal move is followed')
+        parser.add_argument('--width', type=int, default=2, help="Beyond --full-width, only this many of the side to move's best moves are followed")
+        parser.add_argument('--budget-ms', type=int, default=1000, help='Search budget per position')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+        parser.add_argument('--output', default=DEFAULT_PATH, help='Book file to write')
+
+    def handle(self, *args, **options):
+        book = OpeningBook()
+        layer = [UltimateBoard()]
+        workers = max(1, options['workers'])
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker) if workers > 1 else None
+        try:
+            for ply in range(options['max_ply'] + 1):
+                tasks = [(board.to_list(), board.next_board_constraint(), options['budget_ms']) for board in layer]
+                results = list(pool.map(score_position, tasks) if pool else map(score_position, tasks))
+                for (cells, constraint, _), (scores, depth) in zip(tasks, results):
+                    book.add(cells, constraint, depth, scores)
+                self.stdout.write(f'  ply {ply}: {len(layer)} positions')
+                if ply == options['max_ply']:
+                    break
+                layer = self.next_layer(layer, results, ply < options['full_width'], options['width'])
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        book.save(options['output'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(book)} positions to {options['output']}"))
+
+    @staticmethod
+    def next_layer(layer, results, full_width, width):
+        """Children of the layer's positions, one per symmetry class."""
+        children = {}
+        for board, (scores, _) in zip(layer, results):
+            if board.winner() is not None:
+                continue
+            moves = sorted(scores, key=scores.get, reverse=board.current_turn() == 'X')
+            for move in (moves if full_width else moves[:width]):
+                child = board.copy()
+                child.play(*move)
+                if child.winner() is None:
+                    children.setdefault(canonical(child.to_list(), child.next_board_constraint())[0], child)
+        return list(children.values())
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0019_game_winner'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='game',
+            name='mode',
+            field=models.CharField(choices=[('ai', 'AI'), ('bot_easy', 'Bot Easy'), ('bot_medium', 'Bot Medium'), ('bot_hard', 'Bot Hard'), ('bot_expert', 'Bot Expert'), ('local', 'Local'), ('custom', 'Custom'), ('bot_custom', 'Bot Custom'), ('unranked', 'Unranked'), ('ranked', 'Ranked')], max_length=10),
+        ),
+    ]
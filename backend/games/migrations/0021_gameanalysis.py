@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0020_game_mode_bot_expert'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('engine_version', models.CharField(help_text='EvaluationService.ENGINE_VERSION that produced the results', max_length=20)),
+                ('results', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analyses', to='games.game')),
+            ],
+            options={
+                'unique_together': {('game', 'engine_version')},
+            },
+        ),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:19
+
+from itertools import groupby
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+# The rules as of this migration, frozen here so later engine changes cannot
+# change (or break) what it computes
+LINES = ((0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6))
+
+
+def line_winner(grid):
+    for a, b, c in LINES:
+        if grid[a] is not None and grid[a] == grid[b] == grid[c]:
+            return grid[a]
+    return None
+
+
+def outcome(grid):
+    """'X' / 'O' for a line, 'D' for a full or dead (no line left for anyone) grid, else None."""
+    winner = line_winner(grid)
+    if winner:
+        return winner
+    if None not in grid:
+        return 'D'
+    if all({grid[i] for i in line} >= {'X', 'O'} for line in LINES):
+        return 'D'
+    return None
+
+
+def replay(moves):
+    """(sub-board winners, next constraint, game winner) after ``(player, cell, subcell)`` moves."""
+    cells = [None] * 81
+    winners = [None] * 9
+    for player, cell, subcell in moves:
+        cells[cell * 9 + subcell] = player
+        if winners[cell] is None:
+            winners[cell] = outcome(cells[cell * 9:(cell + 1) * 9])
+    target = moves[-1][2] if moves else None
+    constraint = target if target is not None and winners[target] is None else None
+
+    winner = line_winner([w if w in ('X', 'O') else None for w in winners])
+    if winner is None:
+        x_open = any(all(winners[i] in (None, 'X') for i in line) for line in LINES)
+        o_open = any(all(winners[i] in (None, 'O') for i in line) for line in LINES)
+        if not (x_open or o_open) or len(moves) >= 81:
+            winner = 'D'
+    return winners, constraint, winner
+
+
+def backfill_board_state(apps, schema_editor):
+    # Replays every game's moves once, in one pass over the move table
+    Game = apps.get_model('games', 'Game')
+    GameMove = apps.get_model('games', 'GameMove')
+    fields = ['move_count', 'current_turn', 'next_board_constraint', 'last_move_at', 'subboard_winners', 'winner']
+    moves = GameMove.objects.order_by('game_id', 'move_no').values_list('game_id', 'player', 'cell', 'subcell', 'created_at')
+
+    def flush(batch):
+        # A stored winner (e.g. from a forfeit) wins over the replayed one
+        stored = dict(Game.objects.filter(id__in=[g.id for g in batch]).values_list('id', 'winner'))
+        for game in batch:
+            game.winner = stored.get(game.id) or game.winner
+        Game.objects.bulk_update(batch, fields)
+
+    batch = []
+    for game_id, rows in groupby(moves.iterator(chunk_size=2000), key=lambda row: row[0]):
+        rows = list(rows)
+        winners, constraint, winner = replay([(player, cell, subcell) for _, player, cell, subcell, _ in rows])
+        batch.append(Game(
+            id=game_id,
+            move_count=len(rows),
+            current_turn='O' if len(rows) % 2 else 'X',
+            next_board_constraint=constraint,
+            last_move_at=rows[-1][4],
+            subboard_winners=''.join(w or '.' for w in winners),
+            winner=winner,
+        ))
+        if len(batch) >= BATCH_SIZE:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0021_gameanalysis'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='current_turn',
+            field=models.CharField(default='X', max_length=1),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='last_move_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='move_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='next_board_constraint',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='0-8, or empty when any sub-board may be played', null=True),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='subboard_winners',
+            field=models.CharField(default='.........', help_text='Per sub-board: X, O, D (full or dead) or . (open)', max_length=9),
+        ),
+        migrations.RunPython(backfill_board_state, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0022_game_board_state'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['player_x', '-created_at', '-id'], name='game_history_x'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['player_o', '-created_at', '-id'], name='game_history_o'),
+        ),
+    ]
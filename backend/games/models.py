@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import F
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 import uuid
@@ -8,6 +9,7 @@ class GameMode(models.TextChoices):
     BOT_EASY = 'bot_easy', _('Bot Easy')
     BOT_MEDIUM = 'bot_medium', _('Bot Medium')
     BOT_HARD = 'bot_hard', _('Bot Hard')
+    BOT_EXPERT = 'bot_expert', _('Bot Expert')
     LOCAL = 'local', _('Local')
     CUSTOM = 'custom', _('Custom')
     BOT_CUSTOM = 'bot_custom', _('Bot Custom')
@@ -44,8 +46,39 @@ class Game(models.Model):
     started_at = models.DateTimeField(null=True, blank=True)
     finished_at = models.DateTimeField(null=True, blank=True)
 
+    # Board state after the last move, written together with every GameMove
+    # (see GameLogic.save_move) so reads don't replay the move list
+    move_count = models.PositiveSmallIntegerField(default=0)
+    current_turn = models.CharField(max_length=1, default='X')
+    next_board_constraint = models.PositiveSmallIntegerField(null=True, blank=True, help_text="0-8, or empty when any sub-board may be played")
+    last_move_at = models.DateTimeField(null=True, blank=True)
+    subboard_winners = models.CharField(max_length=9, default='.' * 9, help_text="Per sub-board: X, O, D (full or dead) or . (open)")
+
+    # Bumped by every write that changes the game's API representation (saves,
+    # moves, chat); GameDetailView's ETag is derived from it
+    version = models.PositiveIntegerField(default=0)
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Match history walks one of these per player column (keyset on created_at, id)
+            models.Index(fields=['player_x', '-created_at', '-id'], name='game_history_x'),
+            models.Index(fields=['player_o', '-created_at', '-id'], name='game_history_o'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        # Incremented in the database, so concurrent saves never share a version
+        self.version = F('version') + 1
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=['version'])
+
+    @staticmethod
+    def bump_version(game_id):
+        Game.objects.filter(id=game_id).update(version=F('version') + 1)
 
 class GameMove(models.Model):
     game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='moves')
@@ -85,3 +118,21 @@ class ChatMessage(models.Model):
 
     def __str__(self):
         return f"{self.sender_name} ({self.message_type}): {self.content[:20]}"
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if adding:
+            Game.bump_version(self.game_id)
+
+class GameAnalysis(models.Model):
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='analyses')
+    engine_version = models.CharField(max_length=20, help_text="EvaluationService.ENGINE_VERSION that produced the results")
+    results = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('game', 'engine_version')
+
+    def __str__(self):
+        return f"Analysis of {self.game_id} (engine {self.engine_version})"
@@ -0,0 +1,64 @@
+"""
+Compact move encoding for API and websocket payloads.
+
+A move is one index ``cell * 9 + subcell`` in 0..80, so a game's move list
+packs into one byte per move, sent base64-encoded, with a parallel list of
+each move's time in milliseconds after the game's ``created_at``:
+
+    {"encoding": "packed", "indexes": "BAQo", "times": [5120, 9874, 12003]}
+
+Players alternate starting with X and move numbers count from 1, so neither
+is sent. A packed ``new_move`` broadcast carries ``[move_no, index, time]``
+instead of the move dict.
+
+Clients opt in with ``?moves=packed`` on the game detail endpoint, and with
+the ``packed-moves`` websocket subprotocol (or the same query parameter) on
+the game socket. Everything else keeps the plain representation.
+"""
+
+import base64
+from datetime import datetime, timedelta
+
+PACKED = 'packed'
+SUBPROTOCOL = 'packed-moves'
+
+
+def offset_ms(created_at, game_created_at):
+    return round((created_at - game_created_at).total_seconds() * 1000)
+
+
+def pack_moves(moves, game_created_at):
+    """Packs GameMove-like objects (cell, subcell, created_at) in move order."""
+    moves = list(moves)
+    return {
+        'encoding': PACKED,
+        'indexes': base64.b64encode(bytes(m.cell * 9 + m.subcell for m in moves)).decode('ascii'),
+        'times': [offset_ms(m.created_at, game_created_at) for m in moves],
+    }
+
+
+def unpack_moves(packed, game_created_at):
+    """The plain move dicts (as GameMoveSerializer) of a packed move list."""
+    indexes = base64.b64decode(packed['indexes'])
+    return [
+        {
+            'move_no': i + 1,
+            'player': 'X' if i % 2 == 0 else 'O',
+            'cell': index // 9,
+            'subcell': index % 9,
+            'created_at': game_created_at + timedelta(milliseconds=time),
+        }
+        for i, (index, time) in enumerate(zip(indexes, packed['times']))
+    ]
+
+
+def pack_new_move(data, game_created_at):
+    """A `new_move` broadcast's data with its move packed."""
+    move = data['move']
+    created_at = datetime.fromisoformat(move['created_at'])
+    return {**data, 'move': [move['move_no'], move['cell'] * 9 + move['subcell'], offset_ms(created_at, game_created_at)]}
+
+
+def wants_packed(request):
+    """Whether a REST request asked for packed moves."""
+    return request is not None and request.query_params.get('moves') == PACKED
@@ -1 +1,7 @@
-from .evaluation import EvaluationService
+# EvaluationService is resolved lazily so the Django-free `engine` package can be
+# imported (by GameLogic, bot workers, ...) without pulling in the bots and models.
+def __getattr__(name):
+    if name == 'EvaluationService':
+        from .evaluation import EvaluationService
+        return EvaluationService
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,136 @@
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import close_old_connections
+from ..models import Game, GameMove, GameStatus
+from .evaluation import EvaluationService
+
+
+class AnalysisJob:
+    __slots__ = ('id', 'game_id', 'mode', 'status', 'total', 'results', 'error')
+
+    QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+    def __init__(self, game_id, total, mode='quick'):
+        self.id = str(uuid.uuid4())
+        self.game_id = str(game_id)
+        self.mode = mode
+        self.status = AnalysisJob.QUEUED
+        self.total = total
+        self.results = []
+        self.error = None
+
+    def to_dict(self, include_results=False):
+        data = {
+            'job_id': self.id,
+            'game_id': self.game_id,
+            'mode': self.mode,
+            'status': self.status,
+            'completed': len(self.results),
+            'total': self.total,
+        }
+        if include_results:
+            data['results'] = list(self.results)
+        return data
+
+
+class AnalysisJobService:
+    """
+    Runs game analyses in the background and streams each move's result to the
+    game's websocket group as it completes (`analysis_progress`, then
+    `analysis_complete` or `analysis_failed`). Jobs live in this process only;
+    at most one job per game and mode runs at a time.
+    """
+    MAX_JOBS = 256
+
+    _jobs = OrderedDict()
+    _running = {}  # (game_id, mode) -> job_id
+    _lock = threading.Lock()
+    _executor = None
+
+    @classmethod
+    def executor(cls):
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.ANALYSIS_WORKERS), thread_name_prefix='analysis'
+                )
+            return cls._executor
+
+    @classmethod
+    def get(cls, job_id):
+        with cls._lock:
+            return cls._jobs.get(str(job_id))
+
+    @classmethod
+    def submit(cls, game_id, mode='quick'):
+        """Queues an analysis of the game (or returns the one already running) and returns its job."""
+        game_id = str(game_id)
+        with cls._lock:
+            running = cls._jobs.get(cls._running.get((game_id, mode)))
+            if running is not None and running.status in (AnalysisJob.QUEUED, AnalysisJob.RUNNING):
+                return running
+
+        moves = list(
+            GameMove.objects.filter(game_id=game_id).order_by('move_no')
+            .values_list('move_no', 'player', 'cell', 'subcell')
+        )
+        job = AnalysisJob(game_id, len(moves), mode)
+        with cls._lock:
+            cls._jobs[job.id] = job
+            cls._running[(game_id, mode)] = job.id
+            while len(cls._jobs) > cls.MAX_JOBS:
+                cls._jobs.popitem(last=False)
+        cls.executor().submit(cls.run, job, moves)
+        return job
+
+    @classmethod
+    def run(cls, job, moves):
+        job.status = AnalysisJob.RUNNING
+        try:
+            for result in EvaluationService.iter_game_analysis(moves, job.mode):
+                job.results.append(result)
+                cls.send(job, {
+                    'type': 'analysis_progress',
+                    'job_id': job.id,
+                    'mode': job.mode,
+                    'move': result,
+                    'completed': len(job.results),
+                    'total': job.total,
+                })
+
+            close_old_connections()
+            game = Game.objects.get(id=job.game_id)
+            # Only results of games that can no longer change are worth keeping
+            if game.status in (GameStatus.FINISHED, GameStatus.ABORTED) and len(moves) == game.moves.count():
+                EvaluationService.store_analysis(game, job.results, job.mode)
+            job.status = AnalysisJob.DONE
+            cls.send(job, {'type': 'analysis_complete', 'job_id': job.id, 'mode': job.mode, 'total': job.total})
+        except Exception as e:
+            job.status = AnalysisJob.FAILED
+            job.error = str(e)
+            print(f"Analysis job {job.id} for game {job.game_id} failed: {e}")
+            cls.send(job, {'type': 'analysis_failed', 'job_id': job.id, 'mode': job.mode})
+        finally:
+            with cls._lock:
+                if cls._running.get((job.game_id, job.mode)) == job.id:
+                    del cls._running[(job.game_id, job.mode)]
+            close_old_connections()
+
+    @staticmethod
+    def send(job, data):
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        try:
+            async_to_sync(channel_layer.group_send)(
+                f'game_{job.game_id}',
+                {'type': 'game_update', 'data': data}
+            )
+        except Exception as e:
+            # Progress is best-effort; the job's results stay available
+            print(f"Analysis job {job.id}: broadcast failed: {e}")
@@ -0,0 +1,184 @@
+"""
+Self-play between bot engines on the in-memory board.
+
+Games never touch the database: each engine is called through its DB-free
+entry point with a Deadline, which carries the time budget and counts the
+nodes searched. `play_game` is picklable and is what `manage.py bot_arena`
+spreads over a process pool.
+"""
+
+import math
+import random
+import time
+
+from ..engine import UltimateBoard, endgame, mcts
+from ..engine.deadline import Deadline
+from ...bot_config import get_search_config
+from .easy import EasyBotLogic
+from .hard import HardBotLogic
+from .medium import MediumBotLogic
+
+
+def _easy(board, symbol, difficulty, game_id, clock):
+    clock.nodes += 1
+    return EasyBotLogic.choose_move(board, symbol)
+
+
+def _hard(board, symbol, difficulty, game_id, clock, mode='bot_hard'):
+    return HardBotLogic.choose_move(
+        board.to_list(), board.next_board_constraint(), symbol,
+        mode=mode, difficulty=difficulty, game_id=game_id, clock=clock,
+    )
+
+
+def _custom(board, symbol, difficulty, game_id, clock):
+    return _hard(board, symbol, difficulty, game_id, clock, mode='bot_custom')
+
+
+def _medium(board, symbol, difficulty, game_id, clock):
+    return MediumBotLogic.choose_move(board.to_list(), board.next_board_constraint(), symbol, clock=clock)
+
+
+def _expert(board, symbol, difficulty, game_id, clock):
+    config = get_search_config('bot_expert')
+    solved_move = endgame.best_move(board, clock=clock.share(endgame.TIME_SHARE)) if config['endgame'] else None
+    if solved_move is not None:
+        clock.nodes += 1
+        return solved_move
+    return mcts.search(board, playouts=config['playouts'], game_id=game_id, clock=clock)
+
+
+# name -> (bot mode whose search config applies, move function)
+ENGINES = {
+    'easy': ('bot_easy', _easy),
+    'medium': ('bot_medium', _medium),
+    'hard': ('bot_hard', _hard),
+    'custom': ('bot_custom', _custom),
+    'expert': ('bot_expert', _expert),
+}
+
+
+def parse_engine(spec):
+    """'hard' or 'hard:30' (30% random moves) -> (name, difficulty)."""
+    name, _, difficulty = spec.partition(':')
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine '{name}'. Choose from: {', '.join(sorted(ENGINES))}")
+    return name, int(difficulty or 0)
+
+
+def _forget(game_id):
+    HardBotLogic.TABLES.discard(game_id)
+    mcts.TREES.discard(game_id)
+
+
+def play_game(index, engine_a, engine_b, budget_ms=None, seed=None):
+    """
+    Plays game number `index` between two engine specs, `engine_a` taking X
+    in even games and O in odd ones. Returns A's side, the result ('X', 'O',
+    'D', or '!' + the side that played an illegal move) and, per engine, the
+    think time of each move in ms and the total nodes searched.
+    """
+    if seed is not None:
+        random.seed(seed + index)
+    a_side = 'X' if index % 2 == 0 else 'O'
+    engines = {a_side: ('a', parse_engine(engine_a)), _other(a_side): ('b', parse_engine(engine_b))}
+    stats = {'a': {'times': [], 'nodes': 0}, 'b': {'times': [], 'nodes': 0}}
+    board = UltimateBoard()
+    result = None
+
+    while result is None:
+        side = board.current_turn()
+        who, (name, difficulty) = engines[side]
+        mode, move_fn = ENGINES[name]
+        clock = Deadline(budget_ms or get_search_config(mode)['time_budget_ms'])
+        started = time.perf_counter()
+        move = move_fn(board, side, difficulty, f'arena-{index}-{side}', clock)
+        stats[who]['times'].append((time.perf_counter() - started) * 1000)
+        stats[who]['nodes'] += clock.nodes
+
+        try:
+            if move is None:
+                raise ValueError("No move returned.")
+            board.validate_move(side, *move)
+        except ValueError:
+            result = '!' + side
+            break
+        board.play(*move)
+        result = board.winner()
+
+    for side in engines:
+        _forget(f'arena-{index}-{side}')
+    return {'index': index, 'a_side': a_side, 'result': result, 'stats': stats}
+
+
+def _other(side):
+    return 'O' if side == 'X' else 'X'
+
+
+def score_a(game):
+    """1 / 0.5 / 0 for engine A in a finished arena game."""
+    side = game['a_side']
+    result = game['result']
+    if result == 'D':
+        return 0.5
+    if result.startswith('!'):
+        return 0.0 if result[1] == side else 1.0
+    return 1.0 if result == side else 0.0
+
+
+def elo_difference(score):
+    """Elo difference implied by an expected score in (0, 1); ±inf at the ends."""
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+def elo_interval(scores, z=1.96):
+    """Returns (elo, low, high) for a list of per-game scores, using a normal approximation."""
+    n = len(scores)
+    mean = sum(scores) / n
+    variance = sum((s - mean) ** 2 for s in scores) / (n - 1) if n > 1 else 0.0
+    margin = z * math.sqrt(variance / n)
+    return elo_difference(mean), elo_difference(mean - margin), elo_difference(mean + margin)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def summarize(games):
+    """Aggregates arena games into W/D/L and Elo from engine A's side, and per-engine timing."""
+    scores = [score_a(g) for g in games]
+    wins = scores.count(1.0)
+    draws = scores.count(0.5)
+    elo, low, high = elo_interval(scores)
+
+    engines = {}
+    for who in ('a', 'b'):
+        times = [t for g in games for t in g['stats'][who]['times']]
+        nodes = sum(g['stats'][who]['nodes'] for g in games)
+        total_ms = sum(times)
+        engines[who] = {
+            'moves': len(times),
+            'mean_ms': total_ms / len(times) if times else 0.0,
+            'p95_ms': percentile(times, 95),
+            'nodes_per_sec': nodes / (total_ms / 1000) if total_ms else 0.0,
+        }
+
+    return {
+        'games': len(games),
+        'wins': wins,
+        'draws': draws,
+        'losses': len(games) - wins - draws,
+        'illegal': sum(1 for g in games if g['result'].startswith('!')),
+        'elo': elo,
+        'elo_low': low,
+        'elo_high': high,
+        'engines': engines,
+    }
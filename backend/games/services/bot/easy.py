@@ -1,81 +1,78 @@
 import random
-from ...models import Game, GameMove
+from ...models import Game
 from ...logic import GameLogic
+from ..engine.board import HAS_LINE, SIDE_OF, X, O, FULL
 
 class EasyBotLogic:
     @staticmethod
-    def check_line_local(grid):
-        # Rows
-        for i in range(0, 9, 3):
-            if grid[i] and grid[i] == grid[i+1] == grid[i+2]: return True
-        # Cols
-        for i in range(3):
-            if grid[i] and grid[i] == grid[i+3] == grid[i+6]: return True
-        # Diage
-        if grid[0] and grid[0] == grid[4] == grid[8]: return True
-        if grid[2] and grid[2] == grid[4] == grid[6]: return True
-        return False
+    def check_line_local(bits):
+        return HAS_LINE[bits]
 
     @staticmethod
-    def finalize_move(move):
-        GameLogic.update_game_state(move.game, move)
+    def calculate_move(game, bot_symbol):
+        # One query for the whole position
+        return EasyBotLogic.choose_move(GameLogic.load_board(game.id), bot_symbol)
 
     @staticmethod
-    def calculate_move(game, bot_symbol):
+    def choose_move(board, bot_symbol):
         """
-        Calculates move for Easy Bot.
+        Calculates move for Easy Bot on an UltimateBoard (no DB access).
         """
         # 1. Identify valid moves
         valid_moves = []
-        target_subboard = GameLogic.get_next_board_constraint(game.id)
+        target_subboard = board.next_board_constraint()
         
         possible_boards = []
         if target_subboard is not None:
-             target_won = GameLogic.check_subboard_winner(game.id, target_subboard) is not None
-             target_full = GameLogic.is_subboard_full(game.id, target_subboard)
+             target_won = board.subboard_winner(target_subboard) is not None
+             target_full = board.is_subboard_full(target_subboard)
              if not target_won and not target_full:
                  possible_boards = [target_subboard]
              else:
                  # Constraint lifted because target is won or full
-                 possible_boards = [i for i in range(9) if not GameLogic.is_subboard_full(game.id, i) and GameLogic.check_subboard_winner(game.id, i) is None]
+                 possible_boards = [i for i in range(9) if not board.is_subboard_full(i) and board.subboard_winner(i) is None]
         else:
-             possible_boards = [i for i in range(9) if not GameLogic.is_subboard_full(game.id, i) and GameLogic.check_subboard_winner(game.id, i) is None]
+             possible_boards = [i for i in range(9) if not board.is_subboard_full(i) and board.subboard_winner(i) is None]
 
-        for board in possible_boards:
+        for b in possible_boards:
             for sub in range(9):
-                if not GameLogic.is_occupied(game.id, board, sub):
-                    valid_moves.append((board, sub))
+                if not board.is_occupied(b, sub):
+                    valid_moves.append((b, sub))
         
         if not valid_moves:
             return None
 
         opponent_symbol = 'X' if bot_symbol == 'O' else 'O'
 
-        # --- PRIORITY 1: ATTACK (Win subboard if possible) --- (NEW)
+        # --- PRIORITY 1: ATTACK (Win subboard if possible) ---
         for move in valid_moves:
-            board, sub = move
-            if EasyBotLogic.simulate_win(game.id, board, sub, bot_symbol):
+            b, sub = move
+            if EasyBotLogic.simulate_win(board, b, sub, bot_symbol):
                 return move 
 
         # --- PRIORITY 2: DEFENSE ---
         for move in valid_moves:
-            board, sub = move
-            if EasyBotLogic.simulate_win(game.id, board, sub, opponent_symbol):
+            b, sub = move
+            if EasyBotLogic.simulate_win(board, b, sub, opponent_symbol):
                 return move 
 
         # --- PRIORITY 3: SAFE ---
+        # Whether the opponent could win a subboard anywhere only depends on the position
+        opponent_anywhere = None
         safe_moves = []
         for move in valid_moves:
-            board, sub = move
+            b, sub = move
             target_for_opponent = sub
             
-            if GameLogic.is_subboard_full(game.id, target_for_opponent):
-                 if EasyBotLogic.any_board_has_winning_move(game.id, opponent_symbol):
+            if board.is_subboard_full(target_for_opponent):
+                 if opponent_anywhere is None:
+                     opponent_anywhere = EasyBotLogic.any_board_has_winning_move(board, opponent_symbol)
+                 if opponent_anywhere:
                      continue 
                  else:
                      safe_moves.append(move)
             else:
-                if EasyBotLogic.board_has_winning_move(game.id, target_for_opponent, opponent_symbol):
+                if EasyBotLogic.board_has_winning_move(board, target_for_opponent, opponent_symbol):
                     continue
                 safe_moves.append(move)
         
@@ -86,61 +83,50 @@ class EasyBotLogic:
         return random.choice(valid_moves)
 
     @staticmethod
-    def simulate_win(game_id, board, subcell_to_check, symbol):
-        moves = GameMove.objects.filter(game_id=game_id, cell=board)
-        grid = [None] * 9
-        for m in moves:
-            grid[m.subcell] = m.player
-        
-        if grid[subcell_to_check] is not None:
+    def simulate_win(board, cell, subcell_to_check, symbol):
+        if board.is_occupied(cell, subcell_to_check):
              return False
-        grid[subcell_to_check] = symbol
-        
-        return EasyBotLogic.check_line_local(grid)
+        own = board.subboard_bits(cell, SIDE_OF[symbol])
+        return EasyBotLogic.check_line_local(own | 1 << subcell_to_check)
 
     @staticmethod
-    def board_has_winning_move(game_id, board, symbol):
-        moves = GameMove.objects.filter(game_id=game_id, cell=board)
-        grid = [None] * 9
-        for m in moves:
-            grid[m.subcell] = m.player
-        
-        open_spots = [i for i in range(9) if grid[i] is None]
-        for spot in open_spots:
-            grid[spot] = symbol
-            if EasyBotLogic.check_line_local(grid):
+    def board_has_winning_move(board, cell, symbol):
+        x_bits, o_bits = board.subboard_bits(cell, X), board.subboard_bits(cell, O)
+        own = x_bits if symbol == 'X' else o_bits
+        free = ~(x_bits | o_bits) & FULL
+        if free and (HAS_LINE[x_bits] or HAS_LINE[o_bits]):
+            return True # A line is already on the board
+        spot = 0
+        while free:
+            if free & 1 and EasyBotLogic.check_line_local(own | 1 << spot):
                 return True
-            grid[spot] = None
+            free >>= 1
+            spot += 1
         return False
 
     @staticmethod
-    def any_board_has_winning_move(game_id, symbol):
+    def any_board_has_winning_move(board, symbol):
         for b in range(9):
-             if not GameLogic.is_subboard_full(game_id, b):
-                 if EasyBotLogic.board_has_winning_move(game_id, b, symbol):
+             if not board.is_subboard_full(b):
+                 if EasyBotLogic.board_has_winning_move(board, b, symbol):
                      return True
         return False
         
     @staticmethod
     def perform_move(game_id):
         game = Game.objects.get(id=game_id)
-        bot_symbol = 'X' if game.player_x is None else 'O'
+        bot_symbol = 'X' if game.player_x_id is None else 'O'
+        state = GameLogic.load_board(game.id)
         
-        if GameLogic.get_current_turn(game.id) != bot_symbol:
+        if state.current_turn() != bot_symbol:
             return None
 
-        move_coords = EasyBotLogic.calculate_move(game, bot_symbol)
+        move_coords = EasyBotLogic.choose_move(state, bot_symbol)
         if not move_coords:
             return None
             
         cell, subcell = move_coords
         
-        move = GameMove.objects.create(
-            game=game,
-            move_no=GameLogic.get_move_count(game.id) + 1,
-            player=bot_symbol,
-            cell=cell,
-            subcell=subcell
-        )
+        move = GameLogic.save_move(game, state, bot_symbol, cell, subcell)
         
         return move
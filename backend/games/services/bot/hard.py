@@ -1,6 +1,14 @@
 import random
-from ...models import Game, GameMove
+from ...models import Game
 from ...logic import GameLogic
+from ..engine.tables import SCORE, build_score_table, encode
+from ..engine.transposition import TableRegistry
+from ..engine.batch import BatchEvaluator
+from ..engine.deadline import Deadline
+from ..engine import endgame
+from ..engine import search as core
+from ..engine.book import get_book
+from ...bot_config import get_search_config
 
 class HardBotLogic:
     WEIGHTS = {
@@ -16,31 +24,16 @@ class HardBotLogic:
         'edge_cell': 4
     }
 
+    # One transposition table per live game, reused across its moves
+    TABLES = TableRegistry(max_games=64)
+
     @staticmethod
     def check_line_local_array(sub_grid):
-        for i in range(0, 9, 3):
-            if sub_grid[i] and sub_grid[i] == sub_grid[i+1] == sub_grid[i+2]: return sub_grid[i]
-        for i in range(3):
-            if sub_grid[i] and sub_grid[i] == sub_grid[i+3] == sub_grid[i+6]: return sub_grid[i]
-        if sub_grid[0] and sub_grid[0] == sub_grid[4] == sub_grid[8]: return sub_grid[0]
-        if sub_grid[2] and sub_grid[2] == sub_grid[4] == sub_grid[6]: return sub_grid[2]
-        return None
+        return core.sub_winner(sub_grid)
 
     @staticmethod
     def get_valid_moves(board, winners, constraint):
-        if constraint is not None:
-             is_full = all(board[constraint*9 + i] is not None for i in range(9))
-             is_won = winners[constraint] is not None
-             if not is_full and not is_won:
-                 return [(constraint, s) for s in range(9) if board[constraint*9 + s] is None]
-        
-        moves = []
-        for b in range(9):
-             if winners[b] is None and not all(board[b*9+k] is not None for k in range(9)):
-                 for s in range(9):
-                     if board[b*9 + s] is None:
-                         moves.append((b, s))
-        return moves
+        return core.valid_moves(board, winners, constraint)
 
     @staticmethod
     def evaluate(board, winners, bot, opp):
@@ -54,113 +47,95 @@ class HardBotLogic:
             if winners[i] == bot: score += w['subboard_win'] * macro_weights[i]
             elif winners[i] == opp: score -= w['subboard_win'] * macro_weights[i]
         
-        score += HardBotLogic.eval_lines(winners, bot, opp, w['two_in_line'], w['one_in_line'])
+        # Table scores are from X's point of view
+        sign = 1 if bot == 'X' else -1
+        score += sign * MACRO_SCORE[encode(winners)]
 
-        cell_weights = [w['corner_cell'], w['edge_cell'], w['corner_cell'],
-                        w['edge_cell'], w['center_cell'], w['edge_cell'],
-                        w['corner_cell'], w['edge_cell'], w['corner_cell']]
-        
         for i in range(9):
             if winners[i] is not None: continue
-            sub = board[i*9 : (i+1)*9]
-            for c in range(9):
-                if sub[c] == bot: score += cell_weights[c]
-                elif sub[c] == opp: score -= cell_weights[c]
-            score += HardBotLogic.eval_lines(sub, bot, opp, w['two_in_line'] // 5, w['one_in_line'] // 5)
+            score += sign * SCORE[encode(board[i*9 : (i+1)*9])]
             
         return score
 
     @staticmethod
-    def eval_lines(grid, bot, opp, s2, s1):
-        s = 0
-        lines = [[0,1,2],[3,4,5],[6,7,8],[0,3,6],[1,4,7],[2,5,8],[0,4,8],[2,4,6]]
-        for line in lines:
-            vals = [grid[x] for x in line]
-            b_cnt, o_cnt = vals.count(bot), vals.count(opp)
-            if o_cnt == 0:
-                if b_cnt == 2: s += s2
-                elif b_cnt == 1: s += s1
-            if b_cnt == 0:
-                if o_cnt == 2: s -= s2
-                elif o_cnt == 1: s -= s1
-        return s
+    def minimax(board, winners, constraint, depth, is_max, alpha, beta, bot, opp, tt=None, key=0, clock=None, batch=False, ordering=None, ply=0):
+        # The shared search core with this bot's evaluation; see engine.search.minimax
+        return core.minimax(board, winners, constraint, depth, is_max, alpha, beta, bot, opp, EVALUATOR, tt, key, clock, batch, ordering, ply)
 
     @staticmethod
-    def minimax(board, winners, constraint, depth, is_max, alpha, beta, bot, opp):
-        win = HardBotLogic.check_line_local_array(winners)
-        if win == bot: return 100000 + depth
-        if win == opp: return -100000 - depth
-        if depth == 0: return HardBotLogic.evaluate(board, winners, bot, opp)
-        
-        moves = HardBotLogic.get_valid_moves(board, winners, constraint)
-        if not moves: return 0
+    def search(board, winners, constraint, bot, opp, max_depth=5, tt=None, budget_ms=None, clock=None, batch=False):
+        """
+        Iterative deepening from the root with this bot's evaluation (see
+        engine.search.search); `batch` switches the last ply to the NumPy
+        evaluator.
+        """
+        return core.search(board, winners, constraint, bot, opp, EVALUATOR, max_depth, tt, budget_ms, clock, batch)
+
+    @staticmethod
+    def choose_move(board, constraint, bot_symbol, mode='bot_hard', difficulty=0, game_id=None, clock=None):
+        """DB-free move choice on an 81-cell list; safe to run in a worker process."""
+        opp_symbol = 'O' if bot_symbol == 'X' else 'X'
+        winners = [HardBotLogic.check_line_local_array(board[i*9:(i+1)*9]) for i in range(9)]
+
+        valid = HardBotLogic.get_valid_moves(board, winners, constraint)
+        if not valid:
+            return None
         
-        moves.sort(key=lambda m: (0 if m[1]==4 else 1, 0 if m[0]==4 else 1))
-
-        if is_max:
-            val = -float('inf')
-            for b, s in moves:
-                board[b*9+s] = bot
-                was = winners[b]
-                winners[b] = HardBotLogic.check_line_local_array(board[b*9 : (b+1)*9])
-                nc = s if winners[s] is None and not all(board[s*9+k] is not None for k in range(9)) else None
-                val = max(val, HardBotLogic.minimax(board, winners, nc, depth-1, False, alpha, beta, bot, opp))
-                board[b*9+s] = None
-                winners[b] = was
-                alpha = max(alpha, val)
-                if beta <= alpha: break
-            return val
-        else:
-            val = float('inf')
-            for b, s in moves:
-                board[b*9+s] = opp
-                was = winners[b]
-                winners[b] = HardBotLogic.check_line_local_array(board[b*9 : (b+1)*9])
-                nc = s if winners[s] is None and not all(board[s*9+k] is not None for k in range(9)) else None
-                val = min(val, HardBotLogic.minimax(board, winners, nc, depth-1, True, alpha, beta, bot, opp))
-                board[b*9+s] = None
-                winners[b] = was
-                beta = min(beta, val)
-                if beta <= alpha: break
-            return val
+        if difficulty > 0 and random.randint(1, 100) <= difficulty:
+            return random.choice(valid)
+
+        config = get_search_config(mode)
+        if config['book']:
+            book_move = get_book().best_move(board, constraint, bot_symbol)
+            if book_move in valid:
+                return book_move
+        # The solver and the search share one move budget
+        if clock is None:
+            clock = Deadline(config['time_budget_ms'])
+        if config['endgame']:
+            solved_move = endgame.best_move(endgame.board_from_cells(board, constraint), clock=clock.share(endgame.TIME_SHARE))
+            if solved_move in valid:
+                return solved_move
+
+        # The game's table survives between the bot's consecutive moves
+        tt = HardBotLogic.TABLES.get(game_id) if game_id is not None else None
+        return HardBotLogic.search(
+            board, winners, constraint, bot_symbol, opp_symbol,
+            max_depth=config['max_depth'], tt=tt, budget_ms=config['time_budget_ms'],
+            batch=config['batch'], clock=clock,
+        )
 
     @staticmethod
     def perform_move(game_id, difficulty=0):
         game = Game.objects.get(id=game_id)
-        bot_symbol = 'X' if game.player_x is None else 'O'
-        opp_symbol = 'O' if bot_symbol == 'X' else 'X'
+        bot_symbol = 'X' if game.player_x_id is None else 'O'
+        state = GameLogic.load_board(game.id)
         
-        if GameLogic.get_current_turn(game.id) != bot_symbol:
+        if state.current_turn() != bot_symbol:
             return None
 
-        moves_qs = GameMove.objects.filter(game_id=game.id)
-        board = [None]*81
-        winners = [None]*9
-        for m in moves_qs: board[m.cell*9+m.subcell] = m.player
-        for i in range(9): winners[i] = HardBotLogic.check_line_local_array(board[i*9:(i+1)*9])
-
-        valid = HardBotLogic.get_valid_moves(board, winners, GameLogic.get_next_board_constraint(game.id))
-        if not valid:
+        best_move = HardBotLogic.choose_move(
+            state.to_list(), state.next_board_constraint(), bot_symbol,
+            mode=game.mode, difficulty=difficulty, game_id=game.id
+        )
+        if not best_move:
             return None
         
-        if difficulty > 0 and random.randint(1, 100) <= difficulty:
-            best_move = random.choice(valid)
-            return GameMove.objects.create(game=game, move_no=GameLogic.get_move_count(game.id)+1, player=bot_symbol, cell=best_move[0], subcell=best_move[1])
-
-        best_move = valid[0]
-        for depth in range(1, 6):
-            best_val = -float('inf')
-            alpha, beta = -float('inf'), float('inf')
-            for b, s in valid:
-                board[b*9+s] = bot_symbol
-                was = winners[b]
-                winners[b] = HardBotLogic.check_line_local_array(board[b*9 : (b+1)*9])
-                nc = s if winners[s] is None and not all(board[s*9+k] is not None for k in range(9)) else None
-                val = HardBotLogic.minimax(board, winners, nc, depth-1, False, alpha, beta, bot_symbol, opp_symbol)
-                board[b*9+s] = None
-                winners[b] = was
-                if val > best_val:
-                    best_val, best_move = val, (b, s)
-                alpha = max(alpha, best_val)
-        
-        return GameMove.objects.create(game=game, move_no=GameLogic.get_move_count(game.id)+1, player=bot_symbol, cell=best_move[0], subcell=best_move[1])
+        return GameLogic.save_move(game, state, bot_symbol, *best_move)
+
+# Macro-board line scores (no cell weights), looked up like a sub-board
+MACRO_SCORE = build_score_table((0,) * 9, HardBotLogic.WEIGHTS['two_in_line'], HardBotLogic.WEIGHTS['one_in_line'])
+
+# Batched counterpart of `evaluate`, used by the last ply when `batch` is on
+_W = HardBotLogic.WEIGHTS
+BATCH = BatchEvaluator(
+    [_W['subboard_win'] * _W[k] for k in (
+        'corner_subboard', 'edge_subboard', 'corner_subboard',
+        'edge_subboard', 'center_subboard', 'edge_subboard',
+        'corner_subboard', 'edge_subboard', 'corner_subboard',
+    )],
+    MACRO_SCORE,
+)
+
+# What this bot plugs into the shared search core
+EVALUATOR = core.Evaluator(HardBotLogic.evaluate, 100000, BATCH)
@@ -1,11 +1,12 @@
 import asyncio
 from channels.db import database_sync_to_async
-from ...models import Game, GameMove
+from django.db import IntegrityError
 from ...logic import GameLogic
+from ...state_cache import GameStateCache
 from .chat import BotChatService
-from .easy import EasyBotLogic
-from .medium import MediumBotLogic
-from .hard import HardBotLogic
+from .worker import compute_bot_move, snapshot_from_state
+from ..live_evaluation import LiveEvaluationService
+from ..workers import run_in_engine_pool
 
 class BotService:
     @staticmethod
@@ -13,7 +14,8 @@ class BotService:
         await asyncio.sleep(1) 
         
         # Determine strict mode
-        game = await database_sync_to_async(Game.objects.get)(id=game_id)
+        state = await database_sync_to_async(GameStateCache.load)(game_id)
+        game, board = state.game, state.board
         
         if game.status != 'active':
             return
@@ -22,7 +24,7 @@ class BotService:
         is_bot_x = game.player_x_id is None
         is_bot_o = game.player_o_id is None
         
-        current_turn = await database_sync_to_async(GameLogic.get_current_turn)(game.id)
+        current_turn = board.current_turn()
         is_bot_turn = (current_turn == 'X' and is_bot_x) or (current_turn == 'O' and is_bot_o)
         
         if not is_bot_turn:
@@ -30,37 +32,39 @@ class BotService:
 
         # --- BOT CHAT AGENT (Greeting & Chatter) ---
         bot_symbol = current_turn
-        move_count = await database_sync_to_async(GameLogic.get_move_count)(game.id)
-        if move_count <= 1:
+        if board.move_count <= 1:
              await BotChatService.maybe_send_chat(game, bot_symbol, 'greeting', channel_layer, group_name)
         
         # --- REACTION TO OPPONENT MOVE ---
-        last_move = await database_sync_to_async(GameMove.objects.filter(game=game).last)()
-        if last_move and last_move.player != bot_symbol:
-            # Opponent just moved. Did they win that subgrid?
-            w = await database_sync_to_async(GameLogic.check_subboard_winner)(game_id, last_move.cell)
-            if w and w == last_move.player:
-                 # Opponent won a subgrid
-                 await BotChatService.maybe_send_chat(game, bot_symbol, 'subgrid_loss', channel_layer, group_name)
+        if board.last_move:
+            last_cell, last_subcell = board.last_move
+            last_player = board.cell_owner(last_cell, last_subcell)
+            if last_player != bot_symbol:
+                # Opponent just moved. Did they win that subgrid?
+                w = board.subboard_winner(last_cell)
+                if w and w == last_player:
+                     # Opponent won a subgrid
+                     await BotChatService.maybe_send_chat(game, bot_symbol, 'subgrid_loss', channel_layer, group_name)
 
         # Ensure we are in a bot mode
-        bot_modes = ['bot_easy', 'bot_medium', 'bot_hard', 'bot_custom']
+        bot_modes = ['bot_easy', 'bot_medium', 'bot_hard', 'bot_expert', 'bot_custom']
         if game.mode not in bot_modes:
             return
 
         move = None
-        if game.mode == 'bot_hard' or game.mode == 'bot_custom':
-             move = await database_sync_to_async(HardBotLogic.perform_move)(game_id, difficulty=game.bot_difficulty)
-        elif game.mode == 'bot_medium':
-             move = await database_sync_to_async(MediumBotLogic.perform_move)(game_id)
-        elif game.mode == 'bot_easy':
-             move = await database_sync_to_async(EasyBotLogic.perform_move)(game_id)
+        # Every bot decides in the engine process pool on a snapshot, off the event loop
+        snapshot = snapshot_from_state(game, board, bot_symbol)
+        searched_at = board.move_count
+        coords = await run_in_engine_pool(compute_bot_move, snapshot)
+        if coords:
+             move = await database_sync_to_async(BotService.save_move)(game, board, bot_symbol, *coords, searched_at=searched_at)
         
         if move:
-            await database_sync_to_async(EasyBotLogic.finalize_move)(move)
+            state = await database_sync_to_async(BotService.finalize_move)(game_id, move)
+            board = state.board
             
             # 2. Check if the specific subboard (move.cell) is now won
-            winner_of_subboard = await database_sync_to_async(GameLogic.check_subboard_winner)(game_id, move.cell)
+            winner_of_subboard = board.subboard_winner(move.cell)
             
             if winner_of_subboard:
                 if winner_of_subboard == move.player:
@@ -83,10 +87,11 @@ class BotService:
                     }
                 }
             )
+            asyncio.create_task(LiveEvaluationService.broadcast_after(game_id, move, channel_layer, group_name, board))
             
-            # Reload game to check winner
-            updated_game = await database_sync_to_async(Game.objects.get)(id=game_id)
-            game_winner = await database_sync_to_async(GameLogic.get_winner)(game_id)
+            # The cached game row is updated in place when the game ends
+            updated_game = state.game
+            game_winner = board.winner()
 
             if updated_game.status == 'finished':
                 if game_winner == 'D':
@@ -98,6 +103,36 @@ class BotService:
 
             await BotService.check_game_over_broadcast(game_id, channel_layer, group_name)
 
+    @staticmethod
+    def save_move(game, board, player, cell, subcell, searched_at=None):
+        """
+        Commits the bot's move, or returns None when it no longer applies: the
+        shared board moved on during the search (another bot task for this
+        game, or the human moved), so the result is dropped.
+        """
+        if searched_at is not None and board.move_count != searched_at:
+            return None
+        try:
+            GameLogic.validate_move(game, player, cell, subcell, board=board)
+        except ValueError as e:
+            print(f"[BotService] Dropping bot move {cell},{subcell} for game {game.id}: {e}")
+            return None
+        try:
+            return GameLogic.save_move(game, board, player, cell, subcell)
+        except IntegrityError:
+            # Someone else wrote this move_no while we were searching
+            GameStateCache.invalidate(game.id)
+            return None
+
+    @staticmethod
+    def finalize_move(game_id, move):
+        GameStateCache.record_move(game_id, move)
+        state = GameStateCache.load(game_id)
+        if state.board.move_count != move.move_no:
+            state = GameStateCache.rebuild(game_id)
+        GameLogic.update_game_state(state.game, move, board=state.board)
+        return state
+
     @staticmethod
     async def check_game_over_broadcast(game_id, channel_layer, group_name):
          from ...broadcast_service import BroadcastService
@@ -1,166 +1,67 @@
-import random
-from ...models import Game, GameMove
+from ...models import Game
 from ...logic import GameLogic
+from ..engine.tables import build_score_table, encode
+from ..engine.book import get_book
+from ..engine import search as core
+from ...bot_config import get_search_config
 
 class MediumBotLogic:
     @staticmethod
     def calculate_move(game, bot_symbol):
-        # 1. Reconstruct board state for efficiency
-        moves = GameMove.objects.filter(game_id=game.id)
-        board = [None] * 81 
-        
-        small_board_winners = [None] * 9
-        
-        for m in moves:
-            idx = m.cell * 9 + m.subcell
-            board[idx] = m.player
-            
-        # Recalculate small winners locally
-        for i in range(9):
-             sub_grid = board[i*9 : (i+1)*9]
-             small_board_winners[i] = MediumBotLogic.check_line_local_array(sub_grid)
+        # 1. Reconstruct board state for efficiency (one query)
+        state = GameLogic.load_board(game.id)
+        return MediumBotLogic.choose_move(state.to_list(), state.next_board_constraint(), bot_symbol, mode=game.mode)
 
-        return MediumBotLogic.minimax_root(game, bot_symbol, board, small_board_winners)
+    @staticmethod
+    def choose_move(board, constraint, bot_symbol, mode='bot_medium', clock=None):
+        """DB-free move choice on an 81-cell list; safe to run in a worker process."""
+        # Recalculate small winners locally
+        small_board_winners = [MediumBotLogic.check_line_local_array(board[i*9 : (i+1)*9]) for i in range(9)]
+        config = get_search_config(mode)
+        if config['book']:
+            book_move = get_book().best_move(board, constraint, bot_symbol)
+            if book_move in MediumBotLogic.get_valid_moves(board, small_board_winners, constraint):
+                return book_move
+        return MediumBotLogic.search(
+            board, small_board_winners, constraint, bot_symbol,
+            max_depth=config['max_depth'], budget_ms=config['time_budget_ms'], clock=clock
+        )
 
     @staticmethod
     def check_line_local_array(sub_grid):
-        # Rows
-        for i in range(0, 9, 3):
-            if sub_grid[i] and sub_grid[i] == sub_grid[i+1] == sub_grid[i+2]: return sub_grid[i]
-        # Cols
-        for i in range(3):
-            if sub_grid[i] and sub_grid[i] == sub_grid[i+3] == sub_grid[i+6]: return sub_grid[i]
-        # Diag
-        if sub_grid[0] and sub_grid[0] == sub_grid[4] == sub_grid[8]: return sub_grid[0]
-        if sub_grid[2] and sub_grid[2] == sub_grid[4] == sub_grid[6]: return sub_grid[2]
-        return None
+        return core.sub_winner(sub_grid)
 
     @staticmethod
     def get_valid_moves(board, small_board_winners, constraint):
-        valid_moves = []
-        possible_boards = []
-        
-        if constraint is not None:
-             is_full = all(board[constraint*9 + i] is not None for i in range(9))
-             is_won = small_board_winners[constraint] is not None
-             if not is_full and not is_won:
-                 possible_boards = [constraint]
-             else:
-                 possible_boards = [i for i in range(9) if not all(board[i*9+k] is not None for k in range(9))]
-        else:
-             possible_boards = [i for i in range(9) if not all(board[i*9+k] is not None for k in range(9))]
-
-        for b in possible_boards:
-            for s in range(9):
-                if board[b*9 + s] is None:
-                    valid_moves.append((b, s))
-        return valid_moves
+        # Won sub-boards are closed like full ones, also when the constraint is lifted
+        return core.valid_moves(board, small_board_winners, constraint)
 
     @staticmethod
-    def minimax_root(game, bot_symbol, board, small_board_winners):
+    def search(board, small_board_winners, constraint, bot_symbol, max_depth=4, budget_ms=None, clock=None):
+        """
+        Iterative deepening up to a depth that shrinks with the number of
+        candidate moves (capped by `max_depth`), stopping early when `budget_ms`
+        runs out; returns the best move of the deepest completed iteration.
+        """
         opponent_symbol = 'X' if bot_symbol == 'O' else 'O'
-        constraint = GameLogic.get_next_board_constraint(game.id)
-        
         valid_moves = MediumBotLogic.get_valid_moves(board, small_board_winners, constraint)
         
-        if not valid_moves:
-            return None
-
-        best_score = -float('inf')
-        best_move = random.choice(valid_moves) 
-        
         current_depth = 4 
         if len(valid_moves) > 10: current_depth = 3
         if len(valid_moves) > 30: current_depth = 2
-        
-        alpha = -float('inf')
-        beta = float('inf')
+        current_depth = min(current_depth, max_depth)
 
-        for move in valid_moves:
-            b, s = move
-            idx = b*9 + s
-            board[idx] = bot_symbol
-            
-            was_winner = small_board_winners[b]
-            sub_grid = board[b*9 : (b+1)*9]
-            new_winner = MediumBotLogic.check_line_local_array(sub_grid)
-            small_board_winners[b] = new_winner
-            
-            next_constraint = s
-            if small_board_winners[s] is not None or all(board[s*9+k] is not None for k in range(9)):
-                next_constraint = None
-            
-            score = MediumBotLogic.minimax(board, small_board_winners, next_constraint, current_depth - 1, False, alpha, beta, bot_symbol, opponent_symbol)
-            
-            board[idx] = None
-            small_board_winners[b] = was_winner
-            
-            if score > best_score:
-                best_score = score
-                best_move = move
-            
-            alpha = max(alpha, score)
-            if beta <= alpha: break
-        
-        return best_move
+        return core.search(
+            board, small_board_winners, constraint, bot_symbol, opponent_symbol, EVALUATOR,
+            current_depth, budget_ms=budget_ms, clock=clock,
+        )
 
     @staticmethod
-    def minimax(board, small_board_winners, constraint, depth, is_maximizing, alpha, beta, bot_symbol, opponent_symbol):
-        global_winner = MediumBotLogic.check_line_local_array(small_board_winners)
-        if global_winner == bot_symbol: return 10000 + depth
-        if global_winner == opponent_symbol: return -10000 - depth
-        
-        if depth == 0:
-            return MediumBotLogic.evaluate(board, small_board_winners, bot_symbol, opponent_symbol)
-
-        valid_moves = MediumBotLogic.get_valid_moves(board, small_board_winners, constraint)
-        if not valid_moves:
-            return 0 
-
-        if is_maximizing:
-            max_eval = -float('inf')
-            for move in valid_moves:
-                b, s = move
-                idx = b*9 + s
-                board[idx] = bot_symbol
-                was_winner = small_board_winners[b]
-                small_board_winners[b] = MediumBotLogic.check_line_local_array(board[b*9 : (b+1)*9])
-                
-                next_constraint = s
-                if small_board_winners[s] is not None or all(board[s*9+k] is not None for k in range(9)):
-                    next_constraint = None
-
-                eval = MediumBotLogic.minimax(board, small_board_winners, next_constraint, depth - 1, False, alpha, beta, bot_symbol, opponent_symbol)
-                
-                board[idx] = None
-                small_board_winners[b] = was_winner
-                
-                max_eval = max(max_eval, eval)
-                alpha = max(alpha, eval)
-                if beta <= alpha: break
-            return max_eval
-        else:
-            min_eval = float('inf')
-            for move in valid_moves:
-                b, s = move
-                idx = b*9 + s
-                board[idx] = opponent_symbol
-                was_winner = small_board_winners[b]
-                small_board_winners[b] = MediumBotLogic.check_line_local_array(board[b*9 : (b+1)*9])
-                
-                next_constraint = s
-                if small_board_winners[s] is not None or all(board[s*9+k] is not None for k in range(9)):
-                    next_constraint = None
-
-                eval = MediumBotLogic.minimax(board, small_board_winners, next_constraint, depth - 1, True, alpha, beta, bot_symbol, opponent_symbol)
-                
-                board[idx] = None
-                small_board_winners[b] = was_winner
-                
-                min_eval = min(min_eval, eval)
-                beta = min(beta, eval)
-                if beta <= alpha: break
-            return min_eval
+    def minimax(board, small_board_winners, constraint, depth, is_maximizing, alpha, beta, bot_symbol, opponent_symbol, clock=None, ordering=None, ply=0):
+        return core.minimax(
+            board, small_board_winners, constraint, depth, is_maximizing, alpha, beta,
+            bot_symbol, opponent_symbol, EVALUATOR, clock=clock, ordering=ordering, ply=ply,
+        )
 
     @staticmethod
     def evaluate(board, small_board_winners, bot_symbol, opponent_symbol):
@@ -173,56 +74,36 @@ class MediumBotLogic:
                 if w == bot_symbol: score += 50
                 elif w == opponent_symbol: score -= 50
         
-        score += MediumBotLogic.evaluate_lines(small_board_winners, bot_symbol, opponent_symbol, 200, 0)
+        # Table scores are from X's point of view
+        sign = 1 if bot_symbol == 'X' else -1
+        score += sign * MACRO_SCORE[encode(small_board_winners)]
 
         for i in range(9):
             if small_board_winners[i] is not None: continue
-            sub_grid = board[i*9 : (i+1)*9]
-            if sub_grid[4] == bot_symbol: score += 5
-            elif sub_grid[4] == opponent_symbol: score -= 5
-            score += MediumBotLogic.evaluate_lines(sub_grid, bot_symbol, opponent_symbol, 10, 1)
+            score += sign * SUB_SCORE[encode(board[i*9 : (i+1)*9])]
         
         return score
-
-    @staticmethod
-    def evaluate_lines(grid, bot, opp, score_2, score_1):
-        s = 0
-        lines = [
-            [0,1,2],[3,4,5],[6,7,8], # Rows
-            [0,3,6],[1,4,7],[2,5,8], # Cols
-            [0,4,8],[2,4,6] # Diags
-        ]
-        
-        for line in lines:
-            vals = [grid[x] for x in line]
-            bot_cnt = vals.count(bot)
-            opp_cnt = vals.count(opp)
-            none_cnt = vals.count(None)
-            
-            if bot_cnt == 2 and none_cnt == 1: s += score_2
-            elif bot_cnt == 1 and none_cnt == 2: s += score_1
-            
-            if opp_cnt == 2 and none_cnt == 1: s -= score_2
-            elif opp_cnt == 1 and none_cnt == 2: s -= score_1
-        return s
     
     @staticmethod
     def perform_move(game_id):
         game = Game.objects.get(id=game_id)
-        bot_symbol = 'X' if game.player_x is None else 'O'
+        bot_symbol = 'X' if game.player_x_id is None else 'O'
+        state = GameLogic.load_board(game.id)
         
-        if GameLogic.get_current_turn(game.id) != bot_symbol: return None
+        if state.current_turn() != bot_symbol: return None
 
-        move_coords = MediumBotLogic.calculate_move(game, bot_symbol)
+        move_coords = MediumBotLogic.choose_move(state.to_list(), state.next_board_constraint(), bot_symbol, mode=game.mode)
         if not move_coords: return None 
             
         cell, subcell = move_coords
         
-        move = GameMove.objects.create(
-            game=game,
-            move_no=GameLogic.get_move_count(game.id) + 1,
-            player=bot_symbol,
-            cell=cell,
-            subcell=subcell
-        )
+        move = GameLogic.save_move(game, state, bot_symbol, cell, subcell)
         return move
+
+# Line scores for the macro board (200 per two-in-a-row) and for sub-boards
+# (centre 5, two-in-a-row 10, one-in-a-row 1), looked up in one step
+MACRO_SCORE = build_score_table((0,) * 9, 200, 0)
+SUB_SCORE = build_score_table((0, 0, 0, 0, 5, 0, 0, 0, 0), 10, 1)
+
+# What this bot plugs into the shared search core: no table, no batching
+EVALUATOR = core.Evaluator(MediumBotLogic.evaluate, 10000)
@@ -0,0 +1,58 @@
+"""
+Process-pool entry point for the bots.
+
+The event loop hands the engine a small, picklable snapshot of the position
+instead of a model instance, so the search never touches the database or the
+consumer's thread and a slow hard move cannot stall other games.
+"""
+
+from typing import NamedTuple, Optional
+
+
+class BotSnapshot(NamedTuple):
+    game_id: str
+    mode: str
+    difficulty: int
+    cells: str  # 81 chars of '.', 'X', 'O' in `cell * 9 + subcell` order
+    constraint: Optional[int]
+    bot_symbol: str
+    last_move: Optional[tuple] = None
+
+
+def snapshot_from_state(game, board, bot_symbol):
+    cells = ''.join(c or '.' for c in board.to_list())
+    return BotSnapshot(
+        str(game.id), game.mode, game.bot_difficulty or 0,
+        cells, board.next_board_constraint(), bot_symbol, board.last_move,
+    )
+
+
+def compute_bot_move(snapshot):
+    """Returns the bot's (cell, subcell) for `snapshot`, or None if it has no move."""
+    from .easy import EasyBotLogic
+    from .hard import HardBotLogic
+    from .medium import MediumBotLogic
+    from ..engine import UltimateBoard, endgame, mcts
+    from ..engine.deadline import Deadline
+    from ...bot_config import get_search_config
+
+    if snapshot.mode == 'bot_easy':
+        return EasyBotLogic.choose_move(UltimateBoard.from_cells(snapshot.cells, snapshot.last_move), snapshot.bot_symbol)
+
+    if snapshot.mode == 'bot_expert':
+        config = get_search_config(snapshot.mode)
+        board = UltimateBoard.from_cells(snapshot.cells, snapshot.last_move)
+        # The solver and the playouts share one move budget
+        clock = Deadline(config['time_budget_ms'])
+        solved_move = endgame.best_move(board, clock=clock.share(endgame.TIME_SHARE)) if config['endgame'] else None
+        if solved_move is not None:
+            return solved_move
+        return mcts.search(board, playouts=config['playouts'], game_id=snapshot.game_id, clock=clock)
+
+    board = [None if c == '.' else c for c in snapshot.cells]
+    if snapshot.mode == 'bot_medium':
+        return MediumBotLogic.choose_move(board, snapshot.constraint, snapshot.bot_symbol, mode=snapshot.mode)
+    return HardBotLogic.choose_move(
+        board, snapshot.constraint, snapshot.bot_symbol,
+        mode=snapshot.mode, difficulty=snapshot.difficulty, game_id=snapshot.game_id,
+    )
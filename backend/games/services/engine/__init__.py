@@ -0,0 +1,2 @@
+from .board import UltimateBoard, subboard_outcome
+from . import tables
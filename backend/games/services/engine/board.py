@@ -0,0 +1,221 @@
+"""
+Pure in-memory Ultimate Tic-Tac-Toe board.
+
+Cells are indexed the same way as everywhere else in the backend:
+``index = cell * 9 + subcell``. Each side owns one 81-bit mask for its
+marks and one 9-bit mask for the sub-boards it has won (the macro board);
+sub-boards that can no longer be won by anybody are tracked in a shared
+``dead`` macro mask.
+"""
+
+from .tables import LINES, OUTCOME, BASE3
+
+X, O = 0, 1
+SYMBOLS = ('X', 'O')
+SIDE_OF = {'X': X, 'O': O}
+
+FULL = 0x1FF
+
+# WIN_MASKS[b] holds the 8 lines of sub-board b shifted into the 81-bit space.
+WIN_MASKS = tuple(tuple(line << (9 * b) for line in LINES) for b in range(9))
+
+# HAS_LINE[m]: the 9-bit mask m contains a full line.
+HAS_LINE = tuple(any(m & line == line for line in LINES) for m in range(512))
+
+# OPEN_LINE[m]: at least one line is free of the marks in m, i.e. the other
+# side can still complete a line while m is the blocking mask.
+OPEN_LINE = tuple(any(m & line == 0 for line in LINES) for m in range(512))
+
+
+def subboard_outcome(x_bits, o_bits):
+    """Returns 'X', 'O', 'D' (full or dead) or None for a 3x3 grid given as two 9-bit masks."""
+    return OUTCOME[BASE3[x_bits] + 2 * BASE3[o_bits]]
+
+
+class UltimateBoard:
+    __slots__ = ('cells', 'macro', 'dead', 'winners', 'last_move', 'move_count', 'history')
+
+    def __init__(self):
+        self.cells = [0, 0]
+        self.macro = [0, 0]
+        self.dead = 0
+        self.winners = [None] * 9
+        self.last_move = None
+        self.move_count = 0
+        self.history = []
+
+    @classmethod
+    def from_moves(cls, moves):
+        """
+        Builds a board from an ordered iterable of ``(player, cell, subcell)``
+        tuples, e.g. ``GameMove.objects.values_list('player', 'cell', 'subcell')``.
+        """
+        board = cls()
+        for player, cell, subcell in moves:
+            board.play(cell, subcell, player)
+        return board
+
+    @classmethod
+    def from_cells(cls, cells, last_move=None):
+        """
+        Builds a board from an 81-element 'X' / 'O' / None list (or '.XO' string)
+        and the last ``(cell, subcell)`` played. Move order is unknown, so the
+        result cannot be undone past this position.
+        """
+        board = cls()
+        for i, c in enumerate(cells):
+            if c in SIDE_OF:
+                board.cells[SIDE_OF[c]] |= 1 << i
+                board.move_count += 1
+        for cell in range(9):
+            result = subboard_outcome(board.subboard_bits(cell, X), board.subboard_bits(cell, O))
+            if result is not None:
+                board._set_winner(cell, result)
+        board.last_move = tuple(last_move) if last_move is not None else None
+        return board
+
+    def copy(self):
+        clone = UltimateBoard.__new__(UltimateBoard)
+        clone.cells = self.cells[:]
+        clone.macro = self.macro[:]
+        clone.dead = self.dead
+        clone.winners = self.winners[:]
+        clone.last_move = self.last_move
+        clone.move_count = self.move_count
+        clone.history = self.history[:]
+        return clone
+
+    # --- Queries ---
+
+    def current_turn(self):
+        return 'O' if self.move_count % 2 != 0 else 'X'
+
+    def occupied(self):
+        return self.cells[X] | self.cells[O]
+
+    def subboard_bits(self, cell, side):
+        return (self.cells[side] >> (cell * 9)) & FULL
+
+    def is_occupied(self, cell, subcell):
+        return bool((self.occupied() >> (cell * 9 + subcell)) & 1)
+
+    def cell_owner(self, cell, subcell):
+        bit = 1 << (cell * 9 + subcell)
+        if self.cells[X] & bit:
+            return 'X'
+        if self.cells[O] & bit:
+            return 'O'
+        return None
+
+    def to_list(self):
+        """81-element list of 'X' / 'O' / None, the layout the minimax bots search on."""
+        x_cells, o_cells = self.cells
+        return ['X' if x_cells >> i & 1 else 'O' if o_cells >> i & 1 else None for i in range(81)]
+
+    def is_subboard_full(self, cell):
+        return (self.occupied() >> (cell * 9)) & FULL == FULL
+
+    def subboard_winner(self, cell):
+        return self.winners[cell]
+
+    def next_board_constraint(self):
+        if self.last_move is None:
+            return None
+        target = self.last_move[1]
+        if self.winners[target] is not None:  # Won or Draw
+            return None
+        return target
+
+    def global_winner(self):
+        if HAS_LINE[self.macro[X]]:
+            return 'X'
+        if HAS_LINE[self.macro[O]]:
+            return 'O'
+        return None
+
+    def is_global_draw(self):
+        # A decided-as-draw sub-board blocks every line passing through it for both sides.
+        x_can_win = OPEN_LINE[self.macro[O] | self.dead]
+        o_can_win = OPEN_LINE[self.macro[X] | self.dead]
+        return not x_can_win and not o_can_win
+
+    def winner(self):
+        w = self.global_winner()
+        if w:
+            return w
+        if self.is_global_draw() or self.move_count >= 81:
+            return 'D'
+        return None
+
+    def legal_moves(self):
+        """Moves a player may choose: the constrained sub-board, or every undecided one."""
+        occupied = self.occupied()
+        constraint = self.next_board_constraint()
+        boards = [constraint] if constraint is not None else [b for b in range(9) if self.winners[b] is None]
+        moves = []
+        for b in boards:
+            free = ~(occupied >> (b * 9)) & FULL
+            s = 0
+            while free:
+                if free & 1:
+                    moves.append((b, s))
+                free >>= 1
+                s += 1
+        return moves
+
+    # --- Rules ---
+
+    def validate_move(self, player_char, cell, subcell):
+        if self.current_turn() != player_char:
+            raise ValueError("Not your turn.")
+
+        if self.winner():
+            raise ValueError("Game already finished.")
+
+        constraint = self.next_board_constraint()
+        if constraint is not None and cell != constraint:
+            raise ValueError(f"Must play in subboard {constraint}")
+
+        if not (isinstance(cell, int) and isinstance(subcell, int) and 0 <= cell <= 8 and 0 <= subcell <= 8):
+            raise ValueError("Invalid cell coordinates.")
+
+        if self.is_occupied(cell, subcell):
+            raise ValueError("Cell already occupied.")
+
+    # --- Make / unmake ---
+
+    def play(self, cell, subcell, player=None):
+        """Places a mark without validation. ``player`` defaults to the side to move."""
+        side = SIDE_OF[player] if player else self.move_count % 2
+        self.history.append((cell, subcell, side, self.winners[cell], self.last_move))
+        self.cells[side] |= 1 << (cell * 9 + subcell)
+        self.last_move = (cell, subcell)
+        self.move_count += 1
+
+        if self.winners[cell] is None:
+            result = subboard_outcome(self.subboard_bits(cell, X), self.subboard_bits(cell, O))
+            if result is not None:
+                self._set_winner(cell, result)
+
+    def undo(self):
+        cell, subcell, side, previous_winner, previous_last = self.history.pop()
+        self.cells[side] &= ~(1 << (cell * 9 + subcell))
+        if self.winners[cell] != previous_winner:
+            self._clear_winner(cell)
+        self.last_move = previous_last
+        self.move_count -= 1
+
+    def _set_winner(self, cell, result):
+        self.winners[cell] = result
+        bit = 1 << cell
+        if result == 'D':
+            self.dead |= bit
+        else:
+            self.macro[SIDE_OF[result]] |= bit
+
+    def _clear_winner(self, cell):
+        self.winners[cell] = None
+        mask = ~(1 << cell)
+        self.macro[X] &= mask
+        self.macro[O] &= mask
+        self.dead &= mask
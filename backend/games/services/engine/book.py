@@ -0,0 +1,144 @@
+"""
+Opening book: deep-searched scores of every legal move in early positions.
+
+Positions are folded under the 8 symmetries of the 3x3 grid, which act on the
+sub-board and the cell index alike, and keyed by the smallest Zobrist key
+(`hash_position`) among their images. Each entry holds the search depth and
+the score of every legal move, from X's point of view, in that canonical
+frame; lookups map the moves back to the caller's frame.
+
+The book ships as a compact binary file (``opening_book.bin`` next to this
+module, built by ``manage.py build_opening_book``):
+
+    header   b'UTBK', version (u8), entry count (u32)
+    entry    key (u64), depth (u8), move count (u8),
+             then per move: cell * 9 + subcell (u8), score (i32)
+
+all little-endian, entries sorted by key. A missing file is an empty book.
+"""
+
+import os
+import struct
+
+from .zobrist import hash_position
+
+MAGIC = b'UTBK'
+VERSION = 1
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), 'opening_book.bin')
+
+_HEADER = struct.Struct('<4sBI')
+_ENTRY = struct.Struct('<QBB')
+_MOVE = struct.Struct('<Bi')
+
+
+def _compose(p, q):
+    return tuple(p[q[i]] for i in range(9))
+
+
+# Images of the 3x3 grid index under rotation and reflection
+_ROTATE = (6, 3, 0, 7, 4, 1, 8, 5, 2)
+_MIRROR = (2, 1, 0, 5, 4, 3, 8, 7, 6)
+_IDENTITY = tuple(range(9))
+SYMMETRIES = []
+for _base in (_IDENTITY, _MIRROR):
+    _p = _base
+    for _ in range(4):
+        SYMMETRIES.append(_p)
+        _p = _compose(_ROTATE, _p)
+SYMMETRIES = tuple(SYMMETRIES)
+INVERSES = tuple(tuple(p.index(i) for i in range(9)) for p in SYMMETRIES)
+
+
+def transform(board, p):
+    """Image of an 81-cell list under the grid permutation `p`."""
+    image = [None] * 81
+    for b in range(9):
+        for s in range(9):
+            image[p[b] * 9 + p[s]] = board[b * 9 + s]
+    return image
+
+
+def canonical(board, constraint):
+    """Returns ``(key, symmetry index)`` of the canonical image of a position."""
+    best = None
+    for i, p in enumerate(SYMMETRIES):
+        key = hash_position(transform(board, p), None if constraint is None else p[constraint])
+        if best is None or key < best[0]:
+            best = (key, i)
+    return best
+
+
+class OpeningBook:
+    def __init__(self, entries=None):
+        self.entries = entries or {} # key -> (depth, ((flat move, score), ...))
+
+    def __len__(self):
+        return len(self.entries)
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, count = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not an opening book of version {VERSION}.")
+        entries = {}
+        offset = _HEADER.size
+        for _ in range(count):
+            key, depth, n = _ENTRY.unpack_from(data, offset)
+            offset += _ENTRY.size
+            moves = tuple(_MOVE.unpack_from(data, offset + i * _MOVE.size) for i in range(n))
+            offset += n * _MOVE.size
+            entries[key] = (depth, moves)
+        return cls(entries)
+
+    def save(self, path=DEFAULT_PATH):
+        chunks = [_HEADER.pack(MAGIC, VERSION, len(self.entries))]
+        for key in sorted(self.entries):
+            depth, moves = self.entries[key]
+            chunks.append(_ENTRY.pack(key, depth, len(moves)))
+            chunks.extend(_MOVE.pack(flat, int(score)) for flat, score in moves)
+        with open(path, 'wb') as f:
+            f.write(b''.join(chunks))
+
+    def add(self, board, constraint, depth, scores):
+        """Stores `scores` ({(cell, subcell): X's-view score}) for a position."""
+        key, i = canonical(board, constraint)
+        p = SYMMETRIES[i]
+        self.entries[key] = (depth, tuple(sorted((p[b] * 9 + p[s], score) for (b, s), score in scores.items())))
+
+    def __contains__(self, position):
+        return canonical(*position)[0] in self.entries
+
+    def lookup(self, board, constraint):
+        """``(depth, {(cell, subcell): X's-view score})`` for a book position, else None."""
+        if not self.entries:
+            return None
+        key, i = canonical(board, constraint)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        depth, moves = entry
+        inverse = INVERSES[i]
+        return depth, {(inverse[flat // 9], inverse[flat % 9]): score for flat, score in moves}
+
+    def best_move(self, board, constraint, side):
+        """`side`'s best book move in a position, or None when out of book."""
+        hit = self.lookup(board, constraint)
+        if hit is None:
+            return None
+        scores = hit[1]
+        return (max if side == 'X' else min)(scores, key=scores.get)
+
+
+_book = None
+
+
+def get_book():
+    """The shipped book, loaded on first use."""
+    global _book
+    if _book is None:
+        _book = OpeningBook.load()
+    return _book
@@ -0,0 +1,37 @@
+import time
+
+
+class SearchTimeout(Exception):
+    """Raised inside a search when its time budget runs out."""
+
+
+class Deadline:
+    """
+    Node counter and optional wall-clock budget for one search. `tick()` is
+    called once per node; the clock is only read every CHECK_EVERY nodes, and
+    only while `armed` (iterative deepening always completes its first pass).
+    """
+    CHECK_EVERY = 256
+
+    def __init__(self, budget_ms=None):
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + budget_ms / 1000 if budget_ms else None
+        self.nodes = 0
+        self.armed = True
+
+    def tick(self):
+        self.nodes += 1
+        if self.armed and self.expires_at is not None and self.nodes % self.CHECK_EVERY == 0 and time.monotonic() >= self.expires_at:
+            raise SearchTimeout()
+
+    def expired(self):
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def elapsed_ms(self):
+        return (time.monotonic() - self.started_at) * 1000
+
+    def share(self, fraction):
+        """A new Deadline for the first `fraction` of the time left on this one (unbounded if this is)."""
+        if self.expires_at is None:
+            return Deadline()
+        return Deadline(max(1, (self.expires_at - time.monotonic()) * 1000 * fraction))
@@ -0,0 +1,183 @@
+"""
+Exact endgame solver on bitboards.
+
+Once few empty cells are left in the sub-boards still in play, the rest of
+the game is searched to the end: negamax with alpha-beta over raw bitmasks,
+under the game rules (full or dead sub-boards are closed), with its own memo
+table of proven bounds. Scores are from the side to move's point of view:
+``MATE - n`` for a forced win in n plies, ``-(MATE - n)`` for a forced loss
+and 0 for a draw. A node limit keeps a position that is too wide from
+costing more than the search it replaces, and an optional Deadline keeps it
+within a share of the bot's time budget (the search gets the rest).
+"""
+
+from collections import namedtuple
+
+from .board import X, O, FULL, HAS_LINE, OPEN_LINE, UltimateBoard
+from .deadline import SearchTimeout
+from .mcts import FREE_SUBCELLS
+from .tables import BASE3, OUTCOME
+from .transposition import EXACT, LOWER, UPPER
+
+MATE = 1000
+
+# Positions with at most this many empty cells in open sub-boards are solved
+MAX_EMPTY = 14
+# About half a second of pure Python; wider positions fall back to the search
+MAX_NODES = 100_000
+# Share of a move's time budget the bots give the solver
+TIME_SHARE = 0.5
+MAX_ENTRIES = 500_000
+
+Solution = namedtuple('Solution', 'move score scores')
+
+
+class NodeLimit(Exception):
+    pass
+
+
+def open_cells(board):
+    """Empty cells in the sub-boards of `board` (an UltimateBoard) that are still in play."""
+    occupied = board.occupied()
+    return sum(
+        len(FREE_SUBCELLS[~(occupied >> (b * 9)) & FULL])
+        for b in range(9) if board.winners[b] is None
+    )
+
+
+def outcome(score):
+    """('win' / 'loss' / 'draw', plies to the end) for a solver score."""
+    if score > 0:
+        return 'win', MATE - score
+    if score < 0:
+        return 'loss', MATE + score
+    return 'draw', None
+
+
+def board_from_cells(cells, constraint):
+    """UltimateBoard for an 81-cell list and the rules' board constraint (None = anywhere)."""
+    return UltimateBoard.from_cells(cells, last_move=(constraint, constraint) if constraint is not None else None)
+
+
+class EndgameSolver:
+    def __init__(self, max_nodes=MAX_NODES):
+        self.max_nodes = max_nodes
+        self.memo = {}
+        self.nodes = 0
+        self.clock = None
+
+    def solve(self, board, all_scores=False, clock=None):
+        """
+        Solves `board` (an UltimateBoard) for the side to move. Returns a
+        Solution with the best move, its score and, with `all_scores`, the
+        exact score of every legal move ({move: score}); None when the
+        position is over, too wide, or runs past the node limit or `clock`
+        (a Deadline).
+        """
+        if board.winner() is not None or open_cells(board) > MAX_EMPTY:
+            return None
+        cells = board.cells[:]
+        macro = board.macro[:]
+        side = board.move_count % 2
+        target = board.next_board_constraint()
+        self.nodes = 0
+        self.clock = clock
+        if len(self.memo) > MAX_ENTRIES:
+            self.memo.clear()
+
+        best_move, best, scores = None, -MATE - 1, {}
+        try:
+            for b, s in self.moves(cells, macro, board.dead, target):
+                # Exact scores need a full window for every move
+                alpha = -MATE - 1 if all_scores else best
+                value = self.child(cells, macro, board.dead, side, b, s, alpha, MATE + 1)
+                scores[(b, s)] = value
+                if value > best:
+                    best_move, best = (b, s), value
+        except (NodeLimit, SearchTimeout):
+            return None
+        return Solution(best_move, best, scores if all_scores else None)
+
+    def moves(self, cells, macro, dead, target):
+        occupied = cells[X] | cells[O]
+        decided = macro[X] | macro[O] | dead
+        boards = [target] if target is not None else [b for b in range(9) if not decided >> b & 1]
+        moves = [(b, s) for b in boards for s in FREE_SUBCELLS[~(occupied >> (b * 9)) & FULL]]
+        # Moves that send the opponent to a closed sub-board (a free choice) last
+        moves.sort(key=lambda m: decided >> m[1] & 1)
+        return moves
+
+    def child(self, cells, macro, dead, side, b, s, alpha, beta):
+        """Score for `side` of playing (b, s), searched within (alpha, beta)."""
+        shift = b * 9
+        cells[side] |= 1 << (shift + s)
+        try:
+            result = OUTCOME[BASE3[(cells[X] >> shift) & FULL] + 2 * BASE3[(cells[O] >> shift) & FULL]]
+            child_macro, child_dead = macro, dead
+            if result == 'D':
+                child_dead = dead | 1 << b
+            elif result is not None:
+                child_macro = macro[:]
+                child_macro[side] |= 1 << b
+                if HAS_LINE[child_macro[side]]:
+                    return MATE - 1
+            if result is not None and not OPEN_LINE[child_macro[O] | child_dead] and not OPEN_LINE[child_macro[X] | child_dead]:
+                return 0
+
+            decided = child_macro[X] | child_macro[O] | child_dead
+            target = None if decided >> s & 1 else s
+            # Mate scores shrink by one per ply, so widen the window by one
+            value = -self.negamax(cells, child_macro, child_dead, side ^ 1, target, -beta - 1, -alpha + 1)
+        finally:
+            cells[side] &= ~(1 << (shift + s))
+        if value > 0:
+            return value - 1
+        if value < 0:
+            return value + 1
+        return 0
+
+    def negamax(self, cells, macro, dead, side, target, alpha, beta):
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            raise NodeLimit()
+        if self.clock is not None:
+            self.clock.tick()
+
+        key = (cells[X], cells[O], target)
+        entry = self.memo.get(key)
+        if entry is not None:
+            bound, value = entry
+            if bound == EXACT:
+                return value
+            if bound == LOWER and value >= beta:
+                return value
+            if bound == UPPER and value <= alpha:
+                return value
+
+        moves = self.moves(cells, macro, dead, target)
+        if not moves:
+            return 0
+        alpha_orig = alpha
+        best = -MATE - 1
+        for b, s in moves:
+            value = self.child(cells, macro, dead, side, b, s, alpha, beta)
+            if value > best:
+                best = value
+                if best > alpha:
+                    alpha = best
+                    if alpha >= beta:
+                        break
+
+        if best <= alpha_orig:
+            self.memo[key] = (UPPER, best)
+        elif best >= beta:
+            self.memo[key] = (LOWER, best)
+        else:
+            self.memo[key] = (EXACT, best)
+        return best
+
+
+def best_move(board, max_nodes=MAX_NODES, clock=None):
+    """The solver's move for `board` (an UltimateBoard), or None when it does not apply or runs out of time."""
+    solution = EndgameSolver(max_nodes).solve(board, clock=clock)
+    return solution.move if solution is not None else None
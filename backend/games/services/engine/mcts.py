@@ -0,0 +1,214 @@
+"""
+Monte Carlo Tree Search (UCT) on UltimateBoard.
+
+Each iteration walks the tree with UCB1, expands one untried move, finishes
+the game with a random playout on raw bitmasks and backs the result up. The
+search stops after a playout budget or a time budget, whichever comes first,
+and plays the most visited root move. Trees are kept per game so the subtree
+under the moves actually played is reused on the bot's next turn.
+"""
+
+import math
+import random
+from collections import OrderedDict
+
+from .board import X, O, FULL, HAS_LINE, OPEN_LINE, SYMBOLS
+from .tables import BASE3, OUTCOME
+from .deadline import Deadline
+
+EXPLORATION = math.sqrt(2)
+
+# FREE_SUBCELLS[m]: subcells whose bit is set in the 9-bit mask m.
+FREE_SUBCELLS = tuple(tuple(s for s in range(9) if m >> s & 1) for m in range(512))
+
+# Clock reads are cheap next to a playout, but not free
+CHECK_EVERY = 16
+
+# Used when neither a playout nor a time budget is given
+DEFAULT_PLAYOUTS = 1000
+
+
+class Node:
+    __slots__ = ('move', 'parent', 'children', 'untried', 'visits', 'score', 'side')
+
+    def __init__(self, board, move=None, parent=None):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = board.legal_moves() if board.winner() is None else []
+        self.visits = 0
+        self.score = 0.0 # From the point of view of `side`, who played `move`
+        self.side = (board.move_count - 1) % 2
+
+    def select_child(self):
+        log_n = math.log(self.visits)
+        return max(
+            self.children,
+            key=lambda c: c.score / c.visits + EXPLORATION * math.sqrt(log_n / c.visits),
+        )
+
+
+def playout(board, rng=random):
+    """Plays uniformly random moves from `board` to the end; returns 'X', 'O' or 'D'."""
+    result = board.winner()
+    if result is not None:
+        return result
+
+    cells = board.cells[:]
+    macro = board.macro[:]
+    dead = board.dead
+    decided = macro[X] | macro[O] | dead
+    side = board.move_count % 2
+    target = board.last_move[1] if board.last_move is not None else None
+
+    while True:
+        occupied = cells[X] | cells[O]
+        if target is not None and not decided >> target & 1:
+            b = target
+            s = rng.choice(FREE_SUBCELLS[~(occupied >> (b * 9)) & FULL])
+        else:
+            moves = [
+                (b, s)
+                for b in range(9) if not decided >> b & 1
+                for s in FREE_SUBCELLS[~(occupied >> (b * 9)) & FULL]
+            ]
+            b, s = rng.choice(moves)
+
+        cells[side] |= 1 << (b * 9 + s)
+        shift = b * 9
+        outcome = OUTCOME[BASE3[(cells[X] >> shift) & FULL] + 2 * BASE3[(cells[O] >> shift) & FULL]]
+        if outcome is not None:
+            decided |= 1 << b
+            if outcome == 'D':
+                dead |= 1 << b
+            else:
+                macro[side] |= 1 << b
+                if HAS_LINE[macro[side]]:
+                    return SYMBOLS[side]
+            if not OPEN_LINE[macro[O] | dead] and not OPEN_LINE[macro[X] | dead]:
+                return 'D'
+
+        target = s
+        side ^= 1
+
+
+class MCTS:
+    """One search tree, rooted at the position the bot last searched."""
+
+    def __init__(self, board, rng=None):
+        self.board = board.copy()
+        self.root = Node(self.board)
+        self.rng = rng or random.Random(random.random()) # Follows random.seed()
+
+    def advance(self, board):
+        """
+        Re-roots the tree at `board` if it follows from the current root through
+        expanded children; returns False (tree unusable) otherwise.
+        """
+        new_x, new_o = board.cells
+        old_x, old_o = self.board.cells
+        if new_x & old_x != old_x or new_o & old_o != old_o:
+            return False
+        added = ((new_x ^ old_x), (new_o ^ old_o))
+        node = self.root
+        work = self.board.copy()
+        while work.move_count < board.move_count:
+            side = work.move_count % 2
+            child = next(
+                (c for c in node.children if added[side] >> (c.move[0] * 9 + c.move[1]) & 1),
+                None,
+            )
+            if child is None:
+                return False
+            work.play(*child.move)
+            node = child
+        if work.last_move != board.last_move:
+            return False
+        node.parent = None
+        self.root = node
+        self.board = work
+        return True
+
+    def run(self, playouts=None, budget_ms=None, clock=None):
+        clock = clock or Deadline(budget_ms)
+        board = self.board
+        root = self.root
+        rng = self.rng
+        if playouts is None and clock.expires_at is None:
+            playouts = DEFAULT_PLAYOUTS
+        iterations = 0
+        while playouts is None or iterations < playouts:
+            if iterations and iterations % CHECK_EVERY == 0 and clock.expired():
+                break
+            iterations += 1
+            clock.nodes += 1
+
+            node = root
+            depth = 0
+            # Selection
+            while not node.untried and node.children:
+                node = node.select_child()
+                board.play(*node.move)
+                depth += 1
+            # Expansion
+            if node.untried:
+                move = node.untried.pop(rng.randrange(len(node.untried)))
+                board.play(*move)
+                depth += 1
+                child = Node(board, move, node)
+                node.children.append(child)
+                node = child
+            # Simulation
+            result = playout(board, rng)
+            # Backpropagation
+            while node is not None:
+                node.visits += 1
+                if result == 'D':
+                    node.score += 0.5
+                elif result == SYMBOLS[node.side]:
+                    node.score += 1.0
+                node = node.parent
+            for _ in range(depth):
+                board.undo()
+        return clock
+
+    def best_move(self):
+        if not self.root.children:
+            return None
+        return max(self.root.children, key=lambda c: c.visits).move
+
+
+class TreeRegistry:
+    """LRU of one MCTS tree per game, so consecutive bot moves reuse the subtree."""
+
+    def __init__(self, max_games=32):
+        self.max_games = max_games
+        self.trees = OrderedDict()
+
+    def get(self, game_id, board):
+        key = str(game_id)
+        tree = self.trees.get(key)
+        if tree is None or not tree.advance(board):
+            tree = MCTS(board)
+        self.trees[key] = tree
+        self.trees.move_to_end(key)
+        while len(self.trees) > self.max_games:
+            self.trees.popitem(last=False)
+        return tree
+
+    def discard(self, game_id):
+        self.trees.pop(str(game_id), None)
+
+
+TREES = TreeRegistry()
+
+
+def search(board, playouts=None, budget_ms=None, game_id=None, clock=None):
+    """Returns the most visited move from `board` (an UltimateBoard), or None if the game is over."""
+    if board.winner() is not None:
+        return None
+    tree = TREES.get(game_id, board) if game_id is not None else MCTS(board)
+    if not tree.root.untried and not tree.root.children:
+        return None
+    tree.run(playouts=playouts, budget_ms=budget_ms, clock=clock)
+    return tree.best_move()
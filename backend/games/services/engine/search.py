@@ -0,0 +1,329 @@
+"""
+Search core shared by the minimax bots and the game analysis.
+
+`HardBotLogic`, `MediumBotLogic` and `EvaluationService` all search the same
+way and only differ in what they plug in: an `Evaluator` (static evaluation,
+score of a won game, optional NumPy leaf evaluator), a transposition table, a
+Deadline and a depth. Move generation, make/unmake and alpha-beta live here
+once, so an optimisation of any of them speeds up every caller.
+
+Positions are an 81-cell list (``cell * 9 + subcell``) and the line winner of
+every sub-board. A sub-board that is won or full is closed: sending the
+opponent there lets them play in any open sub-board.
+
+Alpha-beta prunes best when the strongest move comes first. Within one
+search (all iterations of iterative deepening), `MoveOrdering` tries, in
+order: the transposition table's best move, the two killer moves of the ply
+(the latest quiet moves that caused a beta cutoff there), then moves by their
+history score (cutoffs weighted by depth squared, per side), with centre
+subcells and the centre sub-board breaking ties as before.
+"""
+
+from .batch import expand, to_array
+from .deadline import Deadline, SearchTimeout
+from .tables import LINE_WINNER, encode
+from .transposition import EXACT, LOWER, UPPER
+from .zobrist import CELL_KEYS, constraint_key, hash_cells
+
+INF = float('inf')
+
+MAX_PLY = 82
+
+TT_BONUS = 1 << 40
+KILLER_BONUS = 1 << 39
+
+# CENTRE[cell * 9 + subcell]: the static "centre first" order
+CENTRE = tuple((2 if i % 9 == 4 else 0) + (1 if i // 9 == 4 else 0) for i in range(81))
+
+
+class Evaluator:
+    """
+    What a caller plugs into the search: `evaluate(board, winners, bot, opp)`
+    scores a leaf for `bot`, a won game scores ``win_score`` plus the plies
+    left (so faster wins rank higher), and `batch` is an optional
+    BatchEvaluator for the last ply.
+    """
+    __slots__ = ('evaluate', 'win_score', 'batch')
+
+    def __init__(self, evaluate, win_score, batch=None):
+        self.evaluate = evaluate
+        self.win_score = win_score
+        self.batch = batch
+
+
+def sub_winner(grid):
+    """'X' / 'O' for a completed line in a 9-cell grid (a sub-board or the winners), else None."""
+    return LINE_WINNER[encode(grid)]
+
+
+def winners_of(board):
+    return [LINE_WINNER[encode(board[i*9 : (i+1)*9])] for i in range(9)]
+
+
+def next_constraint(board, winners, subcell):
+    """The sub-board the next player is sent to by a move on `subcell`, None if it is closed."""
+    if winners[subcell] is None and None in board[subcell*9 : (subcell+1)*9]:
+        return subcell
+    return None
+
+
+def valid_moves(board, winners, constraint):
+    """Legal moves: the constrained sub-board if it is still open, else every open sub-board."""
+    if constraint is not None and winners[constraint] is None:
+        base = constraint * 9
+        moves = [(constraint, s) for s in range(9) if board[base + s] is None]
+        if moves:
+            return moves
+    return [(b, s) for b in range(9) if winners[b] is None for s in range(9) if board[b*9 + s] is None]
+
+
+def make_move(board, winners, move, side):
+    """Plays `move` for `side` in place; returns the token `unmake_move` needs."""
+    b, s = move
+    board[b*9 + s] = side
+    was = winners[b]
+    winners[b] = LINE_WINNER[encode(board[b*9 : (b+1)*9])]
+    return was
+
+
+def unmake_move(board, winners, move, was):
+    b, s = move
+    board[b*9 + s] = None
+    winners[b] = was
+
+
+def minimax(board, winners, constraint, depth, is_max, alpha, beta, bot, opp, evaluator,
+            tt=None, key=0, clock=None, batch=False, ordering=None, ply=0):
+    """
+    Alpha-beta value of a position for `bot`, `depth` plies deep.
+
+    `tt` / `key`: optional transposition table and the Zobrist key of the
+    cells (kept incrementally); the constraint is mixed in on probe.
+    `clock`: optional Deadline, raises SearchTimeout when the budget is spent.
+    `batch`: score the leaves below a depth-1 node in one NumPy call.
+    `ordering` / `ply`: optional MoveOrdering of the search and this node's ply.
+    """
+    if clock is not None: clock.tick()
+    win = LINE_WINNER[encode(winners)]
+    if win is not None:
+        return evaluator.win_score + depth if win == bot else -evaluator.win_score - depth
+    if depth == 0:
+        return evaluator.evaluate(board, winners, bot, opp)
+
+    moves = valid_moves(board, winners, constraint)
+    if not moves: return 0
+
+    tt_key = tt_move = None
+    if tt is not None:
+        tt_key = key ^ constraint_key(constraint)
+        entry = tt.get(tt_key)
+        if entry is not None:
+            entry_depth, bound, value, tt_move = entry
+            if entry_depth >= depth:
+                if bound == EXACT: return value
+                if bound == LOWER: alpha = max(alpha, value)
+                elif bound == UPPER: beta = min(beta, value)
+                if beta <= alpha: return value
+    if ordering is not None:
+        ordering.order(moves, ply, 0 if is_max else 1, tt_move)
+    else:
+        centre_first(moves)
+        # Try the stored best move first
+        if tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+    alpha_orig, beta_orig = alpha, beta
+    side = bot if is_max else opp
+    best_move = None
+
+    if depth == 1 and batch and evaluator.batch is not None:
+        # No pruning among the leaves, but no Python evaluate per leaf either
+        if clock is not None: clock.nodes += len(moves)
+        scores = evaluator.batch.score_for(expand(to_array(board), moves, side), bot).tolist()
+        i = scores.index(max(scores) if is_max else min(scores))
+        val, best_move = scores[i], moves[i]
+    else:
+        keys = CELL_KEYS[side]
+        val = -INF if is_max else INF
+        for move in moves:
+            b, s = move
+            was = make_move(board, winners, move, side)
+            child = minimax(
+                board, winners, next_constraint(board, winners, s), depth-1, not is_max, alpha, beta,
+                bot, opp, evaluator, tt, key ^ keys[b*9 + s], clock, batch, ordering, ply+1,
+            )
+            unmake_move(board, winners, move, was)
+            if is_max:
+                if child > val:
+                    val, best_move = child, move
+                    if val > alpha: alpha = val
+            elif child < val:
+                val, best_move = child, move
+                if val < beta: beta = val
+            if beta <= alpha:
+                if ordering is not None: ordering.cutoff(move, ply, 0 if is_max else 1, depth)
+                break
+
+    if tt_key is not None:
+        if val <= alpha_orig: bound = UPPER
+        elif val >= beta_orig: bound = LOWER
+        else: bound = EXACT
+        tt.store(tt_key, depth, bound, val, best_move)
+    return val
+
+
+def search(board, winners, constraint, bot, opp, evaluator, max_depth, tt=None, budget_ms=None, clock=None, batch=False, ordering=None):
+    """
+    Iterative deepening from the root, up to `max_depth` plies or until
+    `budget_ms` runs out, returning the best move of the deepest completed
+    iteration. With a transposition table, results carry over between
+    iterations (and between moves when the caller reuses the table), and
+    each iteration starts from the previous best move. `ordering` defaults
+    to a fresh MoveOrdering.
+    """
+    moves = valid_moves(board, winners, constraint)
+    if not moves:
+        return None
+
+    # A timeout unwinds the search without undoing its moves, so work on copies
+    board, winners = board[:], winners[:]
+    if clock is None:
+        clock = Deadline(budget_ms)
+    key = hash_cells(board) if tt is not None else 0
+    # Killers and history carry over from one iteration to the next
+    if ordering is None:
+        ordering = MoveOrdering()
+    best_move = moves[0]
+    for depth in range(1, max_depth + 1):
+        clock.armed = depth > 1
+        try:
+            best_move = search_root(board, winners, moves, depth, bot, opp, evaluator, tt, key, clock, batch, ordering)
+        except SearchTimeout:
+            break
+        moves.remove(best_move)
+        moves.insert(0, best_move)
+        if clock.expired():
+            break
+    return best_move
+
+
+def search_root(board, winners, moves, depth, bot, opp, evaluator, tt=None, key=0, clock=None, batch=False, ordering=None):
+    keys = CELL_KEYS[bot]
+    best_move = moves[0]
+    best_val = alpha = -INF
+    for move in moves:
+        b, s = move
+        was = make_move(board, winners, move, bot)
+        val = minimax(
+            board, winners, next_constraint(board, winners, s), depth-1, False, alpha, INF,
+            bot, opp, evaluator, tt, key ^ keys[b*9 + s], clock, batch, ordering, 1,
+        )
+        unmake_move(board, winners, move, was)
+        if val > best_val:
+            best_val, best_move = val, move
+            alpha = best_val
+    return best_move
+
+
+def score_moves(board, winners, moves, player, evaluator, tt=None, budget_ms=None, max_depth=8):
+    """
+    Exact scores (X's point of view) of every move in `moves` for `player`,
+    each searched with a full window, from the deepest iteration completed
+    within `budget_ms`; returns (scores, depth).
+    """
+    board, winners = board[:], winners[:]
+    is_x = (player == 'X')
+    keys = CELL_KEYS[player]
+    key = hash_cells(board)
+    clock = Deadline(budget_ms)
+    ordering = MoveOrdering()
+    order = list(moves)
+    centre_first(order)
+    scores, reached = {}, 0
+
+    for depth in range(1, max_depth + 1):
+        clock.armed = depth > 1
+        current = {}
+        try:
+            for move in order:
+                b, s = move
+                was = make_move(board, winners, move, player)
+                current[move] = minimax(
+                    board, winners, next_constraint(board, winners, s), depth-1, not is_x, -INF, INF,
+                    'X', 'O', evaluator, tt, key ^ keys[b*9 + s], clock, ordering=ordering, ply=1,
+                )
+                unmake_move(board, winners, move, was)
+        except SearchTimeout:
+            break
+        scores, reached = current, depth
+        order.sort(key=scores.get, reverse=is_x)
+        if clock.expired():
+            break
+    return scores, reached
+
+
+def principal_variation(board, winners, first_move, player, tt, max_length, fallback=None):
+    """
+    `first_move` followed by the best replies stored in `tt`, at most
+    `max_length` moves. `fallback(board, constraint, side)` supplies a reply
+    where the table has none (None ends the line).
+    """
+    board, winners = board[:], winners[:]
+    key = hash_cells(board)
+    line = []
+    move, side = first_move, player
+    while move is not None and len(line) < max_length:
+        b, s = move
+        make_move(board, winners, move, side)
+        key ^= CELL_KEYS[side][b*9 + s]
+        line.append(move)
+        if LINE_WINNER[encode(winners)]:
+            break
+        nc = next_constraint(board, winners, s)
+        side = 'O' if side == 'X' else 'X'
+        entry = tt.get(key ^ constraint_key(nc)) if tt is not None else None
+        if entry is not None:
+            move = entry[3]
+        else:
+            move = fallback(board, nc, side) if fallback is not None else None
+        if move not in valid_moves(board, winners, nc):
+            move = None
+    return line
+
+
+class MoveOrdering:
+    __slots__ = ('killers', 'history')
+
+    def __init__(self):
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = ([0] * 81, [0] * 81) # Maximising side, minimising side
+
+    def order(self, moves, ply, side, tt_move=None):
+        """Sorts `moves` in place, best first; `side` is 0 for the maximising side, 1 otherwise."""
+        first, second = self.killers[ply]
+        history = self.history[side]
+
+        def score(move):
+            if move == tt_move:
+                return TT_BONUS
+            if move == first:
+                return KILLER_BONUS + 1
+            if move == second:
+                return KILLER_BONUS
+            idx = move[0] * 9 + move[1]
+            return (history[idx] << 2) + CENTRE[idx]
+
+        moves.sort(key=score, reverse=True)
+
+    def cutoff(self, move, ply, side, depth):
+        """Records that `move` caused a beta cutoff at `ply` with `depth` plies left."""
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[side][move[0] * 9 + move[1]] += depth * depth
+
+
+def centre_first(moves):
+    """The static order, for searches without a MoveOrdering."""
+    moves.sort(key=lambda m: CENTRE[m[0] * 9 + m[1]], reverse=True)
@@ -0,0 +1,123 @@
+"""
+Precomputed 3x3 sub-board tables.
+
+Every 3x3 grid is indexed by its base-3 encoding: cell ``i`` contributes
+``digit * 3**i`` with 0 = empty, 1 = X, 2 = O, giving 3^9 = 19,683 entries.
+The tables are built once at import (well under a second) and shared by the
+rules engine and every bot, so evaluating a sub-board is a single lookup.
+"""
+
+SIZE = 3 ** 9
+POW3 = tuple(3 ** i for i in range(9))
+DIGIT = {None: 0, 'X': 1, 'O': 2}
+
+# The 8 winning lines of a 3x3 grid.
+LINE_CELLS = (
+    (0, 1, 2), (3, 4, 5), (6, 7, 8),
+    (0, 3, 6), (1, 4, 7), (2, 5, 8),
+    (0, 4, 8), (2, 4, 6),
+)
+LINES = tuple(sum(1 << i for i in line) for line in LINE_CELLS)
+
+# BASE3[m]: base-3 value of the 9-bit mask m with every set bit as digit 1.
+# index = BASE3[x_bits] + 2 * BASE3[o_bits]
+BASE3 = tuple(sum(POW3[i] for i in range(9) if m >> i & 1) for m in range(512))
+
+# Static sub-board heuristic weights (same as HardBotLogic.WEIGHTS, divided by
+# 5 for lines inside a sub-board).
+CELL_WEIGHTS = (8, 4, 8, 4, 15, 4, 8, 4, 8)
+TWO_IN_LINE = 30
+ONE_IN_LINE = 5
+
+
+def encode(grid):
+    """Base-3 index of a 9-element grid of 'X' / 'O' / None."""
+    d = DIGIT
+    return (d[grid[0]] + 3 * d[grid[1]] + 9 * d[grid[2]]
+            + 27 * d[grid[3]] + 81 * d[grid[4]] + 243 * d[grid[5]]
+            + 729 * d[grid[6]] + 2187 * d[grid[7]] + 6561 * d[grid[8]])
+
+
+def index_of(x_bits, o_bits):
+    """Base-3 index of a grid given as two 9-bit masks."""
+    return BASE3[x_bits] + 2 * BASE3[o_bits]
+
+
+def decode(index):
+    digits = []
+    for _ in range(9):
+        index, d = divmod(index, 3)
+        digits.append(d)
+    return digits
+
+
+def _line_counts(digits):
+    """Yields (x_count, o_count) for each of the 8 lines."""
+    for line in LINE_CELLS:
+        vals = [digits[i] for i in line]
+        yield vals.count(1), vals.count(2)
+
+
+def build_score_table(cell_weights, two, one):
+    """
+    Builds a 3^9 table of static scores from X's point of view: cell weights for
+    owned cells, plus ``two`` / ``one`` for each line holding two / one of a
+    side's marks and none of the opponent's. Negate the entry for O.
+    """
+    table = [0] * SIZE
+    for index in range(SIZE):
+        digits = decode(index)
+        score = 0
+        for i, d in enumerate(digits):
+            if d == 1: score += cell_weights[i]
+            elif d == 2: score -= cell_weights[i]
+        for x_cnt, o_cnt in _line_counts(digits):
+            if o_cnt == 0:
+                if x_cnt == 2: score += two
+                elif x_cnt == 1: score += one
+            if x_cnt == 0:
+                if o_cnt == 2: score -= two
+                elif o_cnt == 1: score -= one
+        table[index] = score
+    return table
+
+
+def _build():
+    line_winner = [None] * SIZE
+    outcome = [None] * SIZE
+    threats_x = [0] * SIZE
+    threats_o = [0] * SIZE
+    open_x = [0] * SIZE
+    open_o = [0] * SIZE
+
+    for index in range(SIZE):
+        digits = decode(index)
+        winner = None
+        for x_cnt, o_cnt in _line_counts(digits):
+            if x_cnt == 3 and winner is None: winner = 'X'
+            elif o_cnt == 3 and winner is None: winner = 'O'
+            if o_cnt == 0:
+                open_x[index] += 1
+                if x_cnt == 2: threats_x[index] += 1
+            if x_cnt == 0:
+                open_o[index] += 1
+                if o_cnt == 2: threats_o[index] += 1
+
+        line_winner[index] = winner
+        if winner:
+            outcome[index] = winner
+        elif 0 not in digits:
+            outcome[index] = 'D'
+        elif open_x[index] == 0 and open_o[index] == 0:
+            outcome[index] = 'D' # Dead board: nobody can complete a line
+    return line_winner, outcome, threats_x, threats_o, open_x, open_o
+
+
+# LINE_WINNER: 'X' / 'O' / None, completed lines only.
+# OUTCOME: as LINE_WINNER, but full or dead grids are 'D' (the game rules).
+# THREATS_*: lines with two marks of that side and the third cell empty.
+# OPEN_*: lines that side can still complete.
+LINE_WINNER, OUTCOME, THREATS_X, THREATS_O, OPEN_X, OPEN_O = _build()
+
+# SCORE: default static heuristic (HardBotLogic weights) from X's point of view.
+SCORE = build_score_table(CELL_WEIGHTS, TWO_IN_LINE, ONE_IN_LINE)
@@ -0,0 +1,60 @@
+from collections import OrderedDict
+
+# Bound types
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class TranspositionTable:
+    """
+    Bounded map from Zobrist key to ``(depth, bound, value, best_move)``.
+
+    A shallower result never overwrites a deeper one for the same key; when the
+    table is full the oldest entry is dropped.
+    """
+
+    def __init__(self, max_entries=200_000):
+        self.max_entries = max_entries
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def store(self, key, depth, bound, value, best_move):
+        entries = self.entries
+        existing = entries.get(key)
+        if existing is not None:
+            if existing[0] > depth:
+                return
+        elif len(entries) >= self.max_entries:
+            del entries[next(iter(entries))]
+        entries[key] = (depth, bound, value, best_move)
+
+    def clear(self):
+        self.entries.clear()
+
+
+class TableRegistry:
+    """LRU of one TranspositionTable per game, so consecutive moves share a table."""
+
+    def __init__(self, max_games=64, max_entries=200_000):
+        self.max_games = max_games
+        self.max_entries = max_entries
+        self.tables = OrderedDict()
+
+    def get(self, game_id):
+        key = str(game_id)
+        table = self.tables.get(key)
+        if table is None:
+            table = TranspositionTable(self.max_entries)
+            self.tables[key] = table
+            while len(self.tables) > self.max_games:
+                self.tables.popitem(last=False)
+        else:
+            self.tables.move_to_end(key)
+        return table
+
+    def discard(self, game_id):
+        self.tables.pop(str(game_id), None)
@@ -0,0 +1,34 @@
+"""
+Zobrist keys for Ultimate Tic-Tac-Toe positions.
+
+A position key is the XOR of one key per occupied cell and side plus one key
+for the board constraint (index 9 = play anywhere). Callers keep the cell
+part up to date incrementally (``key ^= CELL_KEYS[player][idx]`` on make and
+again on unmake) and mix in the constraint when probing.
+"""
+import random
+
+_rng = random.Random(0x5A17C0DE) # Fixed seed: keys are stable across processes
+
+CELL_KEYS = {
+    'X': tuple(_rng.getrandbits(64) for _ in range(81)),
+    'O': tuple(_rng.getrandbits(64) for _ in range(81)),
+}
+CONSTRAINT_KEYS = tuple(_rng.getrandbits(64) for _ in range(10))
+
+
+def constraint_key(constraint):
+    return CONSTRAINT_KEYS[9 if constraint is None else constraint]
+
+
+def hash_cells(board):
+    """Cell part of the key for an 81-element list of 'X' / 'O' / None."""
+    key = 0
+    for idx, player in enumerate(board):
+        if player is not None:
+            key ^= CELL_KEYS[player][idx]
+    return key
+
+
+def hash_position(board, constraint):
+    return hash_cells(board) ^ constraint_key(constraint)
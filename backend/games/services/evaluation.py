@@ -1,7 +1,35 @@
-from ..models import Game, GameMove
-from .bot.hard import HardBotLogic
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from ..models import Game, GameMove, GameStatus, GameAnalysis
+from .bot.hard import EVALUATOR
+from .engine import endgame
+from .engine import search as core
+from .engine.book import get_book
+from .engine.transposition import TranspositionTable
+from .workers import map_in_pool
 
 class EvaluationService:
+    # Bump whenever a change to the analysis (search, weights, classification)
+    # should invalidate the stored results of finished games
+    ENGINE_VERSION = '4'
+
+    # 'quick': fixed depth-2 search. 'deep': iterative deepening within
+    # ANALYSIS_DEEP_BUDGET_MS per position, with a transposition table shared
+    # by consecutive plies, and a principal variation for every best move.
+    MODES = ('quick', 'deep')
+    DEEP_MAX_DEPTH = 8
+
+    # Solved endgames share the search's win score. Counting plies to mate
+    # from MATE_HORIZON keeps them on the scale the evaluation bar decodes.
+    WIN_SCORE = 100000
+    MATE_HORIZON = 4
+
+    @staticmethod
+    def engine_version(mode='quick'):
+        if mode == 'quick':
+            return EvaluationService.ENGINE_VERSION
+        return f"{EvaluationService.ENGINE_VERSION}-{mode}"
+
     @staticmethod
     def to_notation(cell, subcell):
         global_row = (cell // 3) * 3 + (subcell // 3)
@@ -14,185 +42,404 @@ class EvaluationService:
         return f"{col_char}{row_char}"
 
     @staticmethod
-    def calculate_game_analysis(game_id):
-        # 1. Fetch Game and Moves
+    def get_game_analysis(game_id, mode='quick'):
+        """
+        Analysis of a game. Finished (and aborted) games can no longer change,
+        so their results are stored per engine version and served from the DB;
+        games in progress are analysed on every call.
+        """
         game = Game.objects.get(id=game_id)
-        all_moves = list(GameMove.objects.filter(game=game).order_by('move_no'))
-        
-        analysis_results = []
+        if game.status not in (GameStatus.FINISHED, GameStatus.ABORTED):
+            return EvaluationService.calculate_game_analysis(game.id, mode)
+
+        stored = EvaluationService.get_stored_analysis(game, mode)
+        if stored is not None:
+            return stored
+
+        results = EvaluationService.calculate_game_analysis(game.id, mode)
+        EvaluationService.store_analysis(game, results, mode)
+        return results
+
+    @staticmethod
+    def get_stored_analysis(game, mode='quick'):
+        """Stored results for this engine version and mode, or None."""
+        stored = GameAnalysis.objects.filter(game=game, engine_version=EvaluationService.engine_version(mode)).first()
+        return stored.results if stored is not None else None
+
+    @staticmethod
+    def store_analysis(game, results, mode='quick'):
+        try:
+            with transaction.atomic():
+                GameAnalysis.objects.create(game=game, engine_version=EvaluationService.engine_version(mode), results=results)
+        except IntegrityError:
+            return # A concurrent request stored the same analysis
+        # Results of older engines are never served again
+        current = [EvaluationService.engine_version(m) for m in EvaluationService.MODES]
+        GameAnalysis.objects.filter(game=game).exclude(engine_version__in=current).delete()
+
+    @staticmethod
+    def store_analyses(results_by_game, mode='quick'):
+        """Bulk `store_analysis` for a {game_id: results} dict; analyses already stored are kept."""
+        version = EvaluationService.engine_version(mode)
+        GameAnalysis.objects.bulk_create(
+            [GameAnalysis(game_id=game_id, engine_version=version, results=results) for game_id, results in results_by_game.items()],
+            ignore_conflicts=True,
+        )
+        current = [EvaluationService.engine_version(m) for m in EvaluationService.MODES]
+        GameAnalysis.objects.filter(game_id__in=list(results_by_game)).exclude(engine_version__in=current).delete()
+
+    @staticmethod
+    def calculate_game_analysis(game_id, mode='quick'):
+        moves = GameMove.objects.filter(game_id=game_id).order_by('move_no').values_list('move_no', 'player', 'cell', 'subcell')
+        return list(EvaluationService.iter_game_analysis(list(moves), mode))
+
+    @staticmethod
+    def iter_game_analysis(moves, mode='quick'):
+        """
+        Analyses `moves` (ordered ``(move_no, player, cell, subcell)`` tuples)
+        and yields each move's result in move order as soon as it is ready.
+        Plies are independent, so they are analysed in parallel in the analysis
+        process pool. No DB access.
+        """
+        snapshots = EvaluationService.snapshot_positions(moves)
+        if mode != 'deep':
+            return map_in_pool(analyze_snapshot, snapshots, pool='analysis', chunksize=2)
+
+        # One contiguous run of plies per worker, so each run can share its table
+        runs = max(1, min(settings.ANALYSIS_WORKER_PROCESSES, len(snapshots)))
+        size = -(-len(snapshots) // runs) if snapshots else 1
+        chunks = [(snapshots[i:i + size], settings.ANALYSIS_DEEP_BUDGET_MS) for i in range(0, len(snapshots), size)]
+        results = map_in_pool(analyze_snapshots_deep, chunks, pool='analysis')
+        return (result for chunk in results for result in chunk)
+
+    @staticmethod
+    def snapshot_positions(moves):
+        """
+        Replays the game and returns, for every move, the arguments of
+        `analyze_ply`: copies of the board and winners before the move, the
+        constraint and the move itself.
+        """
+        snapshots = []
         board = [None] * 81
         winners = [None] * 9
         
         # Replay the game to build state at each step
-        for i, move in enumerate(all_moves):
+        for i, (move_no, player, cell, subcell) in enumerate(moves):
             # Determine constraint based on previous move
-            constraint = None
-            if i > 0:
-                prev = all_moves[i-1]
-                target = prev.subcell
-                if winners[target] is not None or all(board[target*9+k] is not None for k in range(9)):
-                    constraint = None
-                else:
-                    constraint = target
-
-            # Calculate Best Move from this position
-            is_x = (move.player == 'X')
-            
-            best_val = -float('inf') if is_x else float('inf')
-            second_best_val = -float('inf') if is_x else float('inf')
-            
-            best_move_coords = None
-            valid_moves = HardBotLogic.get_valid_moves(board, winners, constraint)
-            
-            if len(valid_moves) == 1:
-                best_val = 0
-                classification = "forced"
-                feedback = "Forced move."
-                diff = 0
-                best_move_coords = valid_moves[0]
-                actual_move_score = 0
-                refutation_notation = None
+            constraint = core.next_constraint(board, winners, moves[i-1][3]) if i > 0 else None
+
+            snapshots.append((board[:], winners[:], constraint, move_no, player, cell, subcell))
+            core.make_move(board, winners, (cell, subcell), player)
+        return snapshots
+
+    @staticmethod
+    def classify(is_x, best_val, second_best_val, actual_move_score, best_move_coords):
+        """Returns (classification, feedback, diff) for a move scored against the best one (X's point of view)."""
+        if is_x: diff = best_val - actual_move_score
+        else: diff = actual_move_score - best_val
+        
+        classification = "neutral"
+        feedback = ""
+        
+        is_brilliant = False
+        if diff == 0:
+            margin = 0
+            if is_x: margin = best_val - second_best_val
+            else: margin = second_best_val - best_val
+            if margin > 150: 
+                is_brilliant = True
+        
+        best_notation = EvaluationService.to_notation(best_move_coords[0], best_move_coords[1])
+        
+        if is_brilliant:
+            classification = "brilliant"
+            feedback = "Brilliant move!"
+        elif diff <= 0: 
+            classification = "best"
+            feedback = "Best move."
+        elif diff < 50:
+            classification = "good"
+            feedback = "Good move."
+        elif diff < 200:
+            classification = "inaccuracy"
+            feedback = f"Best move was {best_notation}"
+        elif diff < 1000:
+            classification = "mistake"
+            feedback = f"Best move was {best_notation}"
+        else:
+            classification = "blunder"
+            feedback = f"Best move was {best_notation}"
+
+        return classification, feedback, diff
+
+    @staticmethod
+    def analyze_ply_deep(board, winners, constraint, move_no, player, cell, subcell, tt=None, budget_ms=250):
+        """
+        Deep-mode counterpart of `analyze_ply`: every legal move is scored by
+        iterative deepening until `budget_ms` runs out, and the result carries
+        the principal variation of the best move ('pv') and the depth reached.
+        """
+        tt = tt if tt is not None else TranspositionTable()
+        valid_moves = core.valid_moves(board, winners, constraint)
+        notation = EvaluationService.to_notation(cell, subcell)
+
+        if len(valid_moves) <= 1:
+            return {
+                'move_no': move_no, 'player': player, 'score': 0, 'best_score': 0, 'diff': 0,
+                'classification': "forced", 'feedback': "Forced move.",
+                'best_move': valid_moves[0] if valid_moves else None,
+                'notation': notation, 'refutation': None, 'pv': [], 'depth': 0,
+            }
+
+        # Late positions are solved to the end; book positions were searched
+        # deeper offline than any budget allows here
+        solved = EvaluationService.solved_scores(board, constraint, player)
+        hit = get_book().lookup(board, constraint) if solved is None else None
+        if solved is not None:
+            scores, depth = solved
+        elif hit is not None:
+            depth, scores = hit
+        else:
+            scores, depth = EvaluationService.score_moves(board, winners, valid_moves, player, tt, budget_ms)
+
+        result = EvaluationService.scored_ply(board, winners, scores, tt, move_no, player, cell, subcell, solved=solved is not None)
+        pv = EvaluationService.principal_variation(board, winners, result['best_move'], player, tt, depth)
+        result['pv'] = [EvaluationService.to_notation(*m) for m in pv]
+        result['depth'] = depth
+        return result
+
+    @staticmethod
+    def solved_scores(board, constraint, player):
+        """
+        Exact scores (X's point of view) of every legal move when the endgame
+        solver applies, and the number of plies it looked ahead; else None.
+        A forced win in n plies scores ``WIN_SCORE + MATE_HORIZON - n``.
+        """
+        position = endgame.board_from_cells(board, constraint)
+        solution = endgame.EndgameSolver().solve(position, all_scores=True)
+        if solution is None:
+            return None
+        sign = 1 if player == 'X' else -1
+        scores = {}
+        for move, score in solution.scores.items():
+            result, plies = endgame.outcome(score)
+            value = 0 if result == 'draw' else EvaluationService.WIN_SCORE + EvaluationService.MATE_HORIZON - plies
+            scores[move] = sign * (-value if result == 'loss' else value)
+        return scores, endgame.open_cells(position)
+
+    @staticmethod
+    def scored_ply(board, winners, scores, tt, move_no, player, cell, subcell, solved=False):
+        """
+        Analysis of a move from the X's-view `scores` of every legal move in
+        its position; `solved` scores are exact and name forced wins.
+        """
+        is_x = (player == 'X')
+        ranked = sorted(scores, key=scores.get, reverse=is_x)
+        best_move_coords = ranked[0]
+        best_val, second_best_val = scores[ranked[0]], scores[ranked[1]]
+        actual_move_score = scores.get((cell, subcell), best_val)
+
+        classification, feedback, diff = EvaluationService.classify(is_x, best_val, second_best_val, actual_move_score, best_move_coords)
+        mate = EvaluationService.mate_in(best_val if is_x else -best_val) if solved else None
+        if mate is not None:
+            if actual_move_score == best_val:
+                feedback += f"\nForced win in {mate}."
+            elif EvaluationService.mate_in(actual_move_score if is_x else -actual_move_score) is not None:
+                feedback += f"\nStill winning, but there was a forced win in {mate}."
             else:
-                 valid_moves.sort(key=lambda m: (0 if m[1]==4 else 1, 0 if m[0]==4 else 1))
-                 alpha = -float('inf')
-                 beta = float('inf')
-                 actual_move_score = None
-                 
-                 for b, s in valid_moves:
-                    is_actual_move = (b == move.cell and s == move.subcell)
-                    board[b*9+s] = move.player
-                    was = winners[b]
-                    winners[b] = HardBotLogic.check_line_local_array(board[b*9 : (b+1)*9])
-                    nc = s if winners[s] is None and not all(board[s*9+k] is not None for k in range(9)) else None
-                    val = HardBotLogic.minimax(board, winners, nc, depth=2, is_max=not is_x, alpha=alpha, beta=beta, bot='X', opp='O')
-                    
-                    board[b*9+s] = None
-                    winners[b] = was
-                    
-                    if is_actual_move:
-                        actual_move_score = val
-                    
-                    if is_x:
-                        if val > best_val:
-                             second_best_val = best_val
-                             best_val = val
-                             best_move_coords = (b, s)
-                        elif val > second_best_val:
-                             second_best_val = val
-                        alpha = max(alpha, best_val)
-                    else:
-                        if val < best_val:
-                             second_best_val = best_val
-                             best_val = val
-                             best_move_coords = (b, s)
-                        elif val < second_best_val:
-                             second_best_val = val
-                        beta = min(beta, best_val)
-                 
-                 if actual_move_score is None: actual_move_score = best_val
-
-                 if is_x: diff = best_val - actual_move_score
-                 else: diff = actual_move_score - best_val
-                 
-                 classification = "neutral"
-                 feedback = ""
-                 refutation_notation = None
-                 
-                 is_brilliant = False
-                 if diff == 0:
-                     margin = 0
-                     if is_x: margin = best_val - second_best_val
-                     else: margin = second_best_val - best_val
-                     if margin > 150: 
-                        is_brilliant = True
-                 
-                 best_notation = EvaluationService.to_notation(best_move_coords[0], best_move_coords[1])
-                 
-                 if is_brilliant:
-                    classification = "brilliant"
-                    feedback = "Brilliant move!"
-                 elif diff <= 0: 
-                    classification = "best"
-                    feedback = "Best move."
-                 elif diff < 50:
-                    classification = "good"
-                    feedback = "Good move."
-                 elif diff < 200:
-                    classification = "inaccuracy"
-                    feedback = f"Best move was {best_notation}"
-                 elif diff < 1000:
-                    classification = "mistake"
-                    feedback = f"Best move was {best_notation}"
+                feedback += f"\nMissed a forced win in {mate}."
+
+        refutation_notation = None
+        if classification in ['mistake', 'blunder']:
+            line = EvaluationService.principal_variation(board, winners, (cell, subcell), player, tt, 2)
+            if len(line) > 1:
+                refutation_notation = EvaluationService.to_notation(*line[1])
+                reason = EvaluationService.describe_reply(board, winners, (cell, subcell), player, line[1])
+                feedback += f"\nOpponent plays {refutation_notation} ({reason})."
+
+        return {
+            'move_no': move_no,
+            'player': player,
+            'score': actual_move_score,
+            'best_score': best_val,
+            'diff': diff,
+            'classification': classification,
+            'feedback': feedback,
+            'best_move': best_move_coords,
+            'notation': EvaluationService.to_notation(cell, subcell),
+            'refutation': refutation_notation,
+        }
+
+    @staticmethod
+    def score_moves(board, winners, valid_moves, player, tt, budget_ms):
+        """
+        Exact scores (X's point of view) of every move for `player`, from the
+        deepest iteration completed within `budget_ms`; returns (scores, depth).
+        Forced wins are on the solved scale, whatever the depth reached.
+        """
+        scores, depth = core.score_moves(board, winners, valid_moves, player, EVALUATOR, tt, budget_ms, EvaluationService.DEEP_MAX_DEPTH)
+        return {move: EvaluationService.mate_score(score, depth) for move, score in scores.items()}, depth
+
+    @staticmethod
+    def mate_score(score, depth):
+        """
+        A `depth`-ply search scores a win n plies away as ``WIN_SCORE + depth - n``;
+        moves it to ``WIN_SCORE + MATE_HORIZON - n``, as `solved_scores` does.
+        """
+        if abs(score) < EvaluationService.WIN_SCORE:
+            return score
+        plies = depth - (abs(score) - EvaluationService.WIN_SCORE)
+        value = EvaluationService.WIN_SCORE + EvaluationService.MATE_HORIZON - plies
+        return value if score > 0 else -value
+
+    @staticmethod
+    def mate_in(score):
+        """Moves to a forced win behind a solved score for the side it favours, else None."""
+        plies = EvaluationService.WIN_SCORE + EvaluationService.MATE_HORIZON - score
+        if score <= 0 or plies < 1:
+            return None
+        return (plies + 1) // 2
+
+    @staticmethod
+    def principal_variation(board, winners, first_move, player, tt, max_length):
+        """
+        `first_move` followed by the best replies stored in `tt` (or the
+        opening book), at most `max_length` moves.
+        """
+        return core.principal_variation(board, winners, first_move, player, tt, max_length, fallback=get_book().best_move)
+
+    @staticmethod
+    def describe_reply(board, winners, move, player, reply):
+        board, winners = board[:], winners[:]
+        core.make_move(board, winners, move, player)
+        core.make_move(board, winners, reply, 'O' if player == 'X' else 'X')
+        if core.sub_winner(winners): return "allows forced win"
+        if winners[reply[0]]: return "allows opponent to win sub-board"
+        return "allows positional advantage"
+
+    @staticmethod
+    def best_static_reply(board, winners, move, player):
+        """The opponent's reply to `move` that the static evaluation likes best, or None."""
+        board, winners = board[:], winners[:]
+        core.make_move(board, winners, move, player)
+        opp = 'O' if player == 'X' else 'X'
+        best, best_val = None, None
+        for reply in core.valid_moves(board, winners, core.next_constraint(board, winners, move[1])):
+            was = core.make_move(board, winners, reply, opp)
+            # X's point of view: the opponent wants it high when playing X
+            val = EVALUATOR.evaluate(board, winners, 'X', 'O')
+            core.unmake_move(board, winners, reply, was)
+            if best is None or (val > best_val if opp == 'X' else val < best_val):
+                best, best_val = reply, val
+        return best
+
+    @staticmethod
+    def analyze_ply(board, winners, constraint, move_no, player, cell, subcell):
+        """Analyses one move played from the given position; `board` and `winners` are left as they were."""
+        # Calculate Best Move from this position
+        is_x = (player == 'X')
+        
+        best_val = -float('inf') if is_x else float('inf')
+        second_best_val = -float('inf') if is_x else float('inf')
+        
+        best_move_coords = None
+        valid_moves = core.valid_moves(board, winners, constraint)
+
+        solved = EvaluationService.solved_scores(board, constraint, player) if len(valid_moves) > 1 else None
+        if solved is not None:
+            return EvaluationService.scored_ply(board, winners, solved[0], None, move_no, player, cell, subcell, solved=True)
+
+        hit = get_book().lookup(board, constraint) if len(valid_moves) > 1 else None
+        if hit is not None:
+            return EvaluationService.scored_ply(board, winners, hit[1], None, move_no, player, cell, subcell)
+        
+        if len(valid_moves) == 1:
+            best_val = 0
+            classification = "forced"
+            feedback = "Forced move."
+            diff = 0
+            best_move_coords = valid_moves[0]
+            actual_move_score = 0
+            refutation_notation = None
+        else:
+             core.centre_first(valid_moves)
+             alpha = -float('inf')
+             beta = float('inf')
+             actual_move_score = None
+             
+             for move in valid_moves:
+                was = core.make_move(board, winners, move, player)
+                nc = core.next_constraint(board, winners, move[1])
+                val = core.minimax(board, winners, nc, 2, not is_x, alpha, beta, 'X', 'O', EVALUATOR)
+                core.unmake_move(board, winners, move, was)
+                
+                if move == (cell, subcell):
+                    actual_move_score = val
+                
+                if is_x:
+                    if val > best_val:
+                         second_best_val = best_val
+                         best_val = val
+                         best_move_coords = move
+                    elif val > second_best_val:
+                         second_best_val = val
+                    alpha = max(alpha, best_val)
+                else:
+                    if val < best_val:
+                         second_best_val = best_val
+                         best_val = val
+                         best_move_coords = move
+                    elif val < second_best_val:
+                         second_best_val = val
+                    beta = min(beta, best_val)
+             
+             if actual_move_score is None: actual_move_score = best_val
+
+             classification, feedback, diff = EvaluationService.classify(is_x, best_val, second_best_val, actual_move_score, best_move_coords)
+             refutation_notation = None
+
+             if classification in ['mistake', 'blunder']:
+                 reply = EvaluationService.best_static_reply(board, winners, (cell, subcell), player)
+                 if reply:
+                     refutation_notation = EvaluationService.to_notation(*reply)
+                     reason = EvaluationService.describe_reply(board, winners, (cell, subcell), player, reply)
+                     feedback += f"\nOpponent plays {refutation_notation} ({reason})."
                  else:
-                    classification = "blunder"
-                    feedback = f"Best move was {best_notation}"
-
-                 if classification in ['mistake', 'blunder']:
-                     board[move.cell*9 + move.subcell] = move.player
-                     was_w = winners[move.cell]
-                     winners[move.cell] = HardBotLogic.check_line_local_array(board[move.cell*9 : (move.cell+1)*9])
-                     next_constraint = move.subcell if winners[move.subcell] is None and not all(board[move.subcell*9+k] is not None for k in range(9)) else None
-                     
-                     opp_moves = HardBotLogic.get_valid_moves(board, winners, next_constraint)
-                     if opp_moves:
-                         opp_val = -float('inf') if not is_x else float('inf')
-                         opp_best = None
-                         for ob, os in opp_moves:
-                             board[ob*9+os] = 'O' if is_x else 'X'
-                             ww = winners[ob]
-                             winners[ob] = HardBotLogic.check_line_local_array(board[ob*9 : (ob+1)*9])
-                             current_val = HardBotLogic.evaluate(board, winners, 'X', 'O') 
-                             board[ob*9+os] = None
-                             winners[ob] = ww
-                             
-                             if not is_x: 
-                                 if current_val > opp_val:
-                                     opp_val = current_val
-                                     opp_best = (ob, os)
-                             else: 
-                                 if current_val < opp_val:
-                                     opp_val = current_val
-                                     opp_best = (ob, os)
-                         
-                         if opp_best:
-                             ref_not = EvaluationService.to_notation(opp_best[0], opp_best[1])
-                             refutation_notation = ref_not
-                             ob, os = opp_best
-                             board[ob*9+os] = 'O' if is_x else 'X'
-                             ww = winners[ob]
-                             winners[ob] = HardBotLogic.check_line_local_array(board[ob*9 : (ob+1)*9])
-                             global_win = HardBotLogic.check_line_local_array(winners)
-                             sub_win = winners[ob]
-                             board[ob*9+os] = None
-                             winners[ob] = ww
-                             
-                             reason = ""
-                             if global_win: reason = "allows forced win"
-                             elif sub_win: reason = "allows opponent to win sub-board"
-                             else: reason = "allows positional advantage"
-                             feedback += f"\nOpponent plays {ref_not} ({reason})."
-                         else:
-                             feedback += " (No clear refutation found)."
-                     else:
-                         feedback += " (No opponent moves found?)"
-                     
-                     winners[move.cell] = was_w
-                     board[move.cell*9 + move.subcell] = None
-
-            analysis_results.append({
-                'move_no': move.move_no,
-                'player': move.player,
-                'score': actual_move_score if classification != "forced" else 0,
-                'best_score': best_val if classification != "forced" else 0,
-                'diff': diff,
-                'classification': classification,
-                'feedback': feedback,
-                'best_move': best_move_coords,
-                'notation': EvaluationService.to_notation(move.cell, move.subcell),
-                'refutation': refutation_notation
-            })
-            
-            board[move.cell*9 + move.subcell] = move.player
-            winners[move.cell] = HardBotLogic.check_line_local_array(board[move.cell*9 : (move.cell+1)*9])
-            
-        return analysis_results
+                     feedback += " (No opponent moves found?)"
+
+        return {
+            'move_no': move_no,
+            'player': player,
+            'score': actual_move_score if classification != "forced" else 0,
+            'best_score': best_val if classification != "forced" else 0,
+            'diff': diff,
+            'classification': classification,
+            'feedback': feedback,
+            'best_move': best_move_coords,
+            'notation': EvaluationService.to_notation(cell, subcell),
+            'refutation': refutation_notation
+        }
+
+
+def analyze_snapshot(snapshot):
+    # Module-level so the analysis pool can pickle it
+    return EvaluationService.analyze_ply(*snapshot)
+
+
+def analyze_snapshots_deep(chunk):
+    # Consecutive plies overlap heavily, so they share one table
+    snapshots, budget_ms = chunk
+    tt = TranspositionTable()
+    return [EvaluationService.analyze_ply_deep(*snapshot, tt=tt, budget_ms=budget_ms) for snapshot in snapshots]
+
+
+def analyze_game(task):
+    """
+    Analyses a whole game in the calling process, for callers that already
+    spread games over their own pool: ``(game_id, moves, mode)`` -> ``(game_id, results)``.
+    """
+    game_id, moves, mode = task
+    snapshots = EvaluationService.snapshot_positions(moves)
+    if mode == 'deep':
+        return game_id, analyze_snapshots_deep((snapshots, settings.ANALYSIS_DEEP_BUDGET_MS))
+    return game_id, [analyze_snapshot(snapshot) for snapshot in snapshots]
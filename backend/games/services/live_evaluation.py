@@ -0,0 +1,99 @@
+"""
+Live evaluation for the evaluation bar during play.
+
+After each move only the new position is scored, by iterative deepening
+within LIVE_EVAL_BUDGET_MS. Every game keeps one transposition table between
+its moves, so most of the previous move's search carries over and a live eval
+costs one short search per move instead of a whole-game analysis. Searches
+run in the engine process pool; each worker keeps its own tables.
+
+The move itself is broadcast first and never waits for its evaluation, which
+may queue behind bot searches in the pool: `broadcast_after` follows up with a
+separate `live_evaluation` message once the score is in.
+"""
+
+from django.conf import settings
+from ..state_cache import GameStateCache
+from .bot.hard import EVALUATOR
+from .engine import search as core
+from .engine.deadline import Deadline, SearchTimeout
+from .engine.transposition import TableRegistry
+from .engine.zobrist import hash_cells
+from .workers import run_in_engine_pool
+
+MAX_DEPTH = 10
+
+# Always searched from X's point of view, so kept apart from the bots' tables
+TABLES = TableRegistry(max_games=256, max_entries=100_000)
+
+
+def score_position(game_id, cells, constraint, budget_ms):
+    """
+    Score of an 81-cell position from X's point of view (the scale of the game
+    analysis) and the depth it was searched to. Picklable and DB-free.
+    """
+    # A timeout unwinds the search without undoing its moves, so work on a copy
+    board = list(cells)
+    winners = core.winners_of(board)
+    x_to_move = sum(c is not None for c in board) % 2 == 0
+    tt = TABLES.get(game_id)
+    key = hash_cells(board)
+    clock = Deadline(budget_ms)
+    ordering = core.MoveOrdering()
+    score, reached = 0, 0
+    for depth in range(1, MAX_DEPTH + 1):
+        clock.armed = depth > 1
+        try:
+            score = core.minimax(board, winners, constraint, depth, x_to_move, -core.INF, core.INF, 'X', 'O', EVALUATOR, tt, key, clock, ordering=ordering)
+        except SearchTimeout:
+            break
+        reached = depth
+        if clock.expired():
+            break
+    return score, reached
+
+
+class LiveEvaluationService:
+    @staticmethod
+    async def evaluate_move(game_id, move, board=None):
+        """
+        `{'score', 'depth'}` for the position right after `move`, or None when
+        live evaluation is off, the game is over or the position is no longer
+        at hand. `board` defaults to the game's cached board.
+        """
+        budget_ms = settings.LIVE_EVAL_BUDGET_MS
+        if budget_ms <= 0:
+            return None
+        if board is None:
+            entry = GameStateCache.get(game_id)
+            if entry is None:
+                return None
+            board = entry.board
+        if board.move_count != move.move_no or board.winner() is not None:
+            return None
+        cells, constraint = board.to_list(), board.next_board_constraint()
+        # The cached board may have moved on while we copied it
+        if board.move_count != move.move_no:
+            return None
+
+        try:
+            score, depth = await run_in_engine_pool(score_position, str(game_id), cells, constraint, budget_ms)
+        except Exception as e:
+            # The move itself is what matters; the bar just skips a beat
+            print(f"Live evaluation failed for game {game_id}: {e}")
+            return None
+        return {'score': score, 'depth': depth}
+
+    @staticmethod
+    async def broadcast_after(game_id, move, channel_layer, group_name, board=None):
+        """Sends the evaluation of `move` to the game group; run as a task after its new_move."""
+        evaluation = await LiveEvaluationService.evaluate_move(game_id, move, board)
+        if evaluation is None:
+            return
+        await channel_layer.group_send(
+            group_name,
+            {
+                'type': 'game_update',
+                'data': {'type': 'live_evaluation', 'move_no': move.move_no, 'eval': evaluation},
+            }
+        )
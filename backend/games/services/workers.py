@@ -0,0 +1,72 @@
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+
+# Pool name -> setting holding its worker count
+POOLS = {
+    'engine': 'ENGINE_WORKER_PROCESSES',
+    'analysis': 'ANALYSIS_WORKER_PROCESSES',
+}
+
+_executors = {}
+_lock = threading.Lock()
+
+
+def init_worker():
+    # Engine entry points import the bot modules, which import the models
+    import django
+    django.setup()
+
+
+def get_executor(pool='engine'):
+    """Shared process pool for CPU-bound engine work, or None when disabled."""
+    workers = getattr(settings, POOLS[pool], 0)
+    if workers <= 0:
+        return None
+    with _lock:
+        if pool not in _executors:
+            _executors[pool] = ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+        return _executors[pool]
+
+
+def reset_executor(pool='engine'):
+    with _lock:
+        executor = _executors.pop(pool, None)
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def map_in_pool(fn, items, pool='analysis', chunksize=1):
+    """
+    Lazily yields `fn(item)` for each item, in order, computed in the named
+    process pool (in this process when the pool is disabled). A broken pool
+    is reset before the error propagates, so the next call starts a fresh one.
+    """
+    executor = get_executor(pool)
+    if executor is None:
+        yield from map(fn, items)
+        return
+    try:
+        yield from executor.map(fn, items, chunksize=chunksize)
+    except BrokenProcessPool:
+        reset_executor(pool)
+        raise
+
+
+async def run_in_engine_pool(fn, *args):
+    """
+    Runs a picklable, DB-free `fn(*args)` in the engine process pool and awaits
+    the result without blocking the event loop. Falls back to a thread when the
+    pool is disabled, and restarts the pool once if a worker died.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    if executor is None:
+        return await loop.run_in_executor(None, fn, *args)
+    try:
+        return await loop.run_in_executor(executor, fn, *args)
+    except BrokenProcessPool:
+        reset_executor()
+        return await loop.run_in_executor(get_executor(), fn, *args)
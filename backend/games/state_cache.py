@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict
+from .models import Game, GameStatus
+from .logic import GameLogic
+
+
+class CachedGame:
+    __slots__ = ('game', 'board')
+
+    def __init__(self, game, board):
+        self.game = game
+        self.board = board
+
+
+class GameStateCache:
+    """
+    Process-local, LRU-evicted cache of live game state keyed by game id.
+
+    Each entry holds the Game row and its UltimateBoard (turn, constraint and
+    sub-board winners), updated in place whenever a move commits, so a hot game
+    validates a move with zero reads. Only active games are cached: before that
+    the players may still change. Other processes' moves reach us through the
+    game group broadcast (see `observe_move`); anything that still slips past
+    shows up as a move_no collision on insert and forces a rebuild.
+    """
+    MAX_GAMES = 1024
+
+    _entries = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, game_id):
+        key = str(game_id)
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry is not None:
+                cls._entries.move_to_end(key)
+            return entry
+
+    @classmethod
+    def load(cls, game_id):
+        """Returns the cached entry, rebuilding it from Game and GameMove on a miss."""
+        entry = cls.get(game_id)
+        if entry is not None:
+            return entry
+        return cls.rebuild(game_id)
+
+    @classmethod
+    def rebuild(cls, game_id):
+        game = Game.objects.get(id=game_id)
+        entry = CachedGame(game, GameLogic.load_board(game.id))
+        if game.status == GameStatus.ACTIVE:
+            cls.put(game_id, entry)
+        else:
+            cls.invalidate(game_id)
+        return entry
+
+    @classmethod
+    def put(cls, game_id, entry):
+        key = str(game_id)
+        with cls._lock:
+            cls._entries[key] = entry
+            cls._entries.move_to_end(key)
+            while len(cls._entries) > cls.MAX_GAMES:
+                cls._entries.popitem(last=False)
+
+    @classmethod
+    def invalidate(cls, game_id):
+        with cls._lock:
+            cls._entries.pop(str(game_id), None)
+
+    @classmethod
+    def record_move(cls, game_id, move):
+        """Applies a move committed by this process to the cached board, if any."""
+        cls.observe_move(game_id, move.move_no, move.player, move.cell, move.subcell)
+
+    @classmethod
+    def observe_move(cls, game_id, move_no, player, cell, subcell):
+        entry = cls.get(game_id)
+        if entry is None:
+            return
+        with cls._lock:
+            board = entry.board
+            if move_no <= board.move_count:
+                return # Already applied
+            if move_no != board.move_count + 1:
+                cls._entries.pop(str(game_id), None) # We missed a move
+                return
+            board.play(cell, subcell, player)
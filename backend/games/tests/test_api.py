@@ -1,7 +1,16 @@
+import base64
+import json
+from datetime import timedelta
 import pytest
+from asgiref.sync import async_to_sync
 from django.urls import reverse
 from rest_framework import status
-from games.models import Game
+from games import move_encoding
+from games.consumers import GameConsumer
+from games.logic import GameLogic
+from games.models import ChatMessage, Game, GameMove, GameAnalysis
+from games.services.evaluation import EvaluationService
+from users.models import AvatarConfig
 
 @pytest.mark.django_db
 class TestGamesAPI:
@@ -45,6 +54,166 @@ class TestGamesAPI:
         assert response.status_code == status.HTTP_200_OK
         assert response.data['id'] == str(game.id)
 
+    def test_game_detail_answers_conditional_gets(self, auth_client):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        client, user = auth_client
+        game = Game.objects.create(player_x=user, mode="local", status="active")
+        board = GameLogic.load_board(game.id)
+        GameLogic.save_move(game, board, 'X', 4, 4)
+        url = reverse('game_detail', kwargs={'pk': game.id})
+
+        response = client.get(url)
+        etag = response['ETag']
+        assert response['Cache-Control'] == 'private, no-cache'
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url, HTTP_IF_NONE_MATCH=f'W/{etag}')
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag
+        assert not any('games_gamemove' in q['sql'] or 'games_chatmessage' in q['sql'] for q in ctx.captured_queries)
+        assert client.get(url, {'moves': 'packed'}, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
+
+        def finish():
+            game.status = 'finished'
+            game.save(update_fields=['status'])
+
+        # Moves, chat and saves (status changes, results) each change the ETag
+        etags = {etag}
+        for change in (
+            lambda: GameLogic.save_move(game, board, 'O', 4, 0),
+            lambda: ChatMessage.objects.create(game=game, sender=user, content="gg"),
+            finish,
+            lambda: Game.objects.get(id=game.id).save(),
+        ):
+            change()
+            response = client.get(url, HTTP_IF_NONE_MATCH=', '.join(etags))
+            assert response.status_code == status.HTTP_200_OK
+            etags.add(response['ETag'])
+        assert len(etags) == 5
+        assert isinstance(game.version, int)
+
+        # Names and avatars are read from the players' rows
+        user.username = "renamed"
+        user.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=', '.join(etags))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['player_x_name'] == "renamed (X)"
+        etags.add(response['ETag'])
+        profile = user.player_profile
+        AvatarConfig.objects.update_or_create(player_profile=profile, defaults={f: 'Changed' for f in (
+            'top_type', 'accessories_type', 'hair_color', 'facial_hair_type', 'clothe_type',
+            'eye_type', 'eyebrow_type', 'mouth_type', 'skin_color',
+        )})
+        assert client.get(url, HTTP_IF_NONE_MATCH=', '.join(etags)).status_code == status.HTTP_200_OK
+
+    def test_settled_finished_games_are_cached(self, auth_client):
+        from django.utils import timezone
+        client, user = auth_client
+        game = Game.objects.create(player_x=user, mode="local", status="finished", winner="X", finished_at=timezone.now())
+        url = reverse('game_detail', kwargs={'pk': game.id})
+        assert client.get(url)['Cache-Control'] == 'private, no-cache'
+
+        Game.objects.filter(id=game.id).update(finished_at=timezone.now() - timedelta(hours=1))
+        assert client.get(url)['Cache-Control'] == 'private, max-age=600'
+        assert client.get(reverse('game_detail', kwargs={'pk': '00000000-0000-0000-0000-000000000000'})).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_game_list_runs_constant_queries(self, auth_client, create_user):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        client, user = auth_client
+        opponent = create_user(username="opponent", email="o@example.com", avatar_config={'topType': 'Hat'})
+        url = reverse('user_game_list')
+
+        def list_games(page_size):
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get(url, {'page_size': page_size})
+            assert response.status_code == status.HTTP_200_OK
+            return response.data['results'], len(ctx.captured_queries)
+
+        for i in range(3):
+            Game.objects.create(player_x=user, player_o=opponent, mode="unranked", status="finished", winner='X')
+        Game.objects.create(player_x=user, mode="bot_hard", status="active")
+        few, few_queries = list_games(2)
+        many, many_queries = list_games(10)
+        assert len(few) == 2 and len(many) == 4
+        assert many_queries == few_queries
+
+        played = next(g for g in many if g['player_o_name'] == "opponent")
+        assert played['player_o_avatar']['topType'] == 'Hat'
+        assert played['player_x_avatar'] == {}
+        assert 'moves' not in played and 'chat_messages' not in played
+
+    def test_game_list_walks_history_by_cursor(self, auth_client, create_user):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.utils import timezone
+        client, user = auth_client
+        opponent = create_user(username="opponent", email="o@example.com")
+        now = timezone.now()
+        games = []
+        for i in range(9):
+            x, o = (user, opponent) if i % 2 else (opponent, user)
+            games.append(Game.objects.create(player_x=x, player_o=o, mode="unranked"))
+        Game.objects.create(player_x=opponent, mode="local") # Not the user's
+        # Pairs of games share a timestamp, so ids break the ties
+        for i, game in enumerate(games):
+            Game.objects.filter(id=game.id).update(created_at=now - timedelta(minutes=i // 2))
+
+        seen, url, queries = [], reverse('user_game_list') + '?page_size=4', []
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert 'count' not in response.data
+            seen += [g['id'] for g in response.data['results']]
+            queries.append([q['sql'] for q in ctx.captured_queries])
+            url = response.data['next']
+
+        expected = Game.objects.filter(id__in=[g.id for g in games]).order_by('-created_at', '-id')
+        assert seen == [str(g.id) for g in expected]
+        assert len(queries) == 3 and len({len(q) for q in queries}) == 1
+        assert not any('COUNT(' in sql or 'OFFSET' in sql for page in queries for sql in page)
+
+        assert client.get(reverse('user_game_list'), {'cursor': 'not-a-cursor'}).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_game_detail_packs_moves_on_request(self, auth_client):
+        client, user = auth_client
+        game = Game.objects.create(player_x=user, mode="local", status="active")
+        board = GameLogic.load_board(game.id)
+        for cell, subcell in ((4, 4), (4, 0), (0, 8), (8, 4)):
+            GameLogic.save_move(game, board, board.current_turn(), cell, subcell)
+        url = reverse('game_detail', kwargs={'pk': game.id})
+
+        plain = client.get(url).data
+        packed = client.get(url, {'moves': 'packed'}).data
+        assert packed['moves']['encoding'] == 'packed'
+        assert base64.b64decode(packed['moves']['indexes']) == bytes([40, 36, 8, 76])
+        assert len(json.dumps(packed['moves'])) * 3 < len(json.dumps(plain['moves']))
+
+        unpacked = move_encoding.unpack_moves(packed['moves'], game.created_at)
+        for move, original in zip(unpacked, GameMove.objects.filter(game=game)):
+            assert (move['move_no'], move['player'], move['cell'], move['subcell']) == (original.move_no, original.player, original.cell, original.subcell)
+            assert abs((move['created_at'] - original.created_at).total_seconds()) < 0.001
+
+    def test_socket_packs_new_moves_for_opted_in_clients(self, auth_client):
+        client, user = auth_client
+        game = Game.objects.create(player_x=user, mode="local", status="active")
+        move = {'player': 'X', 'cell': 4, 'subcell': 4, 'move_no': 1, 'created_at': (game.created_at + timedelta(seconds=2)).isoformat()}
+        event = {'type': 'game_update', 'data': {'type': 'new_move', 'move': move}}
+
+        sent = []
+
+        async def send(text_data):
+            sent.append(json.loads(text_data))
+
+        for packed in (False, True):
+            consumer = GameConsumer()
+            consumer.game_id, consumer.game, consumer.packed_moves = str(game.id), game, packed
+            consumer.send = send
+            async_to_sync(consumer.game_update)(event)
+        assert sent[0]['move'] == move
+        assert sent[1] == {'type': 'new_move', 'move': [1, 40, 2000]}
+
     def test_game_evaluation_api(self, auth_client):
         client, user = auth_client
         # Create a finished game to have evaluation
@@ -56,3 +225,82 @@ class TestGamesAPI:
         # Note: If evaluation is not yet computed, it might return empty or 200 with default data
         # We just check the endpoint is accessible
         assert response.status_code == status.HTTP_200_OK
+
+    def test_finished_game_analysis_is_stored(self, auth_client, monkeypatch):
+        client, user = auth_client
+        game = Game.objects.create(player_x=user, mode="local", status="finished")
+        for i, (player, cell, subcell) in enumerate([('X', 4, 4), ('O', 4, 0), ('X', 0, 4)]):
+            GameMove.objects.create(game=game, move_no=i, player=player, cell=cell, subcell=subcell)
+        url = reverse('game_evaluation', kwargs={'pk': game.id})
+
+        first = client.get(url)
+        assert first.status_code == status.HTTP_200_OK
+        assert len(first.data) == 3
+        assert GameAnalysis.objects.filter(game=game, engine_version=EvaluationService.ENGINE_VERSION).exists()
+
+        # Served from storage from now on
+        monkeypatch.setattr(EvaluationService, 'calculate_game_analysis', staticmethod(lambda game_id, mode='quick': 1 / 0))
+        second = client.get(url)
+        assert second.json() == first.json()
+
+        # A new engine version recomputes and drops the old results
+        monkeypatch.setattr(EvaluationService, 'calculate_game_analysis', staticmethod(lambda game_id, mode='quick': []))
+        monkeypatch.setattr(EvaluationService, 'ENGINE_VERSION', 'next')
+        assert client.get(url).data == []
+        assert list(GameAnalysis.objects.filter(game=game).values_list('engine_version', flat=True)) == ['next']
+
+    def test_deep_analysis_is_stored_separately(self, auth_client, settings):
+        settings.ANALYSIS_DEEP_BUDGET_MS = 50
+        client, user = auth_client
+        game = Game.objects.create(player_x=user, mode="local", status="finished")
+        for i, (player, cell, subcell) in enumerate([('X', 4, 4), ('O', 4, 0), ('X', 0, 4)]):
+            GameMove.objects.create(game=game, move_no=i, player=player, cell=cell, subcell=subcell)
+        url = reverse('game_evaluation', kwargs={'pk': game.id})
+
+        assert client.get(url, {'mode': 'fast'}).status_code == status.HTTP_400_BAD_REQUEST
+        quick = client.get(url).data
+        deep = client.get(url, {'mode': 'deep'}).data
+        assert 'pv' not in quick[0]
+        assert deep[0]['pv'][0] == EvaluationService.to_notation(*deep[0]['best_move'])
+        assert set(GameAnalysis.objects.filter(game=game).values_list('engine_version', flat=True)) == {
+            EvaluationService.engine_version('quick'), EvaluationService.engine_version('deep'),
+        }
+
+    def test_analysis_job_streams_progress(self, auth_client, monkeypatch):
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+        from games.services import analysis_jobs
+
+        class InlineExecutor:
+            def submit(self, fn, *args):
+                fn(*args)
+
+        monkeypatch.setattr(analysis_jobs.AnalysisJobService, '_executor', InlineExecutor())
+        monkeypatch.setattr(analysis_jobs, 'close_old_connections', lambda: None)
+
+        client, user = auth_client
+        game = Game.objects.create(player_x=user, mode="local", status="finished")
+        for i, (player, cell, subcell) in enumerate([('X', 4, 4), ('O', 4, 0), ('X', 0, 4)]):
+            GameMove.objects.create(game=game, move_no=i, player=player, cell=cell, subcell=subcell)
+
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(f'game_{game.id}', channel)
+
+        url = reverse('game_evaluation_jobs', kwargs={'pk': game.id})
+        response = client.post(url)
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['total'] == 3
+
+        events = [async_to_sync(layer.receive)(channel)['data'] for _ in range(4)]
+        assert [e['type'] for e in events] == ['analysis_progress'] * 3 + ['analysis_complete']
+        assert [e['move']['move_no'] for e in events[:3]] == [0, 1, 2]
+
+        job_url = reverse('game_evaluation_job', kwargs={'pk': game.id, 'job_id': response.data['job_id']})
+        job = client.get(job_url).data
+        assert job['status'] == 'done' and len(job['results']) == 3
+
+        # The finished game's analysis was stored, so the next request needs no job
+        again = client.post(url)
+        assert again.status_code == status.HTTP_200_OK
+        assert len(again.data['results']) == 3
@@ -0,0 +1,91 @@
+import pytest
+from games.logic import GameLogic
+from games.models import GameMove
+from games.services.engine import UltimateBoard, tables
+
+
+class TestUltimateBoard:
+    def test_turn_and_constraint(self):
+        board = UltimateBoard()
+        assert board.current_turn() == 'X'
+        assert board.next_board_constraint() is None
+
+        board.play(0, 5)
+        assert board.current_turn() == 'O'
+        assert board.next_board_constraint() == 5
+        assert board.cell_owner(0, 5) == 'X'
+
+    def test_validate_move_messages(self):
+        board = UltimateBoard.from_moves([('X', 0, 5)])
+        with pytest.raises(ValueError, match="Not your turn"):
+            board.validate_move('X', 5, 0)
+        with pytest.raises(ValueError, match="Must play in subboard 5"):
+            board.validate_move('O', 0, 0)
+        board.validate_move('O', 5, 0)
+
+    def test_subboard_win_lifts_constraint(self):
+        board = UltimateBoard.from_moves([('X', 0, 0), ('X', 0, 1), ('X', 0, 2), ('O', 4, 0)])
+        assert board.subboard_winner(0) == 'X'
+        assert board.next_board_constraint() is None
+
+    def test_dead_subboard_is_draw(self):
+        # Neither side can complete a line in sub-board 0 any more.
+        moves = [('X', 0, 0), ('O', 0, 1), ('X', 0, 2), ('O', 0, 4), ('X', 0, 3), ('O', 0, 5), ('X', 0, 7), ('O', 0, 6)]
+        board = UltimateBoard.from_moves(moves)
+        assert board.subboard_winner(0) == 'D'
+        assert board.is_subboard_full(0) is False
+
+    def test_global_win(self):
+        moves = [('X', b, s) for b in range(3) for s in range(3)]
+        board = UltimateBoard.from_moves(moves)
+        assert board.winner() == 'X'
+
+    def test_undo_restores_state(self):
+        board = UltimateBoard.from_moves([('X', 0, 0), ('X', 0, 1)])
+        legal = board.legal_moves()
+        board.play(0, 2, 'X')
+        assert board.subboard_winner(0) == 'X'
+        board.undo()
+        assert board.subboard_winner(0) is None
+        assert board.legal_moves() == legal
+
+
+@pytest.mark.django_db
+class TestLoadBoard:
+    def test_load_board_single_query(self, game, django_assert_num_queries):
+        GameMove.objects.create(game=game, player='X', cell=0, subcell=5, move_no=1)
+        GameMove.objects.create(game=game, player='O', cell=5, subcell=0, move_no=2)
+
+        with django_assert_num_queries(1):
+            board = GameLogic.load_board(game.id)
+            GameLogic.validate_move(game, 'X', 0, 1, board=board)
+
+        assert board.move_count == 2
+        assert board.next_board_constraint() == 0
+
+
+class TestSubboardTables:
+    def test_encoding_round_trip(self):
+        grid = ['X', None, 'O', None, 'X', None, 'O', None, None]
+        index = tables.encode(grid)
+        x_bits = sum(1 << i for i, v in enumerate(grid) if v == 'X')
+        o_bits = sum(1 << i for i, v in enumerate(grid) if v == 'O')
+        assert index == tables.index_of(x_bits, o_bits)
+        assert tables.decode(index) == [tables.DIGIT[v] for v in grid]
+
+    def test_outcome_and_threats(self):
+        # X threatens the diagonal, O threatens the bottom row.
+        grid = ['X', None, None, None, 'X', None, 'O', 'O', None]
+        index = tables.encode(grid)
+        assert tables.LINE_WINNER[index] is None
+        assert tables.OUTCOME[index] is None
+        assert tables.THREATS_X[index] == 1
+        assert tables.THREATS_O[index] == 1
+
+        grid[8] = 'X'
+        assert tables.OUTCOME[tables.encode(grid)] == 'X'
+
+    def test_score_is_antisymmetric(self):
+        grid = ['X', 'X', None, None, 'O', None, None, None, None]
+        mirrored = [{'X': 'O', 'O': 'X'}.get(v) for v in grid]
+        assert tables.SCORE[tables.encode(grid)] == -tables.SCORE[tables.encode(mirrored)]
@@ -1,8 +1,16 @@
+import random
 import pytest
 from games.models import Game, GameMove
 from games.services.bot.easy import EasyBotLogic
 from games.services.bot.medium import MediumBotLogic
+from games.services.bot import hard, arena
 from games.services.bot.hard import HardBotLogic
+from games.services.engine.transposition import TranspositionTable, EXACT
+from games.services.engine.deadline import Deadline
+from games.services.engine.search import MoveOrdering, centre_first
+from games.services.bot.worker import BotSnapshot, compute_bot_move, snapshot_from_state
+from games.services.engine import UltimateBoard, mcts, batch, book, endgame, search
+from games.bot_config import get_search_config, DEFAULT_SEARCH_CONFIG
 
 @pytest.mark.django_db
 class TestBotLogic:
@@ -38,6 +46,15 @@ class TestBotLogic:
         assert move.cell == 0
         assert move.subcell == 2 # EasyBot should defend and block opponent's win
 
+    def test_easy_bot_reads_the_board_once(self, game, django_assert_num_queries):
+        GameMove.objects.create(game=game, move_no=0, player='X', cell=0, subcell=0)
+        GameMove.objects.create(game=game, move_no=1, player='O', cell=0, subcell=4)
+        GameMove.objects.create(game=game, move_no=2, player='X', cell=4, subcell=0)
+
+        with django_assert_num_queries(1):
+            move = EasyBotLogic.calculate_move(game, 'O')
+        assert move[0] == 0
+
     def test_medium_bot_valid_move(self, create_user):
         user = create_user()
         game = Game.objects.create(player_x=user, mode='bot_medium', status='active')
@@ -61,3 +78,372 @@ class TestBotLogic:
         assert move is not None
         assert move.player == 'O'
         assert GameMove.objects.filter(game=game, player='O').count() == 1
+
+
+class TestTranspositionTable:
+    def test_keeps_deeper_entries_and_evicts_oldest(self):
+        tt = TranspositionTable(max_entries=2)
+        tt.store(1, 3, EXACT, 10, (0, 0))
+        tt.store(1, 1, EXACT, 99, (1, 1))
+        assert tt.get(1) == (3, EXACT, 10, (0, 0))
+
+        tt.store(2, 1, EXACT, 0, None)
+        tt.store(3, 1, EXACT, 0, None)
+        assert tt.get(1) is None
+        assert len(tt) == 2
+
+    def test_hard_search_same_move_with_table(self):
+        board = [None] * 81
+        winners = [None] * 9
+        for idx, player in ((40, 'X'), (36, 'O'), (4, 'X'), (44, 'O')):
+            board[idx] = player
+        plain = HardBotLogic.search(board[:], winners[:], 8, 'X', 'O', max_depth=3)
+        tt = TranspositionTable()
+        cached = HardBotLogic.search(board[:], winners[:], 8, 'X', 'O', max_depth=3, tt=tt)
+        assert cached == plain
+        assert len(tt) > 0
+
+
+class TestTimeBudgetedSearch:
+    def test_hard_search_stops_at_deadline(self):
+        board = [None] * 81
+        winners = [None] * 9
+        clock = Deadline(50)
+        move = HardBotLogic.search(board, winners, None, 'X', 'O', max_depth=20, clock=clock)
+        assert move in HardBotLogic.get_valid_moves(board, winners, None)
+        assert clock.elapsed_ms() < 1000
+        assert board == [None] * 81 # Caller's board is left untouched
+
+    def test_medium_search_stops_at_deadline(self):
+        board = [None] * 81
+        winners = [None] * 9
+        board[40] = 'X'
+        clock = Deadline(20)
+        move = MediumBotLogic.search(board, winners, 4, 'O', max_depth=4, clock=clock)
+        assert move[0] == 4
+        assert clock.elapsed_ms() < 1000
+
+
+class TestSearchCore:
+    def test_bots_share_move_generation(self):
+        board = [None] * 81
+        for s in (0, 1, 2):
+            board[s] = 'X' # Sub-board 0 is won but not full
+        board[9 * 3] = 'O'
+        winners = search.winners_of(board)
+        assert winners[0] == 'X'
+        # Sent to the won sub-board: any open sub-board, never the won one
+        moves = search.valid_moves(board, winners, 0)
+        assert moves == MediumBotLogic.get_valid_moves(board, winners, 0) == HardBotLogic.get_valid_moves(board, winners, None)
+        assert len(moves) == 8 * 9 - 1 and all(b != 0 for b, _ in moves)
+
+    def test_make_and_unmake_restore_the_position(self):
+        rng = random.Random(5)
+        board = UltimateBoard()
+        for _ in range(30):
+            cells = board.to_list()
+            winners = search.winners_of(cells)
+            for move in board.legal_moves():
+                before = (cells[:], winners[:])
+                was = search.make_move(cells, winners, move, board.current_turn())
+                assert winners == search.winners_of(cells)
+                search.unmake_move(cells, winners, move, was)
+                assert (cells, winners) == before
+            board.play(*rng.choice(board.legal_moves()))
+
+    def test_search_config_defaults(self):
+        assert get_search_config('bot_hard')['time_budget_ms'] is not None
+        assert get_search_config('unknown') == DEFAULT_SEARCH_CONFIG
+
+
+class TestBotWorker:
+    def test_snapshot_round_trip(self, create_user):
+        user = create_user()
+        game = Game.objects.create(player_x=user, mode='bot_hard', status='active')
+        board = UltimateBoard.from_moves([('X', 4, 4)])
+        snapshot = snapshot_from_state(game, board, 'O')
+        assert snapshot.cells[40] == 'X' and snapshot.cells.count('.') == 80
+        assert snapshot.constraint == 4
+
+    @pytest.mark.parametrize('mode', ['bot_easy', 'bot_medium', 'bot_hard', 'bot_expert', 'bot_custom'])
+    def test_compute_bot_move_is_legal(self, mode):
+        board = UltimateBoard.from_moves([('X', 4, 4)])
+        cells = ''.join(c or '.' for c in board.to_list())
+        snapshot = BotSnapshot('g', mode, 0, cells, 4, 'O', (4, 4))
+        assert compute_bot_move(snapshot) in board.legal_moves()
+
+
+@pytest.mark.django_db
+class TestBotService:
+    def test_concurrent_bot_turns_store_one_move(self, create_user, settings, monkeypatch):
+        import asyncio
+        from asgiref.sync import async_to_sync
+        from games.logic import GameLogic
+        from games.services.bot import manager
+        from games.state_cache import GameStateCache
+        settings.ENGINE_WORKER_PROCESSES = 0
+        settings.LIVE_EVAL_BUDGET_MS = 0
+
+        async def no_wait(seconds):
+            pass
+
+        class Layer:
+            async def group_send(self, group, message):
+                pass
+
+        monkeypatch.setattr(manager.asyncio, 'sleep', no_wait)
+        GameStateCache._entries.clear()
+        game = Game.objects.create(player_x=create_user(), mode='bot_medium', status='active')
+        GameLogic.save_move(game, GameLogic.load_board(game.id), 'X', 4, 4)
+
+        # Two sockets for the same game each start a bot turn
+        async def both():
+            await asyncio.gather(*(manager.BotService.process_bot_move(game.id, Layer(), f'game_{game.id}') for _ in range(2)))
+        async_to_sync(both)()
+        GameStateCache._entries.clear()
+
+        assert list(GameMove.objects.filter(game=game).values_list('move_no', 'player')) == [(1, 'X'), (2, 'O')]
+
+
+class TestMCTS:
+    def test_playout_reaches_a_result(self):
+        assert mcts.playout(UltimateBoard(), random.Random(1)) in ('X', 'O', 'D')
+
+    def test_finds_the_winning_move(self):
+        # X owns sub-boards 0 and 1 and two cells of sub-board 2, and must play in 2
+        moves = [('X', 0, 0), ('X', 0, 1), ('X', 0, 2), ('X', 1, 0), ('X', 1, 1), ('X', 1, 2), ('X', 2, 0), ('X', 2, 1)]
+        moves += [('O', 3, s) for s in (0, 1, 3)] + [('O', 4, s) for s in (0, 1, 3)] + [('O', 5, 0), ('O', 5, 1)]
+        cells = [None] * 81
+        for player, cell, subcell in moves:
+            cells[cell * 9 + subcell] = player
+        board = UltimateBoard.from_cells(cells, last_move=(5, 2))
+        assert board.current_turn() == 'X' and board.winners[:2] == ['X', 'X']
+        assert mcts.search(board, playouts=300) == (2, 2)
+
+    def test_reuses_the_subtree_between_moves(self):
+        board = UltimateBoard()
+        move = mcts.search(board, playouts=400, game_id='reuse')
+        child = next(c for c in mcts.TREES.trees['reuse'].root.children if c.move == move)
+        reply = max(child.children, key=lambda c: c.visits)
+        board.play(*move)
+        board.play(*reply.move)
+        tree = mcts.TREES.get('reuse', UltimateBoard.from_cells(board.to_list(), board.last_move))
+        assert tree.root.visits > 0
+        assert mcts.search(board, playouts=50, game_id='reuse') in board.legal_moves()
+        mcts.TREES.discard('reuse')
+
+
+class TestBatchEvaluator:
+    def positions(self):
+        rng = random.Random(7)
+        for _ in range(20):
+            board = UltimateBoard()
+            for _ in range(rng.randint(0, 40)):
+                if board.winner():
+                    break
+                board.play(*rng.choice(board.legal_moves()))
+            yield board.to_list()
+
+    def test_matches_hard_evaluate(self):
+        for cells in self.positions():
+            winners = [HardBotLogic.check_line_local_array(cells[i*9:(i+1)*9]) for i in range(9)]
+            if HardBotLogic.check_line_local_array(winners):
+                continue
+            for bot, opp in (('X', 'O'), ('O', 'X')):
+                expected = HardBotLogic.evaluate(cells, winners, bot, opp)
+                assert hard.BATCH.score_for(batch.to_array(cells)[None], bot)[0] == pytest.approx(expected)
+
+    def test_batched_search_picks_the_same_move(self):
+        for cells in list(self.positions())[:5]:
+            winners = [HardBotLogic.check_line_local_array(cells[i*9:(i+1)*9]) for i in range(9)]
+            plain = HardBotLogic.search(cells, winners, None, 'X', 'O', max_depth=2)
+            batched = HardBotLogic.search(cells, winners, None, 'X', 'O', max_depth=2, batch=True)
+            assert plain == batched
+
+
+class TestArena:
+    def test_plays_a_full_game_without_the_database(self):
+        game = arena.play_game(1, 'custom:100', 'medium', budget_ms=20, seed=3)
+        assert game['a_side'] == 'O'
+        assert game['result'] in ('X', 'O', 'D')
+        assert game['stats']['a']['times'] and game['stats']['b']['nodes'] > 0
+
+    def test_summary_and_elo(self):
+        games = [
+            {'a_side': 'X', 'result': 'X', 'stats': {'a': {'times': [10.0], 'nodes': 100}, 'b': {'times': [20.0], 'nodes': 50}}},
+            {'a_side': 'O', 'result': 'D', 'stats': {'a': {'times': [30.0], 'nodes': 300}, 'b': {'times': [20.0], 'nodes': 50}}},
+            {'a_side': 'X', 'result': '!X', 'stats': {'a': {'times': [10.0], 'nodes': 100}, 'b': {'times': [], 'nodes': 0}}},
+        ]
+        report = arena.summarize(games)
+        assert (report['wins'], report['draws'], report['losses'], report['illegal']) == (1, 1, 1, 1)
+        assert report['elo'] == pytest.approx(0.0)
+        assert report['elo_low'] < 0 < report['elo_high']
+        assert report['engines']['a']['p95_ms'] == 30.0
+        assert report['engines']['a']['nodes_per_sec'] == pytest.approx(500 / 0.05)
+        assert arena.elo_difference(0.75) == pytest.approx(190.85, abs=0.01)
+
+    def test_command_needs_at_least_one_game(self):
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        with pytest.raises(CommandError, match="--games"):
+            call_command('bot_arena', 'easy', 'medium', '--games=0')
+
+
+class TestOpeningBook:
+    def position(self):
+        board = UltimateBoard.from_moves([('X', 4, 0), ('O', 0, 1)])
+        return board.to_list(), board.next_board_constraint()
+
+    def test_symmetries_are_the_eight_grid_symmetries(self):
+        assert len(set(book.SYMMETRIES)) == 8
+        for p, inverse in zip(book.SYMMETRIES, book.INVERSES):
+            assert [inverse[p[i]] for i in range(9)] == list(range(9))
+            # Lines map onto lines
+            lines = {frozenset(line) for line in ((0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6))}
+            assert {frozenset(p[i] for i in line) for line in lines} == lines
+
+    def test_round_trip_and_symmetric_lookup(self, tmp_path):
+        cells, constraint = self.position()
+        scores = {(1, s): 10 * s for s in range(9)}
+        opening = book.OpeningBook()
+        opening.add(cells, constraint, 7, scores)
+        opening.save(tmp_path / 'book.bin')
+        loaded = book.OpeningBook.load(tmp_path / 'book.bin')
+        assert loaded.lookup(cells, constraint) == (7, scores)
+
+        # The mirrored position finds the same entry, with mirrored moves
+        p = book.SYMMETRIES[4]
+        depth, mirrored = loaded.lookup(book.transform(cells, p), p[constraint])
+        assert mirrored == {(p[b], p[s]): score for (b, s), score in scores.items()}
+        assert loaded.best_move(book.transform(cells, p), p[constraint], 'O') == (p[1], p[0])
+
+    def test_bots_play_book_moves(self, monkeypatch):
+        cells, constraint = self.position()
+        opening = book.OpeningBook()
+        opening.add(cells, constraint, 7, {(1, s): 500 if s == 5 else 0 for s in range(9)})
+        monkeypatch.setattr(book, '_book', opening)
+        # Scores are from X's side, and X is to move
+        assert HardBotLogic.choose_move(cells, constraint, 'X') == (1, 5)
+        assert MediumBotLogic.choose_move(cells, constraint, 'X') == (1, 5)
+        # Out of book, the bots search as before
+        assert HardBotLogic.choose_move([None] * 81, None, 'X', game_id=None) is not None
+
+
+def late_position(seed, empties):
+    rng = random.Random(seed)
+    while True:
+        board = UltimateBoard()
+        while board.winner() is None and endgame.open_cells(board) > empties:
+            board.play(*rng.choice(board.legal_moves()))
+        if board.winner() is None:
+            return board
+
+
+def exhaustive(board):
+    """Solver score of `board` by plain minimax over the rules board."""
+    result = board.winner()
+    if result is not None:
+        return 0 if result == 'D' else -endgame.MATE
+    best = -endgame.MATE - 1
+    for move in board.legal_moves():
+        board.play(*move)
+        value = -exhaustive(board)
+        board.undo()
+        best = max(best, value - 1 if value > 0 else value + 1 if value < 0 else 0)
+    return best
+
+
+class TestEndgameSolver:
+    def test_matches_exhaustive_search(self):
+        for seed in range(15):
+            board = late_position(seed, 8)
+            solution = endgame.EndgameSolver().solve(board, all_scores=True)
+            assert solution.score == exhaustive(board)
+            assert solution.scores[solution.move] == solution.score
+            for move, score in solution.scores.items():
+                board.play(*move)
+                value = -exhaustive(board)
+                board.undo()
+                assert score == (value - 1 if value > 0 else value + 1 if value < 0 else 0)
+
+    def test_wide_or_unbounded_positions_are_left_to_the_search(self):
+        assert endgame.EndgameSolver().solve(UltimateBoard()) is None
+        board = late_position(3, endgame.MAX_EMPTY)
+        assert endgame.EndgameSolver(max_nodes=1).solve(board) is None
+
+    def test_solver_stops_at_its_deadline(self, monkeypatch):
+        import time
+        monkeypatch.setattr(Deadline, 'CHECK_EVERY', 1)
+        board = late_position(3, endgame.MAX_EMPTY)
+        clock = Deadline(1)
+        time.sleep(0.002)
+        assert endgame.best_move(board, clock=clock) is None
+        assert endgame.best_move(board, clock=Deadline(60_000)) == endgame.best_move(board)
+        # A share of an unbounded budget is unbounded
+        assert Deadline().share(0.5).expires_at is None
+
+    def test_hard_bot_plays_the_solved_move(self):
+        board = next(b for b in (late_position(seed, 10) for seed in range(20)) if endgame.EndgameSolver().solve(b).score > 0)
+        solution = endgame.EndgameSolver().solve(board, all_scores=True)
+        move = HardBotLogic.choose_move(board.to_list(), board.next_board_constraint(), board.current_turn())
+        # Any move that wins just as fast will do
+        assert solution.scores[move] == solution.score
+
+
+class TestMoveOrdering:
+    def test_order_prefers_table_move_then_killers_then_history(self):
+        ordering = MoveOrdering()
+        moves = [(0, 0), (0, 1), (0, 4), (4, 4), (2, 2)]
+        ordering.cutoff((0, 1), 3, 0, 2)
+        ordering.cutoff((2, 2), 3, 0, 2)
+        ordering.history[0][0] = 100 # (0, 0) has the best history
+        ordering.order(moves, 3, 0, tt_move=(4, 4))
+        assert moves == [(4, 4), (2, 2), (0, 1), (0, 0), (0, 4)]
+        # Another ply and side fall back to the centre order
+        moves = [(0, 0), (0, 4), (4, 4)]
+        ordering.order(moves, 5, 1)
+        assert moves == [(4, 4), (0, 4), (0, 0)]
+
+    def test_ordering_keeps_values_and_saves_nodes(self):
+        rng = random.Random(3)
+        board = UltimateBoard()
+        for _ in range(14):
+            board.play(*rng.choice(board.legal_moves()))
+        cells, constraint = board.to_list(), board.next_board_constraint()
+        winners = [MediumBotLogic.check_line_local_array(cells[i*9:(i+1)*9]) for i in range(9)]
+        side = board.current_turn()
+        opp = 'O' if side == 'X' else 'X'
+
+        values = [
+            [MediumBotLogic.minimax(cells, winners, constraint, depth, True, -float('inf'), float('inf'), side, opp, Deadline(), ordering) for depth in range(1, 5)]
+            for ordering in (None, MoveOrdering())
+        ]
+        assert values[0] == values[1]
+
+    def test_ordering_saves_nodes_over_the_static_order(self):
+        class StaticOrdering(MoveOrdering):
+            def order(self, moves, ply, side, tt_move=None):
+                centre_first(moves)
+                if tt_move in moves:
+                    moves.remove(tt_move)
+                    moves.insert(0, tt_move)
+
+            def cutoff(self, move, ply, side, depth):
+                pass
+
+        nodes = {StaticOrdering: 0, MoveOrdering: 0}
+        for seed in range(6):
+            rng = random.Random(seed)
+            board = UltimateBoard()
+            for _ in range(14):
+                board.play(*rng.choice(board.legal_moves()))
+            cells = board.to_list()
+            side = board.current_turn()
+            for kind in nodes:
+                clock = Deadline()
+                search.search(
+                    cells, search.winners_of(cells), board.next_board_constraint(), side, 'O' if side == 'X' else 'X',
+                    hard.EVALUATOR, 5, tt=TranspositionTable(), clock=clock, ordering=kind(),
+                )
+                nodes[kind] += clock.nodes
+        assert nodes[MoveOrdering] < nodes[StaticOrdering]
@@ -0,0 +1,214 @@
+import json
+import random
+import time
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from games.models import Game, GameMove, GameAnalysis
+from games.services import live_evaluation, workers
+from games.services.engine.transposition import TranspositionTable
+from games.services.evaluation import EvaluationService
+from games.services.live_evaluation import LiveEvaluationService
+from games.services.engine import UltimateBoard, book, search
+
+
+def random_game(seed, length=30):
+    rng = random.Random(seed)
+    board = UltimateBoard()
+    moves = []
+    while not board.winner() and len(moves) < length:
+        cell, subcell = rng.choice(board.legal_moves())
+        moves.append((len(moves), board.current_turn(), cell, subcell))
+        board.play(cell, subcell)
+    return moves
+
+
+class TestParallelAnalysis:
+    def test_snapshots_are_independent_positions(self):
+        moves = random_game(1)
+        snapshots = EvaluationService.snapshot_positions(moves)
+        assert len(snapshots) == len(moves)
+        assert snapshots[0][0] == [None] * 81
+        # Each snapshot holds the board before its own move
+        assert sum(c is not None for c in snapshots[10][0]) == 10
+
+    def test_pool_results_match_serial_in_move_order(self):
+        moves = random_game(2)
+        with override_settings(ANALYSIS_WORKER_PROCESSES=0):
+            serial = list(EvaluationService.iter_game_analysis(moves))
+        with override_settings(ANALYSIS_WORKER_PROCESSES=2):
+            parallel = list(EvaluationService.iter_game_analysis(moves))
+        workers.reset_executor('analysis')
+        assert [r['move_no'] for r in parallel] == [m[0] for m in moves]
+        assert parallel == serial
+
+
+class TestDeepAnalysis:
+    def test_deep_ply_has_legal_principal_variation(self):
+        moves = random_game(3, length=12)
+        board = UltimateBoard.from_moves(m[1:] for m in moves)
+        snapshot = EvaluationService.snapshot_positions(moves + [(12, board.current_turn(), *board.legal_moves()[0])])[-1]
+
+        result = EvaluationService.analyze_ply_deep(*snapshot, budget_ms=100)
+        assert result['depth'] >= 1
+        assert result['pv'][0] == EvaluationService.to_notation(*result['best_move'])
+        for notation in result['pv']:
+            move = next(m for m in board.legal_moves() if EvaluationService.to_notation(*m) == notation)
+            board.play(*move)
+
+    def test_deep_ply_respects_budget(self):
+        snapshot = EvaluationService.snapshot_positions(random_game(4, length=6))[-1]
+        started = time.perf_counter()
+        EvaluationService.analyze_ply_deep(*snapshot, tt=TranspositionTable(), budget_ms=100)
+        assert time.perf_counter() - started < 1.0
+
+    def test_deep_game_analysis_keeps_move_order(self, settings):
+        settings.ANALYSIS_DEEP_BUDGET_MS = 20
+        settings.ANALYSIS_WORKER_PROCESSES = 0
+        moves = random_game(5, length=10)
+        results = list(EvaluationService.iter_game_analysis(moves, 'deep'))
+        assert [r['move_no'] for r in results] == [m[0] for m in moves]
+        assert all('pv' in r for r in results)
+
+
+@pytest.mark.django_db
+class TestAnalyzeGamesCommand:
+    def make_games(self, players, count):
+        games = []
+        for seed in range(count):
+            game = Game.objects.create(player_x=players[0], player_o=players[1], mode='local', status='finished', finished_at=timezone.now())
+            GameMove.objects.bulk_create([
+                GameMove(game=game, move_no=no, player=player, cell=cell, subcell=subcell)
+                for no, player, cell, subcell in random_game(seed, length=8)
+            ])
+            games.append(game)
+        return games
+
+    def test_stores_analysis_and_resumes_from_checkpoint(self, players, tmp_path):
+        games = self.make_games(players, 3)
+        Game.objects.create(player_x=players[0], mode='local', status='active')
+        checkpoint = tmp_path / 'checkpoint.json'
+
+        call_command('analyze_games', '--workers=1', '--chunk-size=2', '--limit=2', f'--checkpoint={checkpoint}', stdout=StringIO())
+        assert GameAnalysis.objects.count() == 2
+        assert json.loads(checkpoint.read_text())['totals']['games'] == 2
+
+        out = StringIO()
+        call_command('analyze_games', '--workers=1', f'--checkpoint={checkpoint}', stdout=out)
+        assert 'Analysed 3 games (24 moves' in out.getvalue()
+        stored = GameAnalysis.objects.get(game=games[2], engine_version=EvaluationService.ENGINE_VERSION)
+        assert stored.results == json.loads(json.dumps(EvaluationService.calculate_game_analysis(games[2].id)))
+
+    def test_since_filters_by_finish_time(self, players):
+        old, = self.make_games(players, 1)
+        Game.objects.filter(id=old.id).update(finished_at=timezone.now() - timedelta(days=30))
+        self.make_games(players, 1)
+
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        call_command('analyze_games', '--workers=1', f'--since={since}', stdout=StringIO())
+        assert not GameAnalysis.objects.filter(game=old).exists()
+        assert GameAnalysis.objects.count() == 1
+
+
+    def test_game_mode_filter(self, players):
+        local, ranked = self.make_games(players, 2)
+        Game.objects.filter(id=ranked.id).update(mode='ranked', rated=True)
+
+        call_command('analyze_games', '--workers=1', '--game-mode=ranked', stdout=StringIO())
+        assert list(GameAnalysis.objects.values_list('game_id', flat=True)) == [ranked.id]
+
+
+class TestLiveEvaluation:
+    def test_score_position_keeps_the_game_table(self):
+        board = UltimateBoard.from_moves(m[1:] for m in random_game(6, length=10))
+        live_evaluation.TABLES.discard('live-test')
+        score, depth = live_evaluation.score_position('live-test', board.to_list(), board.next_board_constraint(), 50)
+        assert depth >= 1
+        assert len(live_evaluation.TABLES.get('live-test')) > 0
+
+    def test_evaluate_move_scores_only_the_current_position(self, settings):
+        settings.ENGINE_WORKER_PROCESSES = 0
+        settings.LIVE_EVAL_BUDGET_MS = 20
+        board = UltimateBoard.from_moves(m[1:] for m in random_game(7, length=6))
+        evaluate = async_to_sync(LiveEvaluationService.evaluate_move)
+
+        result = evaluate('live-test', SimpleNamespace(move_no=6), board)
+        assert set(result) == {'score', 'depth'}
+        # A board that has moved on is not scored for an older move
+        assert evaluate('live-test', SimpleNamespace(move_no=5), board) is None
+
+        settings.LIVE_EVAL_BUDGET_MS = 0
+        assert evaluate('live-test', SimpleNamespace(move_no=6), board) is None
+
+    def test_evaluation_follows_the_move_in_its_own_message(self, settings):
+        settings.ENGINE_WORKER_PROCESSES = 0
+        settings.LIVE_EVAL_BUDGET_MS = 20
+        board = UltimateBoard.from_moves(m[1:] for m in random_game(7, length=6))
+        sent = []
+
+        class Layer:
+            async def group_send(self, group, message):
+                sent.append((group, message))
+
+        broadcast = async_to_sync(LiveEvaluationService.broadcast_after)
+        broadcast('live-test', SimpleNamespace(move_no=6), Layer(), 'game_live-test', board)
+        broadcast('live-test', SimpleNamespace(move_no=5), Layer(), 'game_live-test', board)
+        assert len(sent) == 1
+        group, message = sent[0]
+        assert group == 'game_live-test'
+        assert message['data']['type'] == 'live_evaluation'
+        assert message['data']['move_no'] == 6
+        assert set(message['data']['eval']) == {'score', 'depth'}
+
+
+class TestBookAnalysis:
+    def test_book_positions_are_not_searched(self, monkeypatch):
+        opening = book.OpeningBook()
+        opening.add([None] * 81, None, 9, {(b, s): 50 if (b, s) == (4, 4) else 0 for b in range(9) for s in range(9)})
+        monkeypatch.setattr(book, '_book', opening)
+        monkeypatch.setattr(search, 'minimax', lambda *args, **kwargs: 1 / 0)
+
+        quick = EvaluationService.analyze_ply([None] * 81, [None] * 9, None, 0, 'X', 0, 0)
+        assert (quick['best_move'], quick['best_score'], quick['score']) == ((4, 4), 50, 0)
+        deep = EvaluationService.analyze_ply_deep([None] * 81, [None] * 9, None, 0, 'X', 0, 0)
+        assert deep['depth'] == 9
+        assert deep['pv'] == ['e5']
+
+
+class TestSolvedAnalysis:
+    def test_late_positions_name_forced_wins(self):
+        for seed in range(10):
+            moves = random_game(seed, length=81)
+            results = [EvaluationService.analyze_ply(*snapshot) for snapshot in EvaluationService.snapshot_positions(moves)]
+            winning = [r for r in results if r['classification'] != 'forced' and 'Forced win in 1.' in r['feedback']]
+            if winning:
+                break
+        # The move that ends the game is a solved win in one
+        last = winning[-1]
+        assert last['move_no'] == moves[-1][0]
+        sign = 1 if last['player'] == 'X' else -1
+        assert sign * last['score'] == EvaluationService.WIN_SCORE + EvaluationService.MATE_HORIZON - 1
+
+    def test_deep_search_wins_share_the_solved_scale(self):
+        checked = 0
+        for seed in range(10):
+            for board, winners, constraint, _, player, _, _ in EvaluationService.snapshot_positions(random_game(seed, length=81))[-6:]:
+                solved = EvaluationService.solved_scores(board, constraint, player)
+                moves = search.valid_moves(board, winners, constraint)
+                if solved is None or len(moves) < 2:
+                    continue
+                best = (max if player == 'X' else min)(solved[0].values())
+                if EvaluationService.mate_in(abs(best)) is None:
+                    continue
+                scores, depth = EvaluationService.score_moves(board, winners, moves, player, TranspositionTable(), 1000)
+                plies = EvaluationService.WIN_SCORE + EvaluationService.MATE_HORIZON - abs(best)
+                if depth >= plies:
+                    # Found at depth 8 or 4 alike, a win in n plies scores the same
+                    assert (max if player == 'X' else min)(scores.values()) == best
+                    checked += 1
+        assert checked > 0
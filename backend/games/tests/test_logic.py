@@ -1,4 +1,7 @@
+import importlib
+import random
 import pytest
+from django.db import IntegrityError
 from games.logic import GameLogic
 from games.models import Game, GameMove
 from users.models import User
@@ -70,3 +73,73 @@ class TestGameLogicWin:
 
         winner = GameLogic.check_global_winner(small_winners)
         assert winner == 'X'
+
+
+@pytest.mark.django_db
+class TestBoardStateColumns:
+    def test_save_move_keeps_the_row_in_step(self, game):
+        board = GameLogic.load_board(game.id)
+        for cell, subcell in ((4, 0), (0, 4), (4, 1), (1, 4), (4, 2)):
+            move = GameLogic.save_move(game, board, board.current_turn(), cell, subcell)
+
+        row = Game.objects.get(id=game.id)
+        assert (row.move_count, row.current_turn, row.next_board_constraint) == (5, 'O', 2)
+        assert row.subboard_winners == '....X....'
+        assert row.last_move_at == move.created_at
+        assert game.move_count == 5 and board.move_count == 5
+
+    def test_stale_board_is_rejected_and_left_as_it_was(self, game):
+        stale = GameLogic.load_board(game.id)
+        GameLogic.save_move(game, GameLogic.load_board(game.id), 'X', 4, 4)
+        with pytest.raises(IntegrityError):
+            GameLogic.save_move(game, stale, 'X', 0, 0)
+        assert stale.move_count == 0
+        assert Game.objects.get(id=game.id).move_count == 1
+
+    def test_game_results_leave_the_board_columns_alone(self, game):
+        from users.services import LevelingService
+        stale = Game.objects.get(id=game.id)
+        GameLogic.save_move(game, GameLogic.load_board(game.id), 'X', 4, 4)
+        # XP is written from a copy loaded before the move
+        LevelingService.process_game_end(stale)
+
+        row = Game.objects.get(id=game.id)
+        assert (row.move_count, row.current_turn, row.next_board_constraint) == (1, 'O', 4)
+        assert row.player_x_xp_gained is not None
+
+    def test_migration_backfills_existing_games(self, game):
+        from django.apps import apps
+        backfill = importlib.import_module('games.migrations.0022_game_board_state').backfill_board_state
+
+        for move_no, (cell, subcell) in enumerate(((4, 0), (0, 4), (4, 1), (1, 4), (4, 2), (2, 3))):
+            GameMove.objects.create(game=game, move_no=move_no + 1, player='XO'[move_no % 2], cell=cell, subcell=subcell)
+        backfill(apps, None)
+
+        row = Game.objects.get(id=game.id)
+        assert (row.move_count, row.current_turn, row.next_board_constraint) == (6, 'X', 3)
+        assert row.subboard_winners == '....X....'
+        assert row.last_move_at == GameMove.objects.get(game=game, move_no=6).created_at
+        assert row.winner is None
+
+    def test_migration_replay_matches_the_engine(self, players):
+        from django.apps import apps
+        from games.services.engine import UltimateBoard
+        migration = importlib.import_module('games.migrations.0022_game_board_state')
+        rng = random.Random(7)
+        for _ in range(20):
+            board, moves = UltimateBoard(), []
+            while board.winner() is None:
+                cell, subcell = rng.choice(board.legal_moves())
+                moves.append((board.current_turn(), cell, subcell))
+                board.play(cell, subcell)
+            assert migration.replay(moves) == (board.winners, board.next_board_constraint(), board.winner())
+
+        # Finished rows without a winner get the replayed one; a stored winner stays
+        replayed, forfeited = (Game.objects.create(player_x=players[0], player_o=players[1], mode='local', status='finished') for _ in range(2))
+        stored = 'O' if board.winner() == 'X' else 'X'
+        Game.objects.filter(id=forfeited.id).update(winner=stored)
+        for game in (replayed, forfeited):
+            GameMove.objects.bulk_create([GameMove(game=game, move_no=i + 1, player=p, cell=c, subcell=s) for i, (p, c, s) in enumerate(moves)])
+        migration.backfill_board_state(apps, None)
+        assert Game.objects.get(id=replayed.id).winner == board.winner()
+        assert Game.objects.get(id=forfeited.id).winner == stored
@@ -0,0 +1,91 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from games.consumers import GameConsumer
+from games.logic import GameLogic
+from games.models import Game, GameMove
+from games.state_cache import GameStateCache
+
+
+# GameConsumer.process_move without its database_sync_to_async wrapper
+process_move = GameConsumer.__dict__['process_move'].func
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    GameStateCache._entries.clear()
+    yield
+    GameStateCache._entries.clear()
+
+
+@pytest.mark.django_db
+class TestGameStateCache:
+    def test_hot_game_needs_no_reads(self, game, django_assert_num_queries):
+        GameMove.objects.create(game=game, player='X', cell=0, subcell=4, move_no=1)
+        GameStateCache.load(game.id)
+
+        with django_assert_num_queries(0):
+            state = GameStateCache.load(game.id)
+        assert state.board.move_count == 1
+        assert state.board.next_board_constraint() == 4
+
+    def test_observe_move_applies_once(self, game):
+        state = GameStateCache.load(game.id)
+        GameStateCache.observe_move(game.id, 1, 'X', 0, 4)
+        GameStateCache.observe_move(game.id, 1, 'X', 0, 4)
+        assert state.board.move_count == 1
+
+        # A gap means this process missed a move: drop the entry
+        GameStateCache.observe_move(game.id, 3, 'X', 4, 0)
+        assert GameStateCache.get(game.id) is None
+
+    def test_lru_eviction(self, game, monkeypatch):
+        monkeypatch.setattr(GameStateCache, 'MAX_GAMES', 1)
+        GameStateCache.load(game.id)
+        GameStateCache.put('other', object())
+        assert GameStateCache.get(game.id) is None
+
+    def test_consumer_commits_hot_move_without_reads(self, game, players):
+        consumer = GameConsumer()
+        consumer.game_id = str(game.id)
+        consumer.user = players[0]
+        consumer.commit_move(GameStateCache.load(game.id), 0, 4)
+
+        consumer.user = players[1]
+        state = GameStateCache.load(game.id)
+        with CaptureQueriesContext(connection) as ctx:
+            move, _ = consumer.commit_move(state, 4, 0)
+        statements = [q['sql'] for q in ctx.captured_queries if not q['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        # The move and the game row's board state, nothing read
+        assert len(statements) == 2
+        assert statements[0].startswith('INSERT INTO "games_gamemove"')
+        assert statements[1].startswith('UPDATE "games_game"')
+        assert move.move_no == 2
+        assert state.board.current_turn() == 'X'
+
+    def test_rejected_move_does_not_rebuild(self, players):
+        game = Game.objects.create(player_x=players[0], player_o=players[1], status='active', mode='unranked')
+        consumer = GameConsumer()
+        consumer.game_id = str(game.id)
+        consumer.user = players[1]
+        GameStateCache.load(game.id)
+
+        with CaptureQueriesContext(connection) as ctx:
+            with pytest.raises(ValueError, match="Not your turn"):
+                process_move(consumer, 0, 4)
+        # Only the row's move_count was checked
+        assert len(ctx.captured_queries) == 1
+        assert 'games_gamemove' not in ctx.captured_queries[0]['sql']
+
+    def test_stale_cache_is_rebuilt_and_retried(self, players):
+        game = Game.objects.create(player_x=players[0], player_o=players[1], status='active', mode='unranked')
+        consumer = GameConsumer()
+        consumer.game_id = str(game.id)
+        consumer.user = players[1]
+        GameStateCache.load(game.id)
+        # X moves through another process, unseen by this cache
+        GameLogic.save_move(Game.objects.get(id=game.id), GameLogic.load_board(game.id), 'X', 0, 4)
+
+        move, _ = process_move(consumer, 4, 0)
+        assert move.move_no == 2
+        assert GameStateCache.get(game.id).board.move_count == 2
@@ -39,16 +39,16 @@ class LevelingService:
         from games.models import GameMove
         from games.logic import GameLogic
         moves_count = GameMove.objects.filter(game=game, player=player_char).count()
+        board = GameLogic.load_board(game.id)
         
         mini_wins = 0
         for i in range(9):
-            if GameLogic.check_subboard_winner(game.id, i) == player_char:
+            if board.subboard_winner(i) == player_char:
                 mini_wins += 1
                 
         xp = moves_count * 5 + mini_wins * 20      
         
-        from games.logic import GameLogic
-        winner = GameLogic.get_winner(game.id)
+        winner = board.winner()
         
         if winner == player_char:
             xp += 100
@@ -101,5 +101,5 @@ class LevelingService:
                     'leveled_up': current_level > old_level
                 }
         
-        game.save()
+        game.save(update_fields=['player_x_xp_gained', 'player_o_xp_gained'])
         return results
@@ -187,7 +187,7 @@ class RankingService:
                 game.player_o_mmr_change = change_o_mmr
                 game.player_x_lp_change = change_x_lp
                 game.player_o_lp_change = change_o_lp
-                game.save()
+                game.save(update_fields=['player_x_mmr_change', 'player_o_mmr_change', 'player_x_lp_change', 'player_o_lp_change'])
 
         res = {'mmr': {}, 'lp': {}, 'ranks': {}}
         for p_idx, profile, c_mmr, c_lp in [('x', profile_x, change_x_mmr, change_x_lp), ('o', profile_o, change_o_mmr, change_o_lp)]:
@@ -30,6 +30,9 @@ export interface Game {
   chat_messages?: ChatMessage[];
 }
 
+// A game as listed by /games/my-games/: no moves or chat
+export type GameSummary = Omit<Game, 'moves' | 'chat_messages'>;
+
 export interface ChatMessage {
     id: number;
     sender: number | null;
@@ -71,8 +74,30 @@ export const joinGame = async (gameId: string): Promise<Game> => {
   return response.json();
 };
 
+// Move list sent for `?moves=packed`: one byte (cell * 9 + subcell) per move,
+// base64-encoded, and each move's time in ms after the game's created_at
+export interface PackedMoves {
+  encoding: 'packed';
+  indexes: string;
+  times: number[];
+}
+
+export const unpackMoves = (packed: PackedMoves, gameCreatedAt: string): GameMove[] => {
+  const start = new Date(gameCreatedAt).getTime();
+  return Array.from(atob(packed.indexes), (char, i): GameMove => {
+    const index = char.charCodeAt(0);
+    return {
+      move_no: i + 1,
+      player: i % 2 === 0 ? 'X' : 'O',
+      cell: Math.floor(index / 9),
+      subcell: index % 9,
+      created_at: new Date(start + packed.times[i]).toISOString(),
+    };
+  });
+};
+
 export const getGame = async (gameId: string): Promise<Game> => {
-  const response = await fetch(`${API_URL}/games/${gameId}/`, {
+  const response = await fetch(`${API_URL}/games/${gameId}/?moves=packed`, {
     method: "GET",
     headers: getHeaders(),
   });
@@ -81,7 +106,8 @@ export const getGame = async (gameId: string): Promise<Game> => {
     throw new Error("Failed to fetch game");
   }
 
-  return response.json();
+  const game = await response.json();
+  return { ...game, moves: unpackMoves(game.moves, game.created_at) };
 };
 
 export const forfeitGame = async (gameId: string): Promise<Game> => {
@@ -97,19 +123,21 @@ export const forfeitGame = async (gameId: string): Promise<Game> => {
   return response.json();
 };
 
-export interface PaginatedResponse<T> {
-    count: number;
+export interface CursorPage<T> {
     next: string | null;
-    previous: string | null;
     results: T[];
 }
 
-export const getUserGames = async (page = 1, mode = 'all', pageSize = 10): Promise<PaginatedResponse<Game>> => {
+// The cursor of a page's `next` link, to pass back to getUserGames
+export const nextCursor = (page: CursorPage<unknown>): string | null =>
+  page.next ? new URL(page.next).searchParams.get('cursor') : null;
+
+export const getUserGames = async (cursor: string | null = null, mode = 'all', pageSize = 10): Promise<CursorPage<GameSummary>> => {
   const queryParams = new URLSearchParams({
-      page: page.toString(),
       mode: mode,
       page_size: pageSize.toString()
   });
+  if (cursor) queryParams.set('cursor', cursor);
   
   const response = await fetch(`${API_URL}/games/my-games/?${queryParams.toString()}`, {
     method: "GET",
@@ -200,10 +228,21 @@ export interface EvaluationNode {
     best_move?: [number, number];   // (cell, subcell) of best move
     notation: string; // e.g. "e5"
     refutation?: string; // e.g. "Allows f6"
+    pv?: string[]; // Deep analysis only: best line from this position, e.g. ["e5", "d4"]
+    depth?: number; // Deep analysis only: search depth reached
+}
+
+export type EvaluationMode = 'quick' | 'deep';
+
+// Score of the position after a move during play, sent in a `live_evaluation`
+// message that follows the move's `new_move`
+export interface LiveEvaluation {
+    score: number; // X's point of view, same scale as EvaluationNode.score
+    depth: number; // Search depth reached
 }
 
-export const getGameEvaluation = async (gameId: string): Promise<EvaluationNode[]> => {
-    const response = await fetch(`${API_URL}/games/${gameId}/evaluation/`, {
+export const getGameEvaluation = async (gameId: string, mode: EvaluationMode = 'quick'): Promise<EvaluationNode[]> => {
+    const response = await fetch(`${API_URL}/games/${gameId}/evaluation/?mode=${mode}`, {
         headers: getHeaders(),
     });
 
@@ -213,3 +252,28 @@ export const getGameEvaluation = async (gameId: string): Promise<EvaluationNode[
 
     return response.json();
 };
+
+export interface EvaluationJob {
+    job_id?: string;
+    mode?: EvaluationMode;
+    status: 'queued' | 'running' | 'done' | 'failed';
+    completed?: number;
+    total?: number;
+    results?: EvaluationNode[]; // Present when the analysis was already stored
+}
+
+// Starts a background analysis; per-move results then arrive over the game
+// websocket as `analysis_progress` messages.
+export const startGameEvaluation = async (gameId: string, mode: EvaluationMode = 'quick'): Promise<EvaluationJob> => {
+    const response = await fetch(`${API_URL}/games/${gameId}/evaluation/jobs/`, {
+        method: "POST",
+        headers: getHeaders(),
+        body: JSON.stringify({ mode }),
+    });
+
+    if (!response.ok) {
+        throw new Error("Failed to start game evaluation");
+    }
+
+    return response.json();
+};
@@ -1,7 +1,6 @@
 import { useState, useRef, useEffect } from "react";
 import { useGame } from "../../context/GameContext";
 import { useAuth } from "../../hooks/useAuth";
-import { getGameEvaluation } from "../../api/game";
 import type { EvaluationNode } from "../../api/game";
 
 interface ChatPanelProps {
@@ -11,10 +10,11 @@ interface ChatPanelProps {
 import UserAvatar from "../common/UserAvatar";
 
 export default function ChatPanel({ className = "" }: ChatPanelProps) {
-  const { chatMessages, sendChatMessage, status, players, gameId } = useGame();
+  const { chatMessages, sendChatMessage, status, players, evaluationData } = useGame();
   const { user } = useAuth();
   const [inputText, setInputText] = useState("");
-  const [analysisData, setAnalysisData] = useState<EvaluationNode[] | null>(null);
+  // Filled progressively by the game context while the analysis runs
+  const analysisData = status === 'finished' ? evaluationData : null;
   const messagesEndRef = useRef<HTMLDivElement>(null);
 
   const scrollToBottom = () => {
@@ -25,15 +25,6 @@ export default function ChatPanel({ className = "" }: ChatPanelProps) {
     scrollToBottom();
   }, [chatMessages, analysisData]);
 
-  // Fetch analysis if game is finished
-  useEffect(() => {
-    if (status === 'finished' && gameId) {
-        getGameEvaluation(gameId)
-            .then(data => setAnalysisData(data))
-            .catch(err => console.error("Failed to load analysis", err));
-    }
-  }, [gameId, status]);
-
   const handleSubmit = (e: React.FormEvent) => {
     e.preventDefault();
     if (inputText.trim()) {
@@ -104,6 +95,11 @@ export default function ChatPanel({ className = "" }: ChatPanelProps) {
               if (['inaccuracy', 'mistake', 'blunder'].includes(c)) {
                   subLabel = node.feedback; 
               }
+
+              // Deep analysis also carries the engine's best line
+              if (node.pv && node.pv.length > 1 && c !== 'forced') {
+                  subLabel = `${subLabel}\nBest line: ${node.pv.join(' ')}`;
+              }
           }
       } else {
           // Live or just finished but not reviewing history
@@ -6,10 +6,11 @@ interface Props {
 }
 
 export default function EvaluationBar({ className = "" }: Props) {
-  const { currentEvaluation, game, moves: history, currentHistoryIndex } = useGame();
+  const { currentEvaluation, evaluationDepth, evaluationStale, status, game, moves: history, currentHistoryIndex } = useGame();
   const { user } = useAuth();
   
-  if (game?.status !== 'finished' || currentEvaluation === null) {
+  // Finished games show the analysis, active ones the live evaluation
+  if ((status !== 'finished' && status !== 'active') || currentEvaluation === null) {
     return null;
   }
 
@@ -53,12 +54,12 @@ export default function EvaluationBar({ className = "" }: Props) {
       const isMyMate = (currentEvaluation > 0 && !isPlayerO) || (currentEvaluation < 0 && isPlayerO);
       
       // Strict rule: "W" or "L" ONLY if it is explicitly the last move of a finished game.
-      if (isLastMove) {
+      if (isLastMove && status === 'finished') {
            scoreLabel = isMyMate ? "W" : "L";
       } else {
            // Forced mate sequence prediction (intermediate state)
            const remDepth = absScore - 100000;
-           const usedDepth = 4 - remDepth;
+           const usedDepth = (evaluationDepth ?? 4) - remDepth;
            const mateIn = Math.floor(Math.max(0, usedDepth) / 2) + 1;
            scoreLabel = isMyMate ? `W${mateIn}` : `L${mateIn}`;
       }
@@ -68,7 +69,7 @@ export default function EvaluationBar({ className = "" }: Props) {
   }
 
   return (
-    <div className={`w-10 sm:w-12 h-full rounded-full overflow-hidden flex flex-col-reverse relative bg-slate-900/60 backdrop-blur-md border border-white/10 shadow-2xl ${className}`}>
+    <div className={`w-10 sm:w-12 h-full rounded-full overflow-hidden flex flex-col-reverse relative bg-slate-900/60 backdrop-blur-md border border-white/10 shadow-2xl transition-opacity ${evaluationStale ? 'opacity-50' : ''} ${className}`}>
       
       {/* Fill (Your Equity) - Sleek White with Glow */}
       <div 
@@ -8,7 +8,7 @@ interface AIOverviewModalProps {
   onClose: () => void;
 }
 
-type Difficulty = 'easy' | 'normal' | 'hard' | 'custom';
+type Difficulty = 'easy' | 'normal' | 'hard' | 'expert' | 'custom';
 
 // Bot configuration data - stats loaded from backend API
 const BOT_DATA = {
@@ -79,6 +79,28 @@ const BOT_DATA = {
         description: "The Grandmaster of TicTacToe. Magnus calculates every move with ruthless precision.",
         stats: { wins: 0, total_games: 0, win_rate: 0 }
     },
+    expert: {
+        id: 'expert',
+        name: "Ada",
+        icon: "🧠",
+        avatar: {
+            topType: 'LongHairBun',
+            accessoriesType: 'Round',
+            hairColor: 'Auburn',
+            facialHairType: 'Blank',
+            clotheType: 'CollarSweater',
+            clotheColor: 'PastelBlue',
+            eyeType: 'Squint',
+            eyebrowType: 'FlatNatural',
+            mouthType: 'Twinkle',
+            skinColor: 'Light',
+        },
+        color: "text-purple-700",
+        bgWithOpacity: "bg-purple-700/10",
+        border: "border-purple-700/20",
+        description: "Ada plays thousands of games in her head before every move. The strongest opponent on the board.",
+        stats: { wins: 0, total_games: 0, win_rate: 0 }
+    },
     custom: {
         id: 'custom',
         name: "Neuro",
@@ -270,7 +292,7 @@ export default function AIOverviewModal({ isOpen, onClose }: AIOverviewModalProp
 
                     {/* Difficulty List */}
                     <div className="flex-1 flex flex-col gap-2 overflow-y-auto pr-1 min-h-0">
-                        {(['easy', 'normal', 'hard', 'custom'] as Difficulty[]).map((diff) => {
+                        {(['easy', 'normal', 'hard', 'expert', 'custom'] as Difficulty[]).map((diff) => {
                             const bot = BOT_DATA[diff];
                             const isSelected = selectedDifficulty === diff;
                             return (
@@ -321,6 +343,8 @@ export default function AIOverviewModal({ isOpen, onClose }: AIOverviewModalProp
                                     mode = 'bot_medium';
                                 } else if (selectedDifficulty === 'hard') {
                                     mode = 'bot_hard';
+                                } else if (selectedDifficulty === 'expert') {
+                                    mode = 'bot_expert';
                                 } else if (selectedDifficulty === 'custom') {
                                     mode = 'bot_custom';
                                 }
@@ -26,7 +26,7 @@ export default function RankedOverviewModal({ isOpen, onClose, onFindGame }: Ran
   useEffect(() => {
     if (isOpen && user) {
       setShowLadder(false); 
-      getUserGames(1, 'ranked', 100)
+      getUserGames(null, 'ranked', 100)
         .then(data => {
             setGames(data.results);
         });
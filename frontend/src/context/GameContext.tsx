@@ -5,7 +5,7 @@ import { isMoveValid } from "../rules/gameRule";
 import { toGlobalCoord } from "../utils/gameStateUtils";
 import { getSmallTableWinner, getWinner } from "../rules/victoryWatcher";
 import { getAuthToken, useAuth } from "../hooks/useAuth";
-import { getGame, getGameEvaluation, type EvaluationNode } from "../api/game";
+import { getGame, getGameEvaluation, startGameEvaluation, type EvaluationNode, type EvaluationMode, type LiveEvaluation } from "../api/game";
 import { useToast } from "./ToastContext";
 import { reconstructGameStateAtMove } from "../utils/gameStateUtils";
 
@@ -62,6 +62,8 @@ interface GameContextType {
   // Evaluation
   evaluationData: EvaluationNode[] | null;
   currentEvaluation: number | null;
+  evaluationDepth: number | null; // Search depth behind a live currentEvaluation
+  evaluationStale: boolean; // The live currentEvaluation is for an earlier move
   // Chat
   chatMessages: ChatMessage[];
   sendChatMessage: (content: string) => void;
@@ -128,8 +130,19 @@ export function GameProvider({ children, gameId }: { children: ReactNode; gameId
   
   // Evaluation
   const [evaluationData, setEvaluationData] = useState<EvaluationNode[] | null>(null);
+  const [liveEvaluation, setLiveEvaluation] = useState<(LiveEvaluation & { move_no: number; stale?: boolean }) | null>(null);
   const [game, setGame] = useState<any | null>(null);
 
+  // Deep analysis streams in move by move, so its longer search is not a wait
+  const EVALUATION_MODE: EvaluationMode = 'deep';
+
+  const loadEvaluation = (id: string) => {
+      startGameEvaluation(id, EVALUATION_MODE)
+          // Progress messages may already have arrived; keep them
+          .then(job => setEvaluationData(prev => job.results ?? prev ?? []))
+          .catch(console.error);
+  };
+
   const { user } = useAuth();
   const userRef = useRef(user);
 
@@ -303,13 +316,14 @@ export function GameProvider({ children, gameId }: { children: ReactNode; gameId
 
         // Fetch Evaluation if finished
         if (g.status === 'finished') {
-             getGameEvaluation(gameId).then(setEvaluationData).catch(console.error);
+             loadEvaluation(gameId);
         }
 
       }).catch(console.error);
 
       setXpResults(null);
       setEvaluationData(null);
+      setLiveEvaluation(null);
     }
   }, [gameId]);
 
@@ -352,6 +366,12 @@ export function GameProvider({ children, gameId }: { children: ReactNode; gameId
         });
 
         applyMoveLocally(move, moveData.player as Player);
+        // The previous position's score is kept, marked stale, until this one's arrives
+        setLiveEvaluation(prev => prev && prev.move_no < moveData.move_no ? { ...prev, stale: true } : prev);
+
+      } else if (data.type === "live_evaluation") {
+        // Sent after its move; an older position's score may arrive late
+        setLiveEvaluation(prev => prev && prev.move_no > data.move_no ? prev : { ...data.eval, move_no: data.move_no });
 
       } else if (data.type === "game_started") {
           console.log("[GameContext] game_started received:", data);
@@ -398,7 +418,7 @@ export function GameProvider({ children, gameId }: { children: ReactNode; gameId
           
           // Fetch evaluation
           if (gameId) {
-              getGameEvaluation(gameId).then(setEvaluationData).catch(console.error);
+              loadEvaluation(gameId);
           }
 
           if (data.data && data.data.winner) {
@@ -432,6 +452,16 @@ export function GameProvider({ children, gameId }: { children: ReactNode; gameId
               setXpResults(results);
           }
 
+      } else if (data.type === "analysis_progress" && data.mode === EVALUATION_MODE) {
+          // Render the evaluation progressively, one analysed move at a time
+          setEvaluationData(prev => {
+              const others = (prev ?? []).filter(e => e.move_no !== data.move.move_no);
+              return [...others, data.move].sort((a, b) => a.move_no - b.move_no);
+          });
+      } else if (data.type === "analysis_complete" && data.mode === EVALUATION_MODE) {
+          if (gameId) {
+              getGameEvaluation(gameId, EVALUATION_MODE).then(setEvaluationData).catch(console.error);
+          }
       } else if (data.type === "game_invitation_rejected") {
           showToast(`${data.user} declined your invitation.`, "warning");
           triggerShake();
@@ -687,9 +717,14 @@ export function GameProvider({ children, gameId }: { children: ReactNode; gameId
         goToStart,
         // Evaluation
         evaluationData,
-        currentEvaluation: evaluationData && currentHistoryIndex !== null
+        // During play only the live position is scored
+        currentEvaluation: status !== 'finished'
+            ? (currentHistoryIndex === null ? liveEvaluation?.score ?? null : null)
+            : evaluationData && currentHistoryIndex !== null
             ? (currentHistoryIndex === -1 ? 0 : (evaluationData.find(e => e.move_no === currentHistoryIndex + 1)?.score ?? 0))
             : (evaluationData && evaluationData.length > 0 ? evaluationData[evaluationData.length - 1].score : 0),
+        evaluationDepth: status !== 'finished' ? liveEvaluation?.depth ?? null : null,
+        evaluationStale: status !== 'finished' && currentHistoryIndex === null && !!liveEvaluation?.stale,
         game,
         chatMessages,
         sendChatMessage
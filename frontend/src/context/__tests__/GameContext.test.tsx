@@ -19,6 +19,7 @@ vi.mock('../ToastContext', () => ({
 vi.mock('../../api/game', () => ({
   getGame: vi.fn(),
   getGameEvaluation: vi.fn(),
+  startGameEvaluation: vi.fn(),
 }));
 
 describe('GameContext / GameProvider', () => {
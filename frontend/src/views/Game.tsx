@@ -206,7 +206,7 @@ function GameContent() {
 
           {/* Board Container - scales to fit available space */}
           <div className="flex-shrink-0 flex items-center justify-center gap-4 sm:gap-6 h-full max-h-[600px]">
-            {/* Evaluation Bar - Only visible when game finished */}
+            {/* Evaluation Bar - live during play, analysis once finished */}
             <div className="h-[80%] sm:h-[90%] flex-shrink-0">
                 <EvaluationBar className="w-4 sm:w-6 shadow-xl" />
             </div>
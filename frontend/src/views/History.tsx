@@ -1,7 +1,7 @@
 import { useNavigate } from "react-router-dom";
 import { useEffect, useState } from "react";
 import BackgroundShapes from "../components/ui/BackgroundShapes";
-import { getUserGames, type Game } from "../api/game";
+import { getUserGames, nextCursor, type GameSummary } from "../api/game";
 import { useAuth } from "../hooks/useAuth";
 import UserAvatar from "../components/common/UserAvatar";
 
@@ -13,35 +13,38 @@ export default function History() {
   const navigate = useNavigate();
   const { user } = useAuth();
   
-  const [games, setGames] = useState<Game[]>([]);
+  const [games, setGames] = useState<GameSummary[]>([]);
   const [loading, setLoading] = useState(true);
   
   // Filtering & Pagination
   const [activeFilter, setActiveFilter] = useState<FilterMode>('all');
-  const [page, setPage] = useState(1);
-  const [totalPages, setTotalPages] = useState(1);
+  // Cursors of the pages visited so far, the current one last
+  const [cursors, setCursors] = useState<(string | null)[]>([null]);
+  const [next, setNext] = useState<string | null>(null);
+  const page = cursors.length;
 
   // Fetch games when page or filter changes
   useEffect(() => {
     setLoading(true);
-    getUserGames(page, activeFilter)
+    getUserGames(cursors[cursors.length - 1], activeFilter, ITEMS_PER_PAGE)
       .then((data) => {
         setGames(data.results);
-        setTotalPages(Math.ceil(data.count / ITEMS_PER_PAGE));
+        setNext(nextCursor(data));
         setLoading(false);
       })
       .catch((err) => {
         console.error("Failed to fetch match history", err);
         setGames([]);
+        setNext(null);
         setLoading(false);
       });
-  }, [page, activeFilter]);
+  }, [cursors, activeFilter]);
 
   // Reset page when filter changes
   const handleFilterChange = (mode: FilterMode) => {
       if (mode === activeFilter) return;
       setActiveFilter(mode);
-      setPage(1);
+      setCursors([null]);
   };
 
   return (
@@ -119,10 +122,10 @@ export default function History() {
         </div>
 
         {/* Pagination Controls - Only show if necessary */}
-        {(totalPages > 1 || page > 1) && (
+        {(next !== null || page > 1) && (
              <div className="mt-8 flex items-center justify-center gap-4">
                  <button 
-                    onClick={() => setPage(p => Math.max(1, p - 1))}
+                    onClick={() => setCursors(c => c.length > 1 ? c.slice(0, -1) : c)}
                     disabled={page === 1 || loading}
                     className="p-3 bg-white rounded-xl shadow-sm border border-slate-100 disabled:opacity-50 disabled:cursor-not-allowed hover:bg-slate-50 transition-colors text-deepblue hover:-translate-x-1"
                  >
@@ -132,12 +135,12 @@ export default function History() {
                  </button>
                  
                  <div className="bg-white/80 backdrop-blur px-6 py-3 rounded-xl shadow-sm border border-slate-100 font-bold text-deepblue font-paytone text-sm">
-                     Page {page} <span className="text-deepblue/30 mx-1">/</span> {totalPages}
+                     Page {page}
                  </div>
 
                  <button 
-                    onClick={() => setPage(p => Math.min(totalPages, p + 1))}
-                    disabled={page >= totalPages || loading}
+                    onClick={() => next !== null && setCursors(c => [...c, next])}
+                    disabled={next === null || loading}
                     className="p-3 bg-white rounded-xl shadow-sm border border-slate-100 disabled:opacity-50 disabled:cursor-not-allowed hover:bg-slate-50 transition-colors text-deepblue hover:translate-x-1"
                  >
                      <svg xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24" strokeWidth={2.5} stroke="currentColor" className="w-5 h-5">
@@ -170,7 +173,7 @@ function FilterTab({ label, active, onClick }: { label: string, active: boolean,
     );
 }
 
-function MatchCard({ game, user, navigate }: { game: Game, user: any, navigate: any }) {
+function MatchCard({ game, user, navigate }: { game: GameSummary, user: any, navigate: any }) {
     const isPlayerX = user && String(game.player_x) === String(user.id);
     const opponentName = isPlayerX ? (game.player_o_name || "Waiting...") : game.player_x_name;
     const opponentAvatar = isPlayerX ? game.player_o_avatar : game.player_x_avatar;